@@ -0,0 +1,109 @@
+#benchmark: interpreter startup cost of the CLI with lazy vs eagerly imported plugins
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from typing import List, Dict, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Third-party packages whose import cost the lazy registries are meant to avoid
+HEAVY_MODULES = ("torch", "transformers", "scipy", "rank_bm25")
+
+# Code run in a fresh interpreter per scenario
+SCENARIOS = {
+    # What main.py does before its first query for `--retrievers bm25_fast --rerankers ""`
+    "bm25_only": (
+        "import main\n"
+        "from rerankers.pool import RerankerPool\n"
+        "RerankerPool()\n"
+        "main.RETRIEVER_REGISTRY['bm25_fast']\n"
+    ),
+    # Every registered plugin imported up front, as the registries used to do
+    "eager": (
+        "import main\n"
+        "from rerankers.pool import RerankerPool\n"
+        "from retrievers.registry import RETRIEVER_REGISTRY\n"
+        "from rerankers.registry import RERANKER_REGISTRY\n"
+        "RerankerPool()\n"
+        "for registry in (RETRIEVER_REGISTRY, RERANKER_REGISTRY):\n"
+        "    for name in registry:\n"
+        "        try:\n"
+        "            registry[name]\n"
+        "        except ImportError as exc:\n"
+        "            errors.append(str(exc))\n"
+    ),
+}
+
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+errors = []
+{code}
+seconds = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    "import_seconds": seconds,
+    "peak_rss_mb": peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024,
+    "heavy_modules": sorted(name for name in {heavy!r} if name in sys.modules),
+    "errors": errors,
+}}))
+"""
+
+
+def measure_startup(scenario: str, repeats: int = 5) -> Dict[str, Any]:
+    """
+    Run a scenario in `repeats` fresh interpreters and report the median wall time (including
+    interpreter start), the median time spent importing and the largest peak RSS.
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Unknown scenario: {scenario}. Expected one of {list(SCENARIOS)}")
+    code = _PROBE.format(code=SCENARIOS[scenario], heavy=HEAVY_MODULES)
+    wall, runs = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+        wall.append(time.perf_counter() - start)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Scenario {scenario} failed:\n{completed.stderr}")
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return {
+        "scenario": scenario,
+        "repeats": repeats,
+        "wall_seconds": float(np.median(wall)),
+        "import_seconds": float(np.median([run["import_seconds"] for run in runs])),
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+        "heavy_modules": runs[-1]["heavy_modules"],
+        "errors": runs[-1]["errors"],
+    }
+
+
+def run_startup_benchmark(scenarios: List[str], repeats: int = 5) -> List[Dict[str, Any]]:
+    return [measure_startup(scenario, repeats) for scenario in scenarios]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = ArgumentParser(description="Measure CLI startup time and memory with lazy vs eager plugin imports")
+    parser.add_argument("--scenarios", type=str, default=",".join(SCENARIOS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", type=str, default="reports/startup_benchmark.json")
+    args = parser.parse_args()
+
+    rows = run_startup_benchmark(args.scenarios.split(","), args.repeats)
+    for row in rows:
+        print(f"{row['scenario']:<10} wall {row['wall_seconds']:6.2f}s  imports {row['import_seconds']:6.2f}s  "
+              f"rss {row['peak_rss_mb']:7.1f}MB  heavy modules: {', '.join(row['heavy_modules']) or '-'}")
+        for error in row["errors"]:
+            logger.warning(f"{row['scenario']}: {error}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"results": rows}, f, indent=2)
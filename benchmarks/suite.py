@@ -0,0 +1,338 @@
+#benchmark suite: build time, index size, latency percentiles, QPS and peak RSS on synthetic corpora
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from benchmarks.synthetic import iter_synthetic_documents, synthetic_queries
+from utils.data_loader import DEFAULT_CHUNK_SIZE, iter_chunks
+from utils.doc_store import DocStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+
+# Metrics compared against a baseline, by whether a larger value is a regression
+LOWER_IS_BETTER = ("build_seconds", "index_bytes", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mb")
+HIGHER_IS_BETTER = ("qps", "batch_qps")
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process so far (ru_maxrss is KiB on Linux, bytes on macOS).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def directory_bytes(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+    )
+
+
+def latency_stats(latencies: List[float]) -> Dict[str, float]:
+    """
+    p50/p95/p99 per-query latency in milliseconds and serial queries/sec.
+    """
+    latencies_ms = np.asarray(latencies, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if len(latencies_ms) else (0.0, 0.0, 0.0)
+    return {
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "qps": len(latencies) / max(float(np.sum(latencies)), 1e-9),
+    }
+
+
+def build_component(registry: Dict[str, Any], name: str, options: Dict[str, Any]):
+    """
+    Instantiate a registered retriever or reranker with the options its constructor accepts.
+    """
+    component_cls = registry[name]
+    accepted = inspect.signature(component_cls).parameters
+    return component_cls(**{key: value for key, value in options.items() if key in accepted and value is not None})
+
+
+def benchmark_retriever(
+    retriever,
+    corpus: List[Dict[str, str]],
+    queries: List[str],
+    k: int,
+    batch_size: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Index `corpus` chunk by chunk (as main.py does) and time every query on its own, then the
+    whole query set in batches. Index size is the on-disk size of save_index() for retrievers
+    that support the index cache.
+    """
+    from retrievers.index_cache import supports_index_cache
+
+    start = time.perf_counter()
+    retriever.index_chunks(iter_chunks(corpus, chunk_size), corpus)
+    row: Dict[str, Any] = {"build_seconds": time.perf_counter() - start, "index_bytes": None}
+
+    if supports_index_cache(retriever):
+        with tempfile.TemporaryDirectory() as index_dir:
+            retriever.save_index(index_dir)
+            row["index_bytes"] = directory_bytes(index_dir)
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        retriever.retrieve(query, k)
+        latencies.append(time.perf_counter() - start)
+    row.update(latency_stats(latencies))
+
+    start = time.perf_counter()
+    for batch_start in range(0, len(queries), batch_size):
+        retriever.retrieve_batch(queries[batch_start:batch_start + batch_size], k)
+    row["batch_qps"] = len(queries) / max(time.perf_counter() - start, 1e-9)
+    return row
+
+
+def benchmark_reranker(reranker, candidates: List[Any], queries: List[str]) -> Dict[str, Any]:
+    """
+    Time reranking each query's first-stage candidates. There is no index, so build time is
+    the reranker's construction (model load) time, measured by the caller.
+    """
+    latencies = []
+    for query, documents in zip(queries, candidates):
+        start = time.perf_counter()
+        reranker.rerank(query, documents)
+        latencies.append(time.perf_counter() - start)
+    return {"index_bytes": None, **latency_stats(latencies)}
+
+
+def run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Benchmark one (retriever or reranker, corpus size) case. The synthetic corpus and queries
+    are regenerated from the seed, so a case can run in a fresh process. Documents are streamed
+    into a temporary DocStore, so peak RSS reflects the component rather than a list of documents.
+    """
+    with tempfile.TemporaryDirectory(prefix="rag-bench-corpus-") as store_dir:
+        return _run_case(case, store_dir)
+
+
+def _run_case(case: Dict[str, Any], store_dir: str) -> Dict[str, Any]:
+    corpus_options = case["corpus"]
+    corpus = DocStore.build(iter_synthetic_documents(case["num_docs"], case["seed"], **corpus_options),
+                            os.path.join(store_dir, "corpus.store"))
+    queries = [query["text"] for query in synthetic_queries(
+        case["num_queries"], case["seed"], vocab_size=corpus_options["vocab_size"],
+        zipf_exponent=corpus_options["zipf_exponent"]
+    )]
+    row = {"kind": case["kind"], "name": case["name"], "num_docs": case["num_docs"], "num_queries": len(queries)}
+    row["corpus_rss_mb"] = peak_rss_mb()
+
+    try:
+        if case["kind"] == "retriever":
+            from retrievers.registry import RETRIEVER_REGISTRY
+            retriever = build_component(RETRIEVER_REGISTRY, case["name"], case["options"])
+            row.update(benchmark_retriever(retriever, corpus, queries, case["k"], case["batch_size"]))
+        else:
+            from retrievers.fast_bm25_retriever import FastBM25Retriever
+            from rerankers.registry import RERANKER_REGISTRY
+            first_stage = FastBM25Retriever()
+            first_stage.index_chunks(iter_chunks(corpus), corpus)
+            candidates = first_stage.retrieve_batch(queries, case["rerank_depth"])
+            start = time.perf_counter()
+            reranker = build_component(RERANKER_REGISTRY, case["name"], case["options"])
+            build_seconds = time.perf_counter() - start
+            row.update({"build_seconds": build_seconds, **benchmark_reranker(reranker, candidates, queries)})
+    except Exception as exc:
+        # A retriever or reranker that cannot run here (missing model or dependency) is
+        # reported instead of aborting the rest of the suite
+        logger.warning(f"{case['kind']} {case['name']} at {case['num_docs']} docs failed: {exc}")
+        row["error"] = f"{type(exc).__name__}: {exc}"
+    row["peak_rss_mb"] = peak_rss_mb()
+    return row
+
+
+def run_suite(
+    retrievers: List[str],
+    rerankers: List[str],
+    scales: List[int] = DEFAULT_SCALES,
+    num_queries: int = 200,
+    k: int = 10,
+    batch_size: int = 64,
+    rerank_depth: int = 100,
+    seed: int = 0,
+    vocab_size: int = 100_000,
+    zipf_exponent: float = 1.0,
+    mean_length: int = 60,
+    retriever_options: Optional[Dict[str, Any]] = None,
+    reranker_options: Optional[Dict[str, Any]] = None,
+    isolate: bool = True
+) -> Dict[str, Any]:
+    """
+    Benchmark every retriever and reranker at every corpus size.
+
+    With `isolate`, each case runs in a freshly spawned process so its peak RSS and import cost
+    are its own; otherwise cases share this process and peak RSS only ever grows. Components are
+    built with the `retriever_options` / `reranker_options` their constructors accept.
+
+    Returns:
+        {"config", "environment", "results"} with one result row per case.
+    """
+    corpus_options = {"vocab_size": vocab_size, "zipf_exponent": zipf_exponent, "mean_length": mean_length}
+    config = {
+        "scales": scales, "num_queries": num_queries, "k": k, "batch_size": batch_size,
+        "rerank_depth": rerank_depth, "seed": seed, "corpus": corpus_options,
+    }
+    options = {"retriever": retriever_options or {}, "reranker": reranker_options or {}}
+    cases = [
+        {"kind": kind, "name": name, "num_docs": num_docs, "options": options[kind], **config}
+        for num_docs in scales
+        for kind, names in (("retriever", retrievers), ("reranker", rerankers))
+        for name in names
+    ]
+
+    results = []
+    for case in cases:
+        logger.info(f"Benchmarking {case['kind']} {case['name']} on {case['num_docs']} documents")
+        if isolate:
+            with multiprocessing.get_context("spawn").Pool(processes=1) as pool:
+                row = pool.apply(run_case, (case,))
+        else:
+            row = run_case(case)
+        results.append(row)
+
+    environment = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    return {"config": {**config, **{f"{kind}_options": value for kind, value in options.items()}},
+            "environment": environment, "results": results}
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2) -> List[Dict[str, Any]]:
+    """
+    Regressions of `current` against `baseline`: metrics of the same (kind, name, num_docs) case that
+    got worse by more than `tolerance` (relative). Cases or metrics missing from either side, and
+    failed cases, are skipped. Runs with different query sets or corpus settings are not comparable,
+    so a config mismatch is logged.
+    """
+    mismatched = [
+        key for key in ("num_queries", "k", "batch_size", "rerank_depth", "seed", "corpus")
+        if current["config"].get(key) != baseline["config"].get(key)
+    ]
+    if mismatched:
+        logger.warning(f"Baseline was run with a different config ({', '.join(mismatched)}); results may not be comparable")
+    baseline_rows = {
+        (row["kind"], row["name"], row["num_docs"]): row for row in baseline["results"] if "error" not in row
+    }
+    regressions = []
+    for row in current["results"]:
+        reference = baseline_rows.get((row["kind"], row["name"], row["num_docs"]))
+        if reference is None or "error" in row:
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            value, base = row.get(metric), reference.get(metric)
+            if value is None or not base:
+                continue
+            change = (value - base) / base
+            if (metric in LOWER_IS_BETTER and change > tolerance) or (metric in HIGHER_IS_BETTER and change < -tolerance):
+                regressions.append({
+                    "kind": row["kind"], "name": row["name"], "num_docs": row["num_docs"],
+                    "metric": metric, "baseline": base, "current": value, "change": change,
+                })
+    return regressions
+
+
+def format_row(row: Dict[str, Any]) -> str:
+    if "error" in row:
+        return f"{row['kind']:<9} {row['name']:<15} {row['num_docs']:>10}  ERROR {row['error']}"
+    index_mb = "-" if row.get("index_bytes") is None else f"{row['index_bytes'] / 1e6:.1f}"
+    return (f"{row['kind']:<9} {row['name']:<15} {row['num_docs']:>10}  build {row['build_seconds']:8.2f}s  "
+            f"index {index_mb:>8}MB  p50 {row['p50_ms']:8.2f}ms  p95 {row['p95_ms']:8.2f}ms  "
+            f"p99 {row['p99_ms']:8.2f}ms  qps {row['qps']:9.1f}  rss {row['peak_rss_mb']:8.1f}MB")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = ArgumentParser(description="Benchmark retrievers and rerankers on seeded synthetic corpora")
+    parser.add_argument("--retrievers", type=str, default=None,
+                        help="Comma-separated retrievers (default: every registered retriever)")
+    parser.add_argument("--rerankers", type=str, default=None,
+                        help="Comma-separated rerankers (default: every registered reranker; '' for none)")
+    parser.add_argument("--scales", type=str, default=",".join(str(n) for n in DEFAULT_SCALES),
+                        help="Comma-separated corpus sizes, e.g. 1000,10000,100000,1000000,10000000")
+    parser.add_argument("--num_queries", type=int, default=200)
+    parser.add_argument("--topk", type=int, default=10)
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--rerank_depth", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--vocab_size", type=int, default=100_000)
+    parser.add_argument("--zipf_exponent", type=float, default=1.0)
+    parser.add_argument("--mean_length", type=int, default=60, help="Median document length in tokens")
+    parser.add_argument("--dense_model", type=str, default=None,
+                        help="Embedding model for dense/hybrid ('hashing' needs no download)")
+    parser.add_argument("--reranker_model", type=str, default=None)
+    parser.add_argument("--no_isolate", action="store_true", help="Run all cases in this process")
+    parser.add_argument("--output", type=str, default="reports/benchmark.json")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Compare against this earlier output and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown before flagging")
+    parser.add_argument("--update_baseline", action="store_true", help="Also write the results to --baseline")
+    args = parser.parse_args()
+
+    if args.retrievers is None:
+        from retrievers.registry import RETRIEVER_REGISTRY
+        args.retrievers = ",".join(RETRIEVER_REGISTRY)
+    if args.rerankers is None:
+        # Listing names imports nothing; a reranker whose dependencies are missing fails in its own case
+        from rerankers.registry import RERANKER_REGISTRY
+        args.rerankers = ",".join(RERANKER_REGISTRY)
+
+    report = run_suite(
+        [name for name in args.retrievers.split(",") if name],
+        [name for name in args.rerankers.split(",") if name],
+        scales=[int(n) for n in args.scales.split(",")],
+        num_queries=args.num_queries,
+        k=args.topk,
+        batch_size=args.batch_size,
+        rerank_depth=args.rerank_depth,
+        seed=args.seed,
+        vocab_size=args.vocab_size,
+        zipf_exponent=args.zipf_exponent,
+        mean_length=args.mean_length,
+        retriever_options={"model_name": args.dense_model},
+        reranker_options={"model_name": args.reranker_model},
+        isolate=not args.no_isolate,
+    )
+    for row in report["results"]:
+        print(format_row(row))
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                regressions = compare_results(report, json.load(f), args.tolerance)
+            for regression in regressions:
+                print(f"REGRESSION {regression['kind']} {regression['name']} @ {regression['num_docs']} docs: "
+                      f"{regression['metric']} {regression['baseline']:.4g} -> {regression['current']:.4g} "
+                      f"({regression['change']:+.0%})")
+        else:
+            logger.warning(f"Baseline {args.baseline} does not exist yet")
+            regressions = []
+        if args.update_baseline:
+            with open(args.baseline, "w") as f:
+                json.dump(report, f, indent=2)
+        if regressions:
+            sys.exit(1)
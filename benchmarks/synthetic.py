@@ -0,0 +1,122 @@
+#seeded synthetic corpus and query generator for scaling benchmarks
+import gzip
+import json
+import os
+from typing import List, Dict, Iterable, Iterator
+
+import numpy as np
+
+# Documents are generated in fixed-size blocks, each from its own seeded stream
+_BLOCK_SIZE = 10_000
+
+
+def zipf_cdf(vocab_size: int, exponent: float = 1.0) -> np.ndarray:
+    """
+    Cumulative distribution of a Zipf law over term ranks 0..vocab_size-1 (p(rank) ∝ 1 / (rank + 1)^exponent).
+    """
+    weights = 1.0 / np.arange(1, vocab_size + 1, dtype=np.float64) ** exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def make_vocab(vocab_size: int) -> np.ndarray:
+    """
+    Terms by frequency rank. Frequent terms are short and rare ones longer, as in natural text.
+    """
+    letters = "etaoinshrdlcumwfgypbvkjxqz"
+    terms = []
+    for rank in range(vocab_size):
+        term, value = "", rank
+        while True:
+            term += letters[value % len(letters)]
+            value //= len(letters)
+            if not value:
+                break
+        terms.append(term)
+    return np.array(terms, dtype=object)
+
+
+def iter_synthetic_documents(
+    num_docs: int,
+    seed: int = 0,
+    vocab_size: int = 100_000,
+    zipf_exponent: float = 1.0,
+    mean_length: int = 60,
+    length_sigma: float = 0.6,
+    id_offset: int = 0
+) -> Iterator[Dict[str, str]]:
+    """
+    Yield `num_docs` {"id", "text"} documents with Zipf-distributed terms.
+
+    Lengths are log-normal with median `mean_length` tokens (clipped to [1, 20 * mean_length]),
+    which gives the long tail of passage lengths seen in real corpora. Documents are produced
+    block by block, so even 10M-document corpora can be streamed without holding them in memory.
+    The same arguments always yield the same documents, and a smaller corpus is a prefix of a
+    larger one, so every scale of a benchmark shares its documents. Ids run from
+    "doc<id_offset>"; give batches added to an existing corpus their own seed and id range.
+    """
+    cdf = zipf_cdf(vocab_size, zipf_exponent)
+    vocab = make_vocab(vocab_size)
+    for block_start in range(0, num_docs, _BLOCK_SIZE):
+        rng = np.random.default_rng([seed, block_start // _BLOCK_SIZE])
+        block_size = min(_BLOCK_SIZE, num_docs - block_start)
+        lengths = rng.lognormal(np.log(mean_length), length_sigma, _BLOCK_SIZE)[:block_size]
+        lengths = np.clip(lengths.astype(np.int64), 1, 20 * mean_length)
+        ranks = np.searchsorted(cdf, rng.random(int(lengths.sum())), side="right")
+        terms = vocab[np.minimum(ranks, vocab_size - 1)]
+        bounds = np.concatenate([[0], np.cumsum(lengths)])
+        for offset in range(block_size):
+            yield {
+                "id": f"doc{id_offset + block_start + offset}",
+                "text": " ".join(terms[bounds[offset]:bounds[offset + 1]]),
+            }
+
+
+def synthetic_corpus(num_docs: int, seed: int = 0, **kwargs) -> List[Dict[str, str]]:
+    return list(iter_synthetic_documents(num_docs, seed, **kwargs))
+
+
+def synthetic_queries(
+    num_queries: int,
+    seed: int = 0,
+    vocab_size: int = 100_000,
+    zipf_exponent: float = 1.0,
+    min_length: int = 2,
+    max_length: int = 6,
+    skip_top: int = 50
+) -> List[Dict[str, str]]:
+    """
+    {"query_id", "text"} queries of `min_length`..`max_length` distinct terms drawn from the corpus
+    Zipf law, skipping the `skip_top` most frequent (stopword-like) ranks so queries mix common
+    and rare terms the way keyword queries do.
+    """
+    rng = np.random.default_rng([seed, 2 ** 32 - 1])
+    cdf = zipf_cdf(vocab_size, zipf_exponent)
+    vocab = make_vocab(vocab_size)
+    skip_top = min(skip_top, vocab_size - max_length)
+    low = cdf[skip_top - 1] if skip_top > 0 else 0.0
+    queries = []
+    for query_index in range(num_queries):
+        length = int(rng.integers(min_length, max_length + 1))
+        ranks: List[int] = []
+        while len(ranks) < length:
+            rank = int(np.searchsorted(cdf, low + rng.random() * (1.0 - low), side="right"))
+            rank = min(rank, vocab_size - 1)
+            if rank not in ranks:
+                ranks.append(rank)
+        queries.append({"query_id": f"q{query_index}", "text": " ".join(vocab[ranks])})
+    return queries
+
+
+def write_jsonl(path: str, records: Iterable[Dict[str, str]]) -> int:
+    """
+    Write records as JSONL (gzipped if the path ends in .gz), e.g. to feed a synthetic corpus to main.py.
+    Returns the number of records written.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    count = 0
+    with (gzip.open(path, "wt", encoding="utf-8") if path.endswith(".gz") else open(path, "w", encoding="utf-8")) as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+            count += 1
+    return count
@@ -0,0 +1,103 @@
+#benchmark: incremental BM25 updates vs full index rebuilds
+import json
+import os
+import random
+import time
+from argparse import ArgumentParser
+from typing import Dict, Any
+
+from benchmarks.synthetic import synthetic_corpus
+from retrievers.bm25_retriever import BM25Retriever
+from retrievers.fast_bm25_retriever import FastBM25Retriever
+from retrievers.segmented_bm25_retriever import SegmentedBM25Retriever
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run_update_benchmark(
+    num_docs: int = 100_000,
+    update_fraction: float = 0.01,
+    num_updates: int = 5,
+    vocab_size: int = 50_000,
+    mean_length: int = 50,
+    include_rank_bm25: bool = False,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Apply `num_updates` daily-style updates (add and delete `update_fraction` of the corpus each)
+    to a SegmentedBM25Retriever, timing each update against rebuilding FastBM25Retriever
+    (and optionally rank_bm25) on the updated corpus.
+    """
+    corpus_options = {"vocab_size": vocab_size, "mean_length": mean_length}
+    rng = random.Random(seed)
+    live = synthetic_corpus(num_docs, seed, **corpus_options)
+    next_id = num_docs
+    per_update = max(1, int(num_docs * update_fraction))
+
+    segmented = SegmentedBM25Retriever()
+    initial_seconds = timed(lambda: segmented.index(live))
+
+    updates = []
+    for update in range(num_updates):
+        # Each batch has its own seeded stream and ids after every earlier document
+        added = synthetic_corpus(per_update, seed + 1 + update, id_offset=next_id, **corpus_options)
+        next_id += per_update
+        deleted = rng.sample([doc["id"] for doc in live], per_update)
+
+        add_seconds = timed(lambda: segmented.add_documents(added))
+        delete_seconds = timed(lambda: segmented.delete_documents(deleted))
+        merge_seconds = timed(segmented.wait_for_merges)
+
+        removed = set(deleted)
+        live = [doc for doc in live if doc["id"] not in removed] + added
+        row = {
+            "add_seconds": add_seconds,
+            "delete_seconds": delete_seconds,
+            "merge_wait_seconds": merge_seconds,
+            "segments": segmented.num_segments,
+            "rebuild_fast_bm25_seconds": timed(lambda: FastBM25Retriever().index(live)),
+        }
+        if include_rank_bm25:
+            row["rebuild_rank_bm25_seconds"] = timed(lambda: BM25Retriever().index(live))
+        updates.append(row)
+
+    update_mean = sum(row["add_seconds"] + row["delete_seconds"] for row in updates) / len(updates)
+    rebuild_mean = sum(row["rebuild_fast_bm25_seconds"] for row in updates) / len(updates)
+    return {
+        "num_docs": num_docs,
+        "docs_per_update": per_update,
+        "initial_index_seconds": initial_seconds,
+        "merges": segmented.num_merges,
+        "updates": updates,
+        "mean_update_seconds": update_mean,
+        "mean_rebuild_seconds": rebuild_mean,
+        "speedup": rebuild_mean / max(update_mean, 1e-9),
+    }
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark incremental BM25 updates against full rebuilds")
+    parser.add_argument("--num_docs", type=int, default=100_000)
+    parser.add_argument("--update_fraction", type=float, default=0.01,
+                        help="Share of the corpus added and deleted per update")
+    parser.add_argument("--num_updates", type=int, default=5)
+    parser.add_argument("--vocab_size", type=int, default=50_000)
+    parser.add_argument("--mean_length", type=int, default=50, help="Median document length in tokens")
+    parser.add_argument("--rank_bm25", action="store_true", help="Also time rank_bm25 (BM25Retriever) rebuilds")
+    parser.add_argument("--output", type=str, default="reports/update_latency.json")
+    args = parser.parse_args()
+
+    result = run_update_benchmark(args.num_docs, args.update_fraction, args.num_updates,
+                                  args.vocab_size, args.mean_length, args.rank_bm25)
+    for row in result["updates"]:
+        print(", ".join(f"{name}={value:.3f}" if isinstance(value, float) else f"{name}={value}"
+                        for name, value in row.items()))
+    print(f"Mean update {result['mean_update_seconds']:.3f}s vs rebuild {result['mean_rebuild_seconds']:.3f}s "
+          f"({result['speedup']:.1f}x faster)")
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
@@ -1,36 +1,113 @@
+import os
+import re
+import sys
 import streamlit as st
 import pandas as pd
+import altair as alt
 import json
 
+# Make the repository root importable under `streamlit run dashboard/app.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from evaluation.report_writer import read_report, read_runs
+from evaluation.columnar_report import ColumnarReport, is_columnar_report
+from evaluation.cost_quality import cost_quality_table
+from utils.instrumentation import STAGES
+from utils.doc_store import open_doc_store
+from utils.data_loader import load_queries as read_queries
+
 st.set_page_config(page_title="RAG-Bench Dashboard", layout="wide")
 
 # --- Load Evaluation Report ---
 @st.cache_data
-def load_report(path: str):
-    with open(path, "r") as f:
-        data = json.load(f)
+def load_runs(path: str):
+    if not path.endswith(".jsonl"):
+        return []
+    return read_runs(path)
+
+@st.cache_data
+def load_report(path: str, run_id: str = None):
+    # JSONL reports (one or more runs); legacy reports are a single JSON list
+    if path.endswith(".jsonl"):
+        data = read_report(path, run_ids=[run_id] if run_id else None)
+    else:
+        with open(path, "r") as f:
+            data = json.load(f)
     
     df = pd.DataFrame(data)
 
-    # Convert relevant columns to numeric to prevent formatting errors
-    metrics = ["precision@5_value", "recall@5_value", "ndcg@5_value"]
-    for metric in metrics:
-        df[metric] = pd.to_numeric(df[metric], errors="coerce")
+    # Convert metric columns to numeric to prevent formatting errors
+    for column in df.columns:
+        if column.endswith("_value"):
+            df[column] = pd.to_numeric(df[column], errors="coerce")
 
     return df
 
-report_path = st.sidebar.text_input("📂 Evaluation Report Path", "reports/retrieval_performance.json")
-df = load_report(report_path)
+# Metrics shown by the dashboard, at the cutoff picked in the sidebar (reports hold the `--cutoffs` of their run)
+METRIC_NAMES = ("precision", "recall", "ndcg")
+METRIC_LABELS = {"precision": "Precision", "recall": "Recall", "ndcg": "NDCG"}
+FAILURE_THRESHOLDS = {"precision": 0.2, "recall": 0.5, "ndcg": 0.5}
+METRIC_COLUMN_PATTERN = re.compile(r"^(precision|recall|ndcg)@(\d+)_value$")
+
+@st.cache_data
+def report_columns(path: str, run_id: str = None):
+    """
+    Column names of a report: from the metadata of columnar reports, from the rows otherwise.
+    """
+    if is_columnar_report(path):
+        return list(ColumnarReport(path).columns)
+    return list(load_report(path, run_id).columns)
+
+def metric_label(column: str) -> str:
+    name, cutoff = METRIC_COLUMN_PATTERN.match(column).groups()
+    return f"{METRIC_LABELS[name]}@{cutoff}"
+
+@st.cache_data
+def load_columns(path: str, columns: tuple, filters: tuple = (), run_id: str = None):
+    """
+    Only the given columns, for rows matching filters ((column, (values...)), ...).
+    Columnar report directories read just those columns and rows; row reports are loaded
+    whole, then filtered and projected.
+    """
+    filters = dict(filters)
+    if is_columnar_report(path):
+        report = ColumnarReport(path)
+        return pd.DataFrame(report.read([c for c in columns if c in report.columns], filters))
+
+    df = load_report(path, run_id)
+    for column, values in filters.items():
+        df = df[df[column].isin(values)]
+    return df[[c for c in columns if c in df.columns]]
+
+report_path = st.sidebar.text_input("📂 Evaluation Report Path (JSONL file or columnar directory)",
+                                    "reports/retrieval_performance.jsonl")
+runs = load_runs(report_path)
+run_id = None
+if len(runs) > 1:
+    # Merged reports hold several runs; show the latest by default
+    labels = {f"{run['run_id']} ({run['rows']} rows{'' if run['complete'] else ', partial'})": run["run_id"]
+              for run in runs}
+    run_id = labels[st.sidebar.selectbox("🗂️ Run", list(labels), index=len(labels) - 1)]
+
+available_columns = report_columns(report_path, run_id)
+cutoffs = sorted({int(match.group(2)) for match in map(METRIC_COLUMN_PATTERN.match, available_columns) if match})
+if not cutoffs:
+    st.error(f"No precision/recall/NDCG @K columns found in {report_path}.")
+    st.stop()
+cutoff = st.sidebar.selectbox("🎯 Metric cutoff (@K)", cutoffs, index=cutoffs.index(5) if 5 in cutoffs else 0)
+METRIC_COLUMNS = tuple(f"{name}@{cutoff}_value" for name in METRIC_NAMES
+                       if f"{name}@{cutoff}_value" in available_columns)
 
 # --- Setup Tabs ---
 st.title("RAG-Bench: Retrieval Evaluation Dashboard")
-tab1, tab2, tab3 = st.tabs(["📊 Metrics Overview", "🔍 Query Explorer", "⚠️ Failure Analysis"])
+tab1, tab2, tab3, tab4 = st.tabs(["📊 Metrics Overview", "🔍 Query Explorer", "⚠️ Failure Analysis",
+                                  "⏱️ Cost vs Quality"])
 
 # --- Tab 1: Metrics Overview ---
 with tab1:
     st.header("Average Metrics by Retrieval Strategy")
 
-    metrics = ["precision@5_value", "recall@5_value", "ndcg@5_value"]
+    metrics = list(METRIC_COLUMNS)
+    df = load_columns(report_path, ("retriever",) + METRIC_COLUMNS, run_id=run_id)
     grouped = df.groupby("retriever")[metrics].mean().reset_index()
 
     # Ensure formatting is only applied to numeric columns
@@ -43,19 +120,17 @@ with tab1:
 # --- Load Queries ---
 @st.cache_data
 def load_queries(path: str):
-    with open(path, "r") as f:
-        queries = json.load(f)
-    return {q["query_id"]: q["text"] for q in queries}
+    # Same formats as main.py: JSON list, JSONL or gzipped JSONL
+    return {q["query_id"]: q["text"] for q in read_queries(path)}
 
 queries_path = st.sidebar.text_input("📂 Queries File Path", "queries/query_list.json")
 query_map = load_queries(queries_path)
 
 # --- Load document Corpus ---
-@st.cache_data
+@st.cache_resource
 def load_corpus(path: str):
-    with open(path, "r") as f:
-        raw_list = json.load(f)
-    return {doc["id"]: doc["text"] for doc in raw_list}  # returns {doc_id: doc_text}
+    # Memory-mapped store built once next to the corpus; passages are read only when shown
+    return open_doc_store(path)
 
 
 corpus_path = st.sidebar.text_input("📂 Corpus File Path", "data/corpus.json")
@@ -69,8 +144,9 @@ with tab2:
         selected_text = st.selectbox("Select a query:", list(query_map.values()))
         selected_qid = next(qid for qid, text in query_map.items() if text == selected_text)
 
-        # Filter rows for this query
-        query_df = df[df["query_id"] == selected_qid]
+        # Filter rows for this query (pushed down to columnar reports)
+        query_df = load_columns(report_path, ("query_id", "retriever", "retrieved_doc_ids") + METRIC_COLUMNS,
+                                filters=(("query_id", (selected_qid,)),), run_id=run_id)
 
         if not query_df.empty:
             for idx, row in query_df.iterrows():
@@ -79,13 +155,12 @@ with tab2:
 
                 st.subheader(f"{idx + 1}. `{retriever_name}`")
 
-                st.markdown(f"**Precision@5:** {row['precision@5_value']:.2f} &nbsp;&nbsp;|&nbsp;&nbsp; "
-                            f"**Recall@5:** {row['recall@5_value']:.2f} &nbsp;&nbsp;|&nbsp;&nbsp; "
-                            f"**NDCG@5:** {row['ndcg@5_value']:.2f}")
+                st.markdown(" &nbsp;&nbsp;|&nbsp;&nbsp; ".join(
+                    f"**{metric_label(column)}:** {row[column]:.2f}" for column in METRIC_COLUMNS))
 
                 for doc_id in doc_ids:
                     with st.expander(f"📄 {doc_id}"):
-                        st.write(corpus.get(doc_id, "*Document not found.*"))
+                        st.write(corpus.get_text(doc_id, "*Document not found.*"))
         else:
             st.warning("No results available for this query.")
 
@@ -100,16 +175,18 @@ with tab3:
     st.markdown("Use filters below to identify underperforming queries.")
 
     # Filtering controls
-    precision_thresh = st.slider("Min Precision@5 to flag as failure", 0.0, 1.0, 0.2, 0.05)
-    recall_thresh = st.slider("Min Recall@5 to flag as failure", 0.0, 1.0, 0.5, 0.05)
-    ndcg_thresh = st.slider("Min NDCG@5 to flag as failure", 0.0, 1.0, 0.5, 0.05)
+    thresholds = {
+        column: st.slider(f"Min {metric_label(column)} to flag as failure", 0.0, 1.0,
+                          FAILURE_THRESHOLDS[METRIC_COLUMN_PATTERN.match(column).group(1)], 0.05)
+        for column in METRIC_COLUMNS
+    }
 
     # Apply filtering
-    fail_df = df[
-        (df["precision@5_value"] < precision_thresh) |
-        (df["recall@5_value"] < recall_thresh) |
-        (df["ndcg@5_value"] < ndcg_thresh)
-    ]
+    df = load_columns(report_path, ("query_id", "retriever") + METRIC_COLUMNS, run_id=run_id)
+    failed = pd.Series(False, index=df.index)
+    for column, threshold in thresholds.items():
+        failed |= df[column] < threshold
+    fail_df = df[failed].copy()
 
     if fail_df.empty:
         st.success("✅ No queries matched the failure criteria.")
@@ -120,7 +197,46 @@ with tab3:
         fail_df["query_text"] = fail_df["query_id"].apply(lambda qid: query_map.get(qid, "N/A"))
 
         # Display results
-        st.dataframe(fail_df[[
-            "query_id", "query_text", "retriever",
-            "precision@5_value", "recall@5_value", "ndcg@5_value"
-        ]].sort_values(by=["precision@5_value"]))
+        st.dataframe(fail_df[["query_id", "query_text", "retriever"] + list(METRIC_COLUMNS)]
+                     .sort_values(by=[METRIC_COLUMNS[0]]))
+
+# --- Tab 4: Cost vs Quality ---
+STAGE_COLUMNS = tuple(f"{stage}_ms" for stage in STAGES)
+
+with tab4:
+    st.header("⏱️ Cost vs Quality")
+
+    df = load_columns(report_path, ("retriever", "total_ms") + STAGE_COLUMNS + METRIC_COLUMNS, run_id=run_id)
+    if "total_ms" not in df.columns:
+        st.info("This report has no stage timings. Re-run main.py with `--instrument` to record them.")
+    else:
+        ndcg_column = f"ndcg@{cutoff}_value"
+        quality_metric = st.selectbox("Quality metric", list(METRIC_COLUMNS),
+                                      index=METRIC_COLUMNS.index(ndcg_column) if ndcg_column in METRIC_COLUMNS else 0)
+        cost_percentile = st.selectbox("Latency percentile for the Pareto front", [50, 95, 99], index=1)
+
+        table = pd.DataFrame(cost_quality_table(df["retriever"].tolist(), df["total_ms"].to_numpy(dtype=float),
+                                                df[quality_metric].to_numpy(dtype=float), cost_percentile))
+        table = table.rename(columns={"quality": quality_metric})
+
+        st.subheader("Per-query latency by strategy (ms)")
+        st.dataframe(table.style.format({"p50_ms": "{:.2f}", "p95_ms": "{:.2f}", "p99_ms": "{:.2f}",
+                                         quality_metric: "{:.3f}"}))
+
+        st.subheader("Mean time per stage (ms)")
+        stage_columns = [c for c in STAGE_COLUMNS if c in df.columns]
+        st.bar_chart(df.groupby("retriever")[stage_columns].mean())
+
+        st.subheader(f"{quality_metric} vs p{cost_percentile} latency")
+        cost_column = f"p{cost_percentile}_ms"
+        points = alt.Chart(table).mark_circle(size=120).encode(
+            x=alt.X(cost_column, title=f"p{cost_percentile} latency (ms)", scale=alt.Scale(type="log")),
+            y=alt.Y(quality_metric, title=quality_metric),
+            color=alt.Color("pareto", title="Pareto optimal"),
+            tooltip=["strategy", "queries", "p50_ms", "p95_ms", "p99_ms", quality_metric],
+        )
+        front = alt.Chart(table[table["pareto"]]).mark_line(strokeDash=[4, 4]).encode(
+            x=cost_column, y=quality_metric,
+        )
+        st.altair_chart(front + points, use_container_width=True)
+        st.caption("Strategies on the dashed line are Pareto optimal: no other strategy is both faster and better.")
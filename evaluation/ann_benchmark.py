@@ -0,0 +1,54 @@
+#compares a dense retriever's ANN index against exact search
+import time
+from typing import List, Dict, Any
+
+import numpy as np
+
+from evaluation.metrics import compute_metrics
+
+
+def run_ann_benchmark(retriever, queries: List[str], k: int, nprobes: List[int]) -> List[Dict[str, Any]]:
+    """
+    Measure recall@k of the ANN index against exact search, and queries/sec of both,
+    for each nprobe setting. Recall is computed with the batch metric engine, using the
+    exact top-k as ground truth.
+
+    Args:
+        retriever: An indexed DenseRetriever with an ANN index.
+        queries: Query texts.
+        k: Cutoff for recall and number of results per query.
+        nprobes: nprobe values to evaluate.
+
+    Returns:
+        One row per nprobe with recall, ANN QPS and exact QPS.
+    """
+    if retriever.ann_index is None:
+        raise ValueError("The retriever has no ANN index. Configure it with ann='ivfpq'.")
+
+    query_vectors = retriever.embed_queries(queries)
+
+    start = time.perf_counter()
+    exact_ids, _ = retriever.exact_search(query_vectors, k)
+    exact_qps = len(queries) / max(time.perf_counter() - start, 1e-9)
+
+    exact_qrels = [ids.tolist() for ids in exact_ids]
+    rows = []
+    for nprobe in nprobes:
+        start = time.perf_counter()
+        ann_ids, _ = retriever.ann_index.search(
+            query_vectors, k, retriever.embeddings, retriever._scales_or_none(), nprobe=nprobe
+        )
+        ann_qps = len(queries) / max(time.perf_counter() - start, 1e-9)
+
+        recalls = compute_metrics([ids.tolist() for ids in ann_ids], exact_qrels, [k])[f"recall@{k}"]
+
+        nlist = len(retriever.ann_index.coarse_centroids)
+        rows.append({
+            "nprobe": min(nprobe, nlist),
+            "nlist": nlist,
+            "k": k,
+            f"recall@{k}": float(np.mean(recalls)) if len(recalls) else 0.0,
+            "ann_qps": ann_qps,
+            "exact_qps": exact_qps,
+        })
+    return rows
@@ -0,0 +1,212 @@
+#BM25 (k1, b) grid search over one built index: vectorized over parameters, parallel over queries
+import itertools
+import logging
+import multiprocessing
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+import numpy as np
+
+from retrievers.fast_bm25_retriever import select_top_k
+from utils.ranked_list import RankedList
+
+logger = logging.getLogger(__name__)
+
+SWEEP_PARAMETERS = ("k1", "b")
+
+# Most (parameter, posting) contributions materialized at once while scoring a query
+MAX_BLOCK_ELEMENTS = 1 << 22
+
+# Set in the parent before the pool forks; workers read it copy-on-write
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def parse_sweep(spec: str) -> Dict[str, List[float]]:
+    """
+    Parse a sweep spec such as "k1=0.6:1.8:0.2,b=0.3:0.9:0.1" into parameter values.
+    Each parameter takes "start:stop:step" (stop included) or a single value; parameters
+    left out keep the retriever's setting.
+    """
+    ranges: Dict[str, List[float]] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, values = item.partition("=")
+        name = name.strip()
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(f"Unknown sweep parameter: {name}. Expected one of {SWEEP_PARAMETERS}")
+        if name in ranges:
+            raise ValueError(f"Sweep parameter {name} given twice")
+        try:
+            bounds = [float(value) for value in values.split(":")]
+        except ValueError:
+            raise ValueError(f"Invalid sweep range for {name}: {values!r}") from None
+        if len(bounds) == 1:
+            ranges[name] = bounds
+            continue
+        if len(bounds) != 3 or bounds[2] <= 0 or bounds[1] < bounds[0]:
+            raise ValueError(f"Sweep range for {name} must be start:stop:step with step > 0 and stop >= start, got {values!r}")
+        start, stop, step = bounds
+        # Tolerate float drift so the stop value is included, then round it away
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        ranges[name] = np.round(start + step * np.arange(count), 10).tolist()
+    if not ranges:
+        raise ValueError("Empty sweep spec")
+    return ranges
+
+
+def parameter_grid(ranges: Dict[str, List[float]], k1: float = 1.5, b: float = 0.75) -> List[Dict[str, float]]:
+    """
+    All (k1, b) combinations of `ranges`, k1 varying slowest; missing parameters use the defaults given.
+    """
+    k1s = ranges.get("k1", [k1])
+    bs = ranges.get("b", [b])
+    return [{"k1": k1_value, "b": b_value} for k1_value, b_value in itertools.product(k1s, bs)]
+
+
+def score_parameter_grid(
+    retriever,
+    term_ids: List[int],
+    k1s: np.ndarray,
+    bs: np.ndarray,
+    k: int
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Top-k of one query for every (k1[i], b[i]) pair.
+
+    The query's postings are gathered once; contributions
+    idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)) are computed for a block of
+    parameter pairs as one (pairs x postings) array and summed per document with a single
+    bincount. The arithmetic and summation order are those of FastBM25Retriever.score(), so
+    each result equals FastBM25Retriever(k1=k1[i], b=b[i]).retrieve() on the same index.
+
+    Returns:
+        One (doc indices, scores) pair per parameter pair.
+    """
+    num_docs = len(retriever.doc_lens)
+    if term_ids:
+        slices = [(int(retriever.offsets[t]), int(retriever.offsets[t + 1])) for t in term_ids]
+        docs = np.concatenate([retriever.postings_docs[start:end] for start, end in slices])
+        tfs = np.concatenate([retriever.postings_tfs[start:end] for start, end in slices])
+        idf = np.concatenate([np.full(end - start, retriever.idf[t]) for t, (start, end) in zip(term_ids, slices)])
+    else:
+        docs = np.empty(0, dtype=np.int32)
+        tfs = np.empty(0, dtype=np.int32)
+        idf = np.empty(0, dtype=np.float64)
+    unique_docs, inverse = np.unique(docs, return_inverse=True)
+    doc_lens = retriever.doc_lens[docs]
+
+    results = []
+    block = max(1, MAX_BLOCK_ELEMENTS // max(len(docs), 1))
+    for start in range(0, len(k1s), block):
+        k1 = k1s[start:start + block, None]
+        b = bs[start:start + block, None]
+        norms = k1 * (1 - b + b * doc_lens / retriever.avgdl)
+        contributions = idf * (tfs * (k1 + 1) / (tfs + norms))
+        # Row i of the block accumulates into buckets [i * U, (i + 1) * U)
+        buckets = (np.arange(len(k1))[:, None] * len(unique_docs) + inverse).ravel()
+        scores = np.bincount(buckets, weights=contributions.ravel(), minlength=len(k1) * len(unique_docs))
+        for row in scores.reshape(len(k1), len(unique_docs)):
+            results.append(select_top_k(unique_docs.astype(np.int64), row, k, num_docs))
+    return results
+
+
+def _sweep_chunk(bounds: Tuple[int, int]) -> List[List[Tuple[np.ndarray, np.ndarray]]]:
+    """
+    Worker: score one chunk of queries for the whole grid, as [parameter pair][query] arrays.
+    """
+    retriever = _WORKER_STATE["retriever"]
+    k1s, bs, k = _WORKER_STATE["k1s"], _WORKER_STATE["bs"], _WORKER_STATE["k"]
+    per_query = [
+        score_parameter_grid(retriever, retriever._query_term_ids(query), k1s, bs, k)
+        for query in _WORKER_STATE["queries"][bounds[0]:bounds[1]]
+    ]
+    return [
+        [(docs.astype(np.int32), scores.astype(np.float32)) for docs, scores in by_query]
+        for by_query in zip(*per_query)
+    ] if per_query else [[] for _ in k1s]
+
+
+def sweep_bm25(
+    retriever,
+    queries: List[str],
+    grid: List[Dict[str, float]],
+    k: int,
+    num_workers: int = 1,
+    chunk_size: int = 64
+) -> Iterator[Tuple[int, List[List[RankedList]]]]:
+    """
+    Rank `queries` under every parameter pair of `grid` using one indexed FastBM25Retriever.
+
+    Term frequencies, document frequencies and lengths come from the existing index; only the
+    per-posting weights depend on (k1, b) and they are recomputed on the fly, so a sweep costs
+    one index build. Chunks of `chunk_size` queries are scored on `num_workers` forked processes
+    sharing the index copy-on-write (serially if fork is unavailable or num_workers <= 1).
+
+    Yields:
+        (index of the chunk's first query, results[pair][query] as RankedLists), in query order.
+    """
+    if retriever.vocab is None:
+        raise ValueError("The index has not been built. Please call index() first.")
+    k1s = np.array([params["k1"] for params in grid], dtype=np.float64)
+    bs = np.array([params["b"] for params in grid], dtype=np.float64)
+    chunks = [(start, min(start + chunk_size, len(queries))) for start in range(0, len(queries), chunk_size)]
+
+    _WORKER_STATE.update({"retriever": retriever, "queries": queries, "k1s": k1s, "bs": bs, "k": k})
+    try:
+        parallel = num_workers > 1 and len(chunks) > 1 and "fork" in multiprocessing.get_all_start_methods()
+        if num_workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+            logger.warning("Process start method 'fork' is unavailable, sweeping serially")
+        if parallel:
+            context = multiprocessing.get_context("fork")
+            with context.Pool(processes=min(num_workers, len(chunks))) as pool:
+                for (start, _), chunk in zip(chunks, pool.imap(_sweep_chunk, chunks)):
+                    yield start, _as_ranked(chunk, retriever.corpus)
+        else:
+            for start, end in chunks:
+                yield start, _as_ranked(_sweep_chunk((start, end)), retriever.corpus)
+    finally:
+        _WORKER_STATE.clear()
+
+
+def _as_ranked(chunk: List[List[Tuple[np.ndarray, np.ndarray]]], corpus) -> List[List[RankedList]]:
+    return [[RankedList(docs, scores, corpus) for docs, scores in by_query] for by_query in chunk]
+
+
+def run_bm25_sweep(
+    retriever,
+    queries: List[Dict[str, str]],
+    grid: List[Dict[str, float]],
+    evaluator,
+    ground_truth: Optional[Dict[str, Any]],
+    k: int,
+    num_workers: int = 1,
+    chunk_size: int = 64
+) -> List[Dict[str, Any]]:
+    """
+    Metric grid of a BM25 parameter sweep: each chunk of rankings is scored with
+    Evaluator.compute_metrics() as it arrives, so only per-query metric values are kept.
+
+    Args:
+        retriever: An indexed FastBM25Retriever.
+        queries: Query dicts with "query_id" and "text".
+        grid: Parameter pairs, e.g. from parameter_grid().
+        evaluator: Evaluator whose cutoffs define the metric columns.
+        ground_truth: Dict[query_id -> relevant doc ids or grades].
+        k: Documents ranked per query.
+
+    Returns:
+        One row per parameter pair: "k1", "b" and the mean of every metric.
+    """
+    query_ids = [query["query_id"] for query in queries]
+    metric_parts: List[Dict[str, List[np.ndarray]]] = [{} for _ in grid]
+    for start, rankings in sweep_bm25(retriever, [query["text"] for query in queries], grid, k,
+                                      num_workers=num_workers, chunk_size=chunk_size):
+        for parts, by_query in zip(metric_parts, rankings):
+            _, metrics = evaluator.compute_metrics(dict(zip(query_ids[start:start + len(by_query)], by_query)), ground_truth)
+            for name, values in metrics.items():
+                parts.setdefault(name, []).append(values)
+
+    rows = []
+    for params, parts in zip(grid, metric_parts):
+        row: Dict[str, Any] = dict(params)
+        row.update({name: float(np.concatenate(values).mean()) for name, values in parts.items()})
+        rows.append(row)
+    return rows
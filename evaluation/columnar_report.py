@@ -0,0 +1,222 @@
+#columnar (NumPy) evaluation reports with column projection and filter pushdown
+import json
+import os
+import shutil
+from typing import List, Dict, Any, Optional, Iterable
+
+import numpy as np
+
+from utils.string_table import SortedStringIndex
+
+COLUMNAR_FORMAT_VERSION = 1
+META_FILE = "meta.json"
+
+# Column kinds
+NUMERIC = "numeric"     # float64, NaN where missing
+CATEGORY = "category"   # int32 codes into a sorted string dictionary, -1 where missing
+LIST = "list"           # ragged lists of strings: flat int32 codes + int64 row offsets
+
+
+class ColumnarReportWriter:
+    """
+    Writes evaluation rows as a directory of column files.
+
+    Numbers become float64 arrays; strings are dictionary-encoded (int32 codes into a sorted
+    string table, so metric, strategy and query columns stay small); lists of strings such as
+    `retrieved_doc_ids` become one flat code array plus row offsets, with codes streamed to
+    disk as rows arrive. Files go to a temporary directory that close() renames into place.
+
+    Has the same write()/flush()/close() interface as ReportWriter, so it can be passed to
+    Evaluator.write_rows.
+    """
+    def __init__(self, path: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        self.path = path
+        self.metadata = metadata or {}
+        self.tmp_path = f"{path.rstrip('/')}.tmp-{os.getpid()}"
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        os.makedirs(self.tmp_path)
+
+        self.num_rows = 0
+        self._kinds: Dict[str, str] = {}
+        self._numeric: Dict[str, List[float]] = {}
+        self._codes: Dict[str, List[int]] = {}
+        self._dictionaries: Dict[str, Dict[str, int]] = {}
+        self._list_offsets: Dict[str, List[int]] = {}
+        self._list_files: Dict[str, Any] = {}
+
+    def _add_column(self, name: str, value: Any) -> None:
+        # Columns seen after the first row are back-filled as missing
+        if isinstance(value, (list, tuple)):
+            kind = LIST
+            self._list_offsets[name] = [0] * (self.num_rows + 1)
+            self._list_files[name] = open(os.path.join(self.tmp_path, f"col{len(self._kinds)}.codes.raw"), "wb")
+        elif isinstance(value, str):
+            kind = CATEGORY
+            self._codes[name] = [-1] * self.num_rows
+        else:
+            kind = NUMERIC
+            self._numeric[name] = [float("nan")] * self.num_rows
+        self._kinds[name] = kind
+        self._dictionaries.setdefault(name, {})
+
+    def write(self, row: Dict[str, Any]) -> None:
+        for name, value in row.items():
+            if name not in self._kinds and value is not None:
+                self._add_column(name, value)
+
+        for name, kind in self._kinds.items():
+            value = row.get(name)
+            if kind == NUMERIC:
+                self._numeric[name].append(float("nan") if value is None else float(value))
+            elif kind == CATEGORY:
+                dictionary = self._dictionaries[name]
+                self._codes[name].append(-1 if value is None else dictionary.setdefault(str(value), len(dictionary)))
+            else:
+                dictionary = self._dictionaries[name]
+                codes = [dictionary.setdefault(str(item), len(dictionary)) for item in (value or [])]
+                self._list_files[name].write(np.array(codes, dtype=np.int32).tobytes())
+                offsets = self._list_offsets[name]
+                offsets.append(offsets[-1] + len(codes))
+        self.num_rows += 1
+
+    def flush(self) -> None:
+        for f in self._list_files.values():
+            f.flush()
+
+    def close(self) -> None:
+        """
+        Sort dictionaries, remap codes, write the metadata and publish the directory.
+        """
+        columns = {}
+        for index, (name, kind) in enumerate(self._kinds.items()):
+            prefix = os.path.join(self.tmp_path, f"col{index}")
+            columns[name] = {"kind": kind, "file": f"col{index}"}
+            if kind == NUMERIC:
+                np.save(f"{prefix}.npy", np.array(self._numeric[name], dtype=np.float64))
+                continue
+
+            # Codes become positions in the sorted dictionary, so lookups can binary-search it
+            dictionary = self._dictionaries[name]
+            ordered = sorted(dictionary, key=lambda s: s.encode("utf-8"))
+            remap = np.empty(len(dictionary) + 1, dtype=np.int32)
+            remap[-1] = -1
+            for position, value in enumerate(ordered):
+                remap[dictionary[value]] = position
+            SortedStringIndex.write(f"{prefix}.dict", {value: i for i, value in enumerate(ordered)})
+
+            if kind == CATEGORY:
+                np.save(f"{prefix}.npy", remap[np.array(self._codes[name], dtype=np.int64)])
+            else:
+                self._list_files[name].close()
+                raw_path = f"{prefix}.codes.raw"
+                codes = np.fromfile(raw_path, dtype=np.int32)
+                np.save(f"{prefix}.npy", remap[codes] if len(codes) else codes)
+                os.remove(raw_path)
+                np.save(f"{prefix}.offsets.npy", np.array(self._list_offsets[name], dtype=np.int64))
+
+        with open(os.path.join(self.tmp_path, META_FILE), "w") as f:
+            json.dump({"format_version": COLUMNAR_FORMAT_VERSION, "num_rows": self.num_rows,
+                       "columns": columns, "metadata": self.metadata}, f, indent=2)
+
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.makedirs(os.path.dirname(self.path.rstrip("/")) or ".", exist_ok=True)
+        os.rename(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        for f in self._list_files.values():
+            f.close()
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+    def __enter__(self) -> "ColumnarReportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def is_columnar_report(path: str) -> bool:
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, META_FILE))
+
+
+class ColumnarReport:
+    """
+    Lazy reader for a ColumnarReportWriter directory.
+
+    Opening reads only the metadata. read() loads just the requested columns (memory-mapped),
+    and equality filters on category columns are evaluated on their int32 codes before any
+    other column is touched, so cost follows the rows and columns actually shown.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, META_FILE), "r") as f:
+            meta = json.load(f)
+        self.num_rows = meta["num_rows"]
+        self.columns: Dict[str, Dict[str, str]] = meta["columns"]
+        self.metadata = meta.get("metadata", {})
+        self._dictionaries: Dict[str, SortedStringIndex] = {}
+
+    def _prefix(self, name: str) -> str:
+        if name not in self.columns:
+            raise KeyError(f"Unknown column: {name}")
+        return os.path.join(self.path, self.columns[name]["file"])
+
+    def _dictionary(self, name: str) -> SortedStringIndex:
+        if name not in self._dictionaries:
+            self._dictionaries[name] = SortedStringIndex.load(f"{self._prefix(name)}.dict")
+        return self._dictionaries[name]
+
+    def _array(self, name: str, suffix: str = ".npy") -> np.ndarray:
+        return np.load(f"{self._prefix(name)}{suffix}", mmap_mode="r")
+
+    def categories(self, name: str) -> List[str]:
+        """
+        Distinct values of a category or list column, in sorted order.
+        """
+        table = self._dictionary(name).table
+        return [table[i] for i in range(len(table))]
+
+    def select(self, filters: Optional[Dict[str, Iterable[str]]] = None) -> np.ndarray:
+        """
+        Row indices whose category columns take one of the given values (all rows if no filters).
+        """
+        mask = np.ones(self.num_rows, dtype=bool)
+        for name, values in (filters or {}).items():
+            if self.columns[name]["kind"] != CATEGORY:
+                raise ValueError(f"Filters are only supported on category columns, not {name}")
+            dictionary = self._dictionary(name)
+            codes = [dictionary.get(str(value)) for value in values]
+            mask &= np.isin(self._array(name), [code for code in codes if code is not None])
+        return np.flatnonzero(mask)
+
+    def read(self, columns: List[str], filters: Optional[Dict[str, Iterable[str]]] = None) -> Dict[str, Any]:
+        """
+        Decode the given columns for the rows matching `filters`.
+
+        Returns:
+            Dict column -> float64 array (numeric), list of str/None (category) or list of
+            lists of str (list columns), aligned over the selected rows.
+        """
+        rows = self.select(filters)
+        result: Dict[str, Any] = {}
+        for name in columns:
+            kind = self.columns[name]["kind"]
+            if kind == NUMERIC:
+                result[name] = np.asarray(self._array(name)[rows])
+            elif kind == CATEGORY:
+                table = self._dictionary(name).table
+                decoded = {}
+                codes = np.asarray(self._array(name)[rows])
+                for code in np.unique(codes):
+                    decoded[code] = table[int(code)] if code >= 0 else None
+                result[name] = [decoded[code] for code in codes.tolist()]
+            else:
+                table = self._dictionary(name).table
+                offsets = self._array(name, ".offsets.npy")
+                flat = self._array(name)
+                result[name] = [[table[int(code)] for code in flat[offsets[row]:offsets[row + 1]]]
+                                for row in rows.tolist()]
+        return result
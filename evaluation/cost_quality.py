@@ -0,0 +1,53 @@
+#cost vs quality summaries of instrumented reports: latency percentiles and the Pareto front
+from typing import List, Dict, Any, Sequence
+
+import numpy as np
+
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+def pareto_front(costs: Sequence[float], qualities: Sequence[float]) -> List[bool]:
+    """
+    Flag the points no other point dominates, i.e. none is at least as cheap and at least as
+    good while strictly better in one of the two.
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    qualities = np.asarray(qualities, dtype=np.float64)
+    flags = []
+    for cost, quality in zip(costs, qualities):
+        dominated = (costs <= cost) & (qualities >= quality) & ((costs < cost) | (qualities > quality))
+        flags.append(not dominated.any())
+    return flags
+
+
+def cost_quality_table(
+    strategies: Sequence[str],
+    latencies_ms: Sequence[float],
+    qualities: Sequence[float],
+    cost_percentile: int = 95
+) -> List[Dict[str, Any]]:
+    """
+    One row per strategy from per-query report values: query count, p50/p95/p99 latency, mean
+    quality and whether the strategy is on the quality vs `cost_percentile` latency Pareto front.
+    Queries without a latency or quality value (NaN) are ignored. Rows are sorted by that latency.
+    """
+    if cost_percentile not in LATENCY_PERCENTILES:
+        raise ValueError(f"cost_percentile must be one of {LATENCY_PERCENTILES}, got {cost_percentile}")
+    strategies = np.asarray(strategies, dtype=object)
+    latencies_ms = np.asarray(latencies_ms, dtype=np.float64)
+    qualities = np.asarray(qualities, dtype=np.float64)
+    valid = ~np.isnan(latencies_ms) & ~np.isnan(qualities)
+
+    rows = []
+    for strategy in sorted(set(strategies[valid])):
+        selected = valid & (strategies == strategy)
+        percentiles = np.percentile(latencies_ms[selected], LATENCY_PERCENTILES)
+        row = {"strategy": strategy, "queries": int(selected.sum())}
+        row.update({f"p{p}_ms": float(value) for p, value in zip(LATENCY_PERCENTILES, percentiles)})
+        row["quality"] = float(qualities[selected].mean())
+        rows.append(row)
+
+    cost_column = f"p{cost_percentile}_ms"
+    for row, on_front in zip(rows, pareto_front([row[cost_column] for row in rows], [row["quality"] for row in rows])):
+        row["pareto"] = on_front
+    return sorted(rows, key=lambda row: row[cost_column])
@@ -1,19 +1,24 @@
 # evaluator script for retrievers
 from constants.performance import THRESHOLDS
-from typing import Optional, List, Dict, Any
-import math
+from evaluation.metrics import DEFAULT_CUTOFFS, METRICS, compute_metrics, mean_metrics
+from evaluation.report_writer import ReportWriter
+from evaluation.columnar_report import ColumnarReportWriter
+from utils import instrumentation
+from utils.ranked_list import ranked_ids
+from typing import Optional, List, Dict, Any, Tuple
+import numpy as np
 import os
-import csv
-import json
 class Evaluator:
-    def __init__(self, k: int = 5):
+    def __init__(self, k: int = 5, cutoffs: Optional[List[int]] = None):
         """
         Initialize evaluator.
         
         Args:
-            k: Top-K value for Precision@K, Recall@K, NDCG@K
+            k: Top-K value for Precision@K, Recall@K, NDCG@K in performance_check
+            cutoffs: Cutoffs for the batch metrics written by evaluate() (default 1,5,10,100,1000)
         """
         self.k = k
+        self.cutoffs = sorted(set(cutoffs or DEFAULT_CUTOFFS))
         self.thresholds = THRESHOLDS
     
     def generate_report(self, result: Dict[str, Dict[str, Any]], output_dir: str) -> None:
@@ -43,137 +48,147 @@ class Evaluator:
         ground_truth: Optional[List[str]] = None
     ) -> Dict[str, Dict[str, Any]]:
         """
-        Compute metrics for a single query and check against thresholds.
+        Compute Precision@K, Recall@K and NDCG@K (K = self.k) for a single query and check
+        them against the thresholds configured for the same "<metric>@<K>" keys.
 
         Args:
             retrieved_docs: List of retrieved document dicts with "id".
             ground_truth: List of ground truth document IDs (optional).
 
         Returns:
-            Dictionary with metric names mapped to value and pass/fail status.
+            Dictionary with metric names mapped to value and, where a threshold is configured,
+            the threshold and pass/fail status. Without ground truth only precision is reported.
         """
 
         if not retrieved_docs:
             return {}
 
-        # Extract just the retrieved doc IDs
-        retrieved_ids = [doc["id"] for doc in retrieved_docs[:self.k]]
+        metrics = compute_metrics([ranked_ids(retrieved_docs)], [ground_truth or []], [self.k])
+        names = ("precision", "recall", "ndcg") if ground_truth else ("precision",)
 
-        # Initialize output
         results = {}
+        for name in names:
+            key = f"{name}@{self.k}"
+            value = float(metrics[key][0])
+            results[key] = {"value": value}
+            if key in self.thresholds:
+                threshold = self.thresholds[key]
+                results[key].update({"threshold": threshold, "status": "pass" if value >= threshold else "fail"})
 
-        # --- Precision@K ---
-        relevant_retrieved = 0
-        if ground_truth:
-            relevant_retrieved = sum(1 for doc_id in retrieved_ids if doc_id in ground_truth)
-        precision = relevant_retrieved / self.k
-
-        threshold = self.thresholds["precision@5"]
-        results["precision@5"] = {
-            "value": precision,
-            "threshold": threshold,
-            "status": "pass" if precision >= threshold else "fail"
-        }
-
-        # --- Recall@K ---
-        if ground_truth:
-            recall = relevant_retrieved / len(ground_truth)
-            threshold = self.thresholds["recall@5"]
-            results["recall@5"] = {
-                "value": recall,
-                "threshold": threshold,
-                "status": "pass" if recall >= threshold else "fail"
-            }
+        return results
 
-        # --- NDCG@K ---
-        if ground_truth:
-            dcg = 0.0
-            for idx, doc_id in enumerate(retrieved_ids):
-                if doc_id in ground_truth:
-                    dcg += 1.0 / math.log2(idx + 2)  # Rank positions start at 1
-
-            # Compute Ideal DCG
-            ideal_dcg = sum(1.0 / math.log2(idx + 2) for idx in range(min(len(ground_truth), self.k)))
-            ndcg = dcg / ideal_dcg if ideal_dcg > 0 else 0.0
-
-            threshold = self.thresholds["ndcg@5"]
-            results["ndcg@5"] = {
-                "value": ndcg,
-                "threshold": threshold,
-                "status": "pass" if ndcg >= threshold else "fail"
-            }
 
-        return results
+    def compute_metrics(
+        self,
+        retriever_queries: Dict[str, List[Dict[str, Any]]],
+        ground_truth: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """
+        Batch metrics (see evaluation.metrics) for every query of one retriever at self.cutoffs.
+
+        Args:
+            retriever_queries: Dict[query_id -> RankedList or list of retrieved doc dicts]
+            ground_truth: Dict[query_id -> list of relevant doc IDs, or doc ID -> relevance grade]
+
+        Returns:
+            Query ids, and a dict "<metric>@<cutoff>" -> per-query values aligned with them.
+        """
+        query_ids = list(retriever_queries.keys())
+        rankings = [ranked_ids(retriever_queries[query_id]) for query_id in query_ids]
+        qrels = [ground_truth.get(query_id, []) if ground_truth else [] for query_id in query_ids]
+        return query_ids, compute_metrics(rankings, qrels, self.cutoffs)
 
+    def write_rows(
+        self,
+        retriever_name: str,
+        retriever_queries: Dict[str, List[Dict[str, Any]]],
+        ground_truth: Optional[Dict[str, Any]],
+        sinks: List[Any]
+    ) -> Dict[str, float]:
+        """
+        Score one strategy and stream one row per query to each report sink
+        (ReportWriter, ColumnarReportWriter). With instrumentation enabled, rows also carry the
+        query's "<stage>_ms", "total_ms" and candidate-count columns (see utils.instrumentation).
+
+        Returns:
+            Mean of every metric over the strategy's queries.
+        """
+        print(f"Evaluating {retriever_name}...")
+        with instrumentation.scope([(retriever_name, query_id) for query_id in retriever_queries]), \
+                instrumentation.span("evaluate"):
+            query_ids, metrics = self.compute_metrics(retriever_queries, ground_truth)
+
+        for row_index, query_id in enumerate(query_ids):
+            retrieved_docs = retriever_queries[query_id]
+            has_ground_truth = bool(ground_truth and ground_truth.get(query_id))
+
+            # Record one row per query
+            row = {
+                "query_id": query_id,
+                "retriever": retriever_name
+            }
+            for metric_name, values in metrics.items():
+                # Without ground truth only precision is meaningful (and is 0)
+                if not has_ground_truth and not metric_name.startswith("precision@"):
+                    continue
+                value = float(values[row_index])
+                row[f"{metric_name}_value"] = value
+                if metric_name in self.thresholds:
+                    threshold = self.thresholds[metric_name]
+                    row[f"{metric_name}_threshold"] = threshold
+                    row[f"{metric_name}_status"] = "pass" if value >= threshold else "fail"
+
+            # Stage timings and candidate counts, when instrumentation is enabled
+            row.update(instrumentation.columns((retriever_name, query_id)))
+
+            # Add the ids of retrieved docs to the row
+            row["retrieved_doc_ids"] = ranked_ids(retrieved_docs)
+
+            for sink in sinks:
+                sink.write(row)
+        for sink in sinks:
+            sink.flush()
+
+        summary = mean_metrics(metrics)
+        print(", ".join(f"{name}={summary[name]:.4f}" for name in
+                        (f"{metric}@{c}" for c in self.cutoffs for metric in METRICS)))
+        return summary
 
     def evaluate(
         self,
         retrievers_outputs: Dict[str, Dict[str, List[Dict[str, Any]]]],
         ground_truth: Optional[Dict[str, List[str]]] = None,
-        output_file_path: str = "reports/retrieval_performance.json"
-    ) -> None:
+        output_file_path: str = "reports/retrieval_performance.jsonl",
+        metadata: Optional[Dict[str, Any]] = None,
+        columnar_path: Optional[str] = None
+    ) -> Dict[str, Dict[str, float]]:
         """
-        Evaluate all retrievers across all queries and write reports.
+        Evaluate all retrievers across all queries and write one JSONL report for the run
+        (see evaluation.report_writer). The report is published atomically when all
+        strategies are written.
 
         Args:
             retrievers_outputs: Dict[retriever_name -> Dict[query_id -> list of retrieved docs]]
             ground_truth: Dict[query_id -> list of relevant doc IDs]
             output_file_path: File to save evaluation data
-        """
+            metadata: Run metadata stored in the report header
+            columnar_path: Optional directory for a columnar copy of the report
 
-        #if file does not exist create
-        if not os.path.exists(output_file_path):
-            with open(output_file_path, "w") as f:
-                json.dump({}, f)
-
-        for retriever_name, retriever_queries in retrievers_outputs.items():
-            print(f"Evaluating {retriever_name}...")
-            all_results = []
-
-            for query_id, retrieved_docs in retriever_queries.items():
-                gt_ids = ground_truth.get(query_id, []) if ground_truth else None
-                metrics = self.performance_check(retrieved_docs, gt_ids)
-                
-                # Record one row per query
-                row = {
-                    "query_id": query_id,
-                    "retriever": retriever_name
-                }
-                for metric_name, metric_result in metrics.items():
-                    row[f"{metric_name}_value"] = metric_result["value"]
-                    row[f"{metric_name}_threshold"] = metric_result["threshold"]
-                    row[f"{metric_name}_status"] = metric_result["status"]
-                
-                # Add the ids of retrieved docs to the row
-                row["retrieved_doc_ids"] = [doc["id"] for doc in retrieved_docs]
-                
-                all_results.append(row)
-
-            # Save CSV file
-            output_csv = output_file_path.replace(".json", ".csv")
-            with open(output_csv, mode="w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=all_results[0].keys())
-                writer.writeheader()
-                writer.writerows(all_results)
-
-            # Save JSON version
-            output_json = output_file_path
-
-            # Load existing data if the file exists
-            if os.path.exists(output_json):
-                with open(output_json, "r", encoding="utf-8") as f:
-                    try:
-                        existing_data = json.load(f)
-                    except json.JSONDecodeError:
-                        existing_data = []  # Handle empty or corrupted JSON files
-            else:
-                existing_data = []
-
-            # Append new data
-            existing_data.extend(all_results)
-
-            # Save back to JSON file
-            with open(output_json, "w", encoding="utf-8") as f:
-                json.dump(existing_data, f, indent=2)
-
-            print(f"Saved evaluation report for {retriever_name} at {output_csv}")
+        Returns:
+            Dict[retriever_name -> mean metrics]
+        """
+        summaries = {}
+        with ReportWriter(output_file_path, metadata) as sink:
+            columnar = ColumnarReportWriter(columnar_path, metadata) if columnar_path else None
+            sinks = [sink] + ([columnar] if columnar else [])
+            try:
+                for retriever_name, retriever_queries in retrievers_outputs.items():
+                    summaries[retriever_name] = self.write_rows(retriever_name, retriever_queries, ground_truth, sinks)
+            except BaseException:
+                if columnar:
+                    columnar.abort()
+                raise
+            if columnar:
+                columnar.close()
+        print(f"Saved evaluation report at {output_file_path}")
+        return summaries
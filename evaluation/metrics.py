@@ -0,0 +1,134 @@
+#vectorized ranking metrics over all queries and cutoffs at once
+from typing import List, Dict, Any, Optional, Union
+
+import numpy as np
+
+METRICS = ("precision", "recall", "ndcg", "mrr", "map")
+DEFAULT_CUTOFFS = (1, 5, 10, 100, 1000)
+
+# Queries scored per block; bounds memory at block size x max cutoff
+_BLOCK_SIZE = 4096
+
+Qrels = Union[List[str], Dict[str, float]]
+
+
+def normalize_qrels(judgements: Optional[Qrels]) -> Dict[str, float]:
+    """
+    Relevance judgements of one query as doc id -> grade.
+    A list of doc ids is binary relevance (grade 1); a dict carries graded relevance.
+    Grades <= 0 count as non-relevant.
+    """
+    if not judgements:
+        return {}
+    if isinstance(judgements, dict):
+        return {doc_id: float(grade) for doc_id, grade in judgements.items() if float(grade) > 0}
+    return {doc_id: 1.0 for doc_id in judgements}
+
+
+def compute_metrics(
+    rankings: List[List[str]],
+    qrels: List[Qrels],
+    cutoffs=DEFAULT_CUTOFFS
+) -> Dict[str, np.ndarray]:
+    """
+    Precision, recall, NDCG (linear gain), reciprocal rank and average precision at every
+    cutoff, for every query.
+
+    Doc ids are mapped to integers once; judgements become a sorted array of
+    (query, doc) keys, so relevance of the whole queries x ranks matrix is found with a single
+    searchsorted, and all cutoffs are read off cumulative sums of that matrix.
+
+    Args:
+        rankings: Ranked doc ids per query.
+        qrels: Judgements per query (aligned with rankings): list of relevant ids or id -> grade.
+        cutoffs: Rank cutoffs, e.g. (1, 5, 10, 100, 1000).
+
+    Returns:
+        Dict "<metric>@<cutoff>" -> float64 array of per-query values. Queries without
+        relevant documents score 0 on every metric.
+    """
+    cutoffs = sorted(set(int(c) for c in cutoffs))
+    if not cutoffs or cutoffs[0] < 1:
+        raise ValueError(f"Cutoffs must be positive integers, got {cutoffs}")
+    if len(rankings) != len(qrels):
+        raise ValueError(f"Got {len(rankings)} rankings but {len(qrels)} qrels")
+
+    results = {f"{metric}@{c}": np.zeros(len(rankings)) for metric in METRICS for c in cutoffs}
+    for start in range(0, len(rankings), _BLOCK_SIZE):
+        block = _compute_block(rankings[start:start + _BLOCK_SIZE], qrels[start:start + _BLOCK_SIZE], cutoffs)
+        for name, values in block.items():
+            results[name][start:start + len(values)] = values
+    return results
+
+
+def _compute_block(rankings: List[List[str]], qrels: List[Qrels], cutoffs: List[int]) -> Dict[str, np.ndarray]:
+    num_queries = len(rankings)
+    depth = cutoffs[-1]
+
+    # Integer ids for every judged doc; (query, doc) pairs become sortable int64 keys
+    doc_ints: Dict[Any, int] = {}
+    judged_queries, judged_docs, judged_grades = [], [], []
+    for row, judgements in enumerate(qrels):
+        for doc_id, grade in normalize_qrels(judgements).items():
+            judged_queries.append(row)
+            judged_docs.append(doc_ints.setdefault(doc_id, len(doc_ints)))
+            judged_grades.append(grade)
+    judged_queries = np.array(judged_queries, dtype=np.int64)
+    judged_grades = np.array(judged_grades, dtype=np.float64)
+    num_docs = max(len(doc_ints), 1)
+    keys = judged_queries * num_docs + np.array(judged_docs, dtype=np.int64)
+    order = np.argsort(keys)
+    keys, sorted_grades = keys[order], judged_grades[order]
+
+    # Queries x ranks matrix of judged doc ints (-1 for unjudged docs and missing ranks)
+    run = np.full((num_queries, depth), -1, dtype=np.int64)
+    lookup_doc = doc_ints.get
+    for row, ranking in enumerate(rankings):
+        ids = [lookup_doc(doc_id, -1) for doc_id in ranking[:depth]]
+        run[row, :len(ids)] = ids
+
+    gains = np.zeros(run.shape)
+    if len(keys):
+        lookup = np.arange(num_queries)[:, None] * num_docs + run
+        positions = np.minimum(np.searchsorted(keys, lookup), len(keys) - 1)
+        found = (run >= 0) & (keys[positions] == lookup)
+        gains[found] = sorted_grades[positions[found]]
+    relevant = gains > 0
+
+    num_relevant = np.bincount(judged_queries, minlength=num_queries).astype(np.float64)
+    denominators = np.maximum(num_relevant, 1.0)
+    ranks = np.arange(1, depth + 1, dtype=np.float64)
+    discounts = 1.0 / np.log2(ranks + 1)
+
+    # Ideal ranking: each query's grades sorted descending
+    ideal = np.zeros(run.shape)
+    ideal_order = np.lexsort((-judged_grades, judged_queries))
+    ideal_queries = judged_queries[ideal_order]
+    query_starts = np.searchsorted(ideal_queries, np.arange(num_queries))
+    ideal_ranks = np.arange(len(ideal_queries)) - query_starts[ideal_queries]
+    keep = ideal_ranks < depth
+    ideal[ideal_queries[keep], ideal_ranks[keep]] = judged_grades[ideal_order][keep]
+
+    relevant_so_far = np.cumsum(relevant, axis=1)
+    dcg = np.cumsum(gains * discounts, axis=1)
+    idcg = np.cumsum(ideal * discounts, axis=1)
+    precision_sums = np.cumsum(relevant * (relevant_so_far / ranks), axis=1)
+    first_relevant = np.where(relevant.any(axis=1), relevant.argmax(axis=1) + 1, depth + 1)
+
+    results = {}
+    for c in cutoffs:
+        hits = relevant_so_far[:, c - 1]
+        results[f"precision@{c}"] = hits / c
+        results[f"recall@{c}"] = hits / denominators
+        results[f"ndcg@{c}"] = np.divide(dcg[:, c - 1], idcg[:, c - 1],
+                                         out=np.zeros(num_queries), where=idcg[:, c - 1] > 0)
+        results[f"mrr@{c}"] = np.where(first_relevant <= c, 1.0 / first_relevant, 0.0)
+        results[f"map@{c}"] = precision_sums[:, c - 1] / denominators
+    return results
+
+
+def mean_metrics(metrics: Dict[str, np.ndarray]) -> Dict[str, float]:
+    """
+    Average each per-query metric array.
+    """
+    return {name: float(values.mean()) if len(values) else 0.0 for name, values in metrics.items()}
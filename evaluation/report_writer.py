@@ -0,0 +1,243 @@
+#streaming JSONL evaluation reports: writer, reader and merge/compaction tool
+import csv
+import json
+import os
+import time
+import uuid
+from argparse import ArgumentParser
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+REPORT_FORMAT_VERSION = 1
+PARTIAL_SUFFIX = ".partial"
+
+
+class ReportWriter:
+    """
+    Append-only JSONL report for one run.
+
+    The first line is a run header ({"record": "run", "run_id", "started", "metadata"}), then
+    one JSON object per evaluated (strategy, query) row, then an end record with the row count.
+    Rows are written to `<path>.partial` and flushed every `flush_every` rows, so a crash keeps
+    everything scored so far; close() fsyncs and atomically renames the file to `path`.
+
+    Use as a context manager: the report is finalized only if the block exits without error.
+    """
+    def __init__(self, path: str, metadata: Optional[Dict[str, Any]] = None, flush_every: int = 1000) -> None:
+        self.path = path
+        self.partial_path = path + PARTIAL_SUFFIX
+        self.flush_every = flush_every
+        self.run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.num_rows = 0
+        self._pending = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(self.partial_path, "w", encoding="utf-8")
+        self._write_record({
+            "record": "run",
+            "format_version": REPORT_FORMAT_VERSION,
+            "run_id": self.run_id,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "metadata": metadata or {},
+        })
+        self.flush()
+
+    def _write_record(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record))
+        self._file.write("\n")
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._write_record(row)
+        self.num_rows += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        self._file.flush()
+        self._pending = 0
+
+    def close(self) -> None:
+        """
+        Write the end record, fsync and publish the report at `path`.
+        """
+        if self._file.closed:
+            return
+        self._write_record({"record": "end", "run_id": self.run_id, "rows": self.num_rows,
+                            "finished": time.strftime("%Y-%m-%dT%H:%M:%S")})
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.partial_path, self.path)
+
+    def abort(self) -> None:
+        """
+        Stop writing but keep the flushed rows in `<path>.partial` for recovery.
+        """
+        if not self._file.closed:
+            self._file.flush()
+            self._file.close()
+
+    def __enter__(self) -> "ReportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def iter_report(path: str) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Stream (run header, row) pairs from a report file, which may hold several runs
+    (e.g. a merged report) or be an unfinished `.partial` file.
+    A truncated last line (crash mid-write) is skipped.
+    """
+    run: Dict[str, Any] = {"run_id": None, "metadata": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            kind = record.get("record")
+            if kind == "run":
+                run = record
+            elif kind is None:
+                yield run, record
+
+
+def read_runs(path: str) -> List[Dict[str, Any]]:
+    """
+    Run headers in a report, each with "rows" and "complete" (False for crashed/partial runs).
+    """
+    runs, current = [], None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            kind = record.get("record")
+            if kind == "run":
+                current = dict(record, rows=0, complete=False)
+                runs.append(current)
+            elif kind == "end" and current is not None:
+                current["complete"] = True
+            elif kind is None and current is not None:
+                current["rows"] += 1
+    return runs
+
+
+def read_report(path: str, run_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    All rows of a report as dicts, each tagged with its "run_id".
+    """
+    rows = []
+    for run, row in iter_report(path):
+        if run_ids is None or run["run_id"] in run_ids:
+            rows.append(dict(row, run_id=run["run_id"]))
+    return rows
+
+
+def merge_reports(inputs: List[str], output: str, latest_only: bool = False) -> int:
+    """
+    Combine report files (finished or `.partial`) into one report.
+
+    By default every run is copied as is, skipping runs already seen by run_id. With
+    latest_only, the result is compacted into a single run holding only the last row of every
+    (retriever, query_id) across the inputs, in input order. The output is written atomically.
+
+    Returns:
+        Number of rows written.
+    """
+    tmp_output = f"{output}.tmp-{os.getpid()}"
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    written = 0
+
+    if latest_only:
+        # First pass: position of the last row for every key; second pass: copy only those
+        last_position = {}
+        for file_index, path in enumerate(inputs):
+            for row_index, (_, row) in enumerate(iter_report(path)):
+                last_position[(row.get("retriever"), row.get("query_id"))] = (file_index, row_index)
+        keep = set(last_position.values())
+
+        source_runs = [run["run_id"] for path in inputs for run in read_runs(path)]
+        writer = ReportWriter(tmp_output, metadata={"merged_from": source_runs, "latest_only": True})
+        for file_index, path in enumerate(inputs):
+            for row_index, (run, row) in enumerate(iter_report(path)):
+                if (file_index, row_index) in keep:
+                    writer.write(dict(row, source_run_id=run["run_id"]))
+        written = writer.num_rows
+        writer.close()
+    else:
+        seen_runs = set()
+        with open(tmp_output, "w", encoding="utf-8") as out:
+            for path in inputs:
+                copying = False
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if record.get("record") == "run":
+                            copying = record["run_id"] not in seen_runs
+                            seen_runs.add(record["run_id"])
+                        if copying:
+                            out.write(line if line.endswith("\n") else line + "\n")
+                            written += record.get("record") is None
+            out.flush()
+            os.fsync(out.fileno())
+
+    os.replace(tmp_output, output)
+    return written
+
+
+def export_csv(path: str, output: str) -> int:
+    """
+    Write the rows of a report to CSV (list columns are JSON-encoded). Returns the row count.
+    """
+    fieldnames = {}
+    for _, row in iter_report(path):
+        fieldnames.update(dict.fromkeys(row))
+    fieldnames = ["run_id"] + [name for name in fieldnames if name != "run_id"]
+
+    count = 0
+    with open(output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for run, row in iter_report(path):
+            writer.writerow({key: json.dumps(value) if isinstance(value, list) else value
+                             for key, value in dict(row, run_id=run["run_id"]).items()})
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Merge, compact, inspect or export JSONL evaluation reports")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    merge_parser = subparsers.add_parser("merge", help="Combine runs from several reports into one file")
+    merge_parser.add_argument("output", type=str)
+    merge_parser.add_argument("inputs", type=str, nargs="+")
+    merge_parser.add_argument("--latest_only", action="store_true",
+                              help="Compact to the latest row per (retriever, query_id)")
+
+    runs_parser = subparsers.add_parser("runs", help="List the runs in a report")
+    runs_parser.add_argument("path", type=str)
+
+    csv_parser = subparsers.add_parser("csv", help="Export a report to CSV")
+    csv_parser.add_argument("path", type=str)
+    csv_parser.add_argument("output", type=str)
+
+    args = parser.parse_args()
+    if args.command == "merge":
+        print(f"Wrote {merge_reports(args.inputs, args.output, args.latest_only)} rows to {args.output}")
+    elif args.command == "runs":
+        for run in read_runs(args.path):
+            status = "complete" if run["complete"] else "partial"
+            print(f"{run['run_id']}  started {run['started']}  {run['rows']} rows  {status}")
+    elif args.command == "csv":
+        print(f"Wrote {export_csv(args.path, args.output)} rows to {args.output}")
@@ -1,90 +1,494 @@
 from argparse import ArgumentParser
+import contextlib
+import functools
+import inspect
 import logging
 import os
 import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
 
 from retrievers.registry import RETRIEVER_REGISTRY
-from rerankers.registry import RERANKER_REGISTRY
+from retrievers.index_cache import load_or_build_index, supports_index_cache
+from retrievers.parallel import retrieve_parallel
+from rerankers.pool import RerankerPool
+from rerankers.scheduler import RerankScheduler, supports_scheduling
+from rerankers.score_cache import ScoreCache
 from evaluation.evaluator import Evaluator
+from evaluation.metrics import METRICS
+from evaluation.report_writer import ReportWriter
+from evaluation.columnar_report import ColumnarReportWriter
+from evaluation.ann_benchmark import run_ann_benchmark
+from utils.doc_store import open_doc_store
+from utils.data_loader import load_corpus, load_queries, iter_chunks
+from utils import instrumentation
+from utils.tokenizer import Analyzer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def parse_args():
     parser = ArgumentParser(description="RAG-Bench: Retrieval Evaluation Framework")
-    parser.add_argument("--corpus", type=str, default="data/corpus.json")
-    parser.add_argument("--queries", type=str, default="data/queries.json")
+    parser.add_argument("--corpus", type=str, default="data/corpus.json",
+                        help="Corpus as a JSON array or JSONL file of {id, text} documents (.gz accepted)")
+    parser.add_argument("--doc_store", action="store_true",
+                        help="Serve the corpus from a memory-mapped document store built once next to it (<corpus>.store/)")
+    parser.add_argument("--queries", type=str, default="data/queries.json",
+                        help="Queries as a JSON array or JSONL file of {query_id, text} objects (.gz accepted)")
+    parser.add_argument("--ingest_chunk_size", type=int, default=10_000,
+                        help="Documents per chunk when streaming the corpus into an index")
     parser.add_argument("--gt", type=str, default="data/qrels.json")
     parser.add_argument("--retrievers", type=str, default="bm25")
     parser.add_argument("--rerankers", type=str, default="")
-    parser.add_argument("--report_file_path", type=str, default="reports/retrieval_performance.json")
+    parser.add_argument("--report_file_path", type=str, default="reports/retrieval_performance.jsonl",
+                        help="JSONL report for this run (written to <path>.partial until the run finishes)")
+    parser.add_argument("--columnar_report", type=str, default=None,
+                        help="Also write a columnar copy of the report to this directory (fast dashboard loading)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Time per-query stages (tokenize, retrieve, rerank, evaluate) into *_ms report columns")
     parser.add_argument("--topk", type=int, default=1000)
+    parser.add_argument("--cutoffs", type=str, default="1,5,10,100,1000",
+                        help="Comma-separated rank cutoffs for P/R/NDCG/MRR/MAP in the report")
+    parser.add_argument("--rerank_depth", type=int, default=None,
+                        help="Rescore only the top-N first-stage hits; the rest keep their order (default: all)")
+    parser.add_argument("--rerank_max_tokens", type=int, default=None,
+                        help="Max batch size * padded length per reranker forward pass")
+    parser.add_argument("--rerank_batch_size", type=int, default=None,
+                        help="Max (query, passage) pairs per reranker forward pass")
+    parser.add_argument("--reranker_warmup", type=int, default=1,
+                        help="Warm-up passes run once after each reranker is loaded (0 disables)")
+    parser.add_argument("--batch_size", type=int, default=64,
+                        help="Number of queries sent to the retriever per retrieve_batch() call")
+    parser.add_argument("--score_cache", type=str, default=None,
+                        help="SQLite file caching reranker scores across runs (e.g. cache/reranker_scores.sqlite)")
+    parser.add_argument("--score_cache_max_entries", type=int, default=10_000_000,
+                        help="Max cached reranker scores; least recently used scores are evicted first")
+    parser.add_argument("--token_cache", action="store_true",
+                        help="Persist reranker passage token ids next to the corpus (<corpus>.tokens/) across runs")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Retrieval processes sharing the built index (fork copy-on-write); 1 runs serially")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Overlap retrieval and reranking, batching reranker inputs across queries")
+    parser.add_argument("--retrieval_workers", type=int, default=2,
+                        help="Retrieval threads feeding the reranker scheduler in --pipelined mode")
+    parser.add_argument("--candidate_queue_size", type=int, default=256,
+                        help="Max retrieved candidate lists waiting for reranking in --pipelined mode")
+    parser.add_argument("--rerank_max_wait_ms", type=float, default=10.0,
+                        help="Longest a partial reranker batch waits for more pairs in --pipelined mode")
+    parser.add_argument("--index_dir", type=str, default=None,
+                        help="Directory for persistent retriever indexes, keyed by corpus and retriever config")
+    parser.add_argument("--rebuild_index", action="store_true",
+                        help="Ignore any cached index in --index_dir and rebuild it")
+    parser.add_argument("--pruning_mode", type=str, default=None, choices=["pruned", "exhaustive"],
+                        help="Query processing mode for block-max BM25 retrievers")
+    parser.add_argument("--block_size", type=int, default=None,
+                        help="Documents per block for block-max BM25 retrievers")
+    parser.add_argument("--strip_punctuation", action="store_true",
+                        help="Strip punctuation in the BM25 analyzer (documents and queries)")
+    parser.add_argument("--stopwords", type=str, default=None, choices=["english"],
+                        help="Stopword list removed by the BM25 analyzer")
+    parser.add_argument("--stemmer", type=str, default=None, choices=["s", "porter"],
+                        help="Stemmer of the BM25 analyzer ('s': plural stripping, 'porter': needs nltk)")
+    parser.add_argument("--dense_model", type=str, default=None,
+                        help="Embedding model for dense retrievers (Hugging Face name, or 'hashing' for a local test embedder)")
+    parser.add_argument("--dense_storage", type=str, default=None, choices=["float32", "float16", "int8"],
+                        help="On-disk vector type for dense retrievers")
+    parser.add_argument("--embed_batch_size", type=int, default=None,
+                        help="Texts per embedding batch for dense retrievers")
+    parser.add_argument("--ann", type=str, default=None, choices=["ivfpq"],
+                        help="Approximate nearest-neighbour index for dense retrievers")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF cells for the ANN index")
+    parser.add_argument("--nprobe", type=int, default=None, help="IVF cells probed per query")
+    parser.add_argument("--pq_m", type=int, default=None, help="Product-quantizer sub-vectors per embedding")
+    parser.add_argument("--refine_factor", type=int, default=None,
+                        help="Re-score k * refine_factor ANN candidates exactly (0 disables)")
+    parser.add_argument("--fusion", type=str, default=None, choices=["rrf", "normalized"],
+                        help="How the hybrid retriever fuses its BM25 and dense candidate lists")
+    parser.add_argument("--rrf_k", type=int, default=None, help="Rank offset for reciprocal-rank fusion")
+    parser.add_argument("--sparse_depth", type=int, default=None,
+                        help="BM25 candidates per query for the hybrid retriever (default: --topk)")
+    parser.add_argument("--dense_depth", type=int, default=None,
+                        help="Dense candidates per query for the hybrid retriever (default: --topk)")
+    parser.add_argument("--ann_benchmark", action="store_true",
+                        help="Compare ANN against exact search (recall@k, QPS) for dense retrievers with --ann")
+    parser.add_argument("--ann_benchmark_nprobes", type=str, default="1,2,4,8,16,32,64")
+    parser.add_argument("--ann_benchmark_path", type=str, default="reports/ann_benchmark.json")
+    parser.add_argument("--sweep", type=str, default=None,
+                        help="BM25 parameter grid search instead of a normal run, e.g. 'k1=0.6:1.8:0.2,b=0.3:0.9:0.1'")
+    parser.add_argument("--sweep_metric", type=str, default="ndcg@10",
+                        help="Metric used to pick the best parameters of a --sweep")
+    parser.add_argument("--sweep_path", type=str, default="reports/bm25_sweep.json",
+                        help="Where --sweep writes its metric grid")
     return parser.parse_args()
 
-def run_pipeline(query: dict, retriever, retriever_name: str, reranker_names: list, topk: int) -> dict:
+def build_retriever(retriever_name: str, args):
+    """
+    Instantiate a registered retriever, passing the CLI options its constructor accepts.
+    """
+    retriever_cls = RETRIEVER_REGISTRY[retriever_name]
+    options = {
+        "pruning_mode": args.pruning_mode,
+        "block_size": args.block_size,
+        "model_name": args.dense_model,
+        "storage": args.dense_storage,
+        "batch_size": args.embed_batch_size,
+        "ann": args.ann,
+        "nlist": args.nlist,
+        "nprobe": args.nprobe,
+        "pq_m": args.pq_m,
+        "refine_factor": args.refine_factor,
+        "fusion": args.fusion,
+        "rrf_k": args.rrf_k,
+        "sparse_depth": args.sparse_depth,
+        "dense_depth": args.dense_depth,
+        "analyzer": Analyzer(strip_punctuation=args.strip_punctuation, stopwords=args.stopwords, stemmer=args.stemmer),
+    }
+    accepted = inspect.signature(retriever_cls).parameters
+    return retriever_cls(**{name: value for name, value in options.items() if name in accepted and value is not None})
+
+def parse_sweep_args(args, cutoffs: list) -> list:
+    """
+    Parse --sweep into its (k1, b) grid and check --sweep_metric against the report's metrics,
+    so a bad spec or metric fails before any indexing or scoring.
+    """
+    from evaluation.bm25_sweep import parse_sweep, parameter_grid
+
+    grid = parameter_grid(parse_sweep(args.sweep))
+    metric_names = [f"{metric}@{cutoff}" for cutoff in sorted(set(cutoffs)) for metric in METRICS]
+    if args.sweep_metric not in metric_names:
+        raise ValueError(f"Unknown sweep metric: {args.sweep_metric}. With --cutoffs {args.cutoffs}, "
+                         f"expected one of {metric_names}")
+    return grid
+
+def run_sweep(args, grid: list, corpus, queries: list, gt, evaluator: Evaluator) -> None:
+    """
+    --sweep: index the corpus once with bm25_fast and write the metric grid of every (k1, b) pair.
+    """
+    # Imported here so runs without --sweep do not load bm25_fast (and scipy) at startup
+    from evaluation.bm25_sweep import run_bm25_sweep
+
+    if not queries:
+        raise ValueError("--sweep needs at least one query")
+    retriever = build_retriever("bm25_fast", args)
+    if args.index_dir:
+        load_or_build_index(retriever, corpus, args.index_dir, rebuild=args.rebuild_index,
+                            chunk_size=args.ingest_chunk_size, corpus_path=args.corpus)
+    else:
+        retriever.index_chunks(iter_chunks(corpus, args.ingest_chunk_size), corpus)
+
+    start = time.perf_counter()
+    rows = run_bm25_sweep(retriever, queries, grid, evaluator, gt, args.topk,
+                          num_workers=args.workers, chunk_size=args.batch_size)
+    logger.info(f"Swept {len(grid)} BM25 parameter pairs over {len(queries)} queries "
+                f"in {time.perf_counter() - start:.2f}s")
+
+    best = max(rows, key=lambda row: row[args.sweep_metric])
+    logger.info(f"Best {args.sweep_metric}={best[args.sweep_metric]:.4f} at k1={best['k1']:g}, b={best['b']:g}")
+
+    os.makedirs(os.path.dirname(args.sweep_path) or ".", exist_ok=True)
+    with open(args.sweep_path, "w") as f:
+        json.dump({"sweep": args.sweep, "metric": args.sweep_metric, "best": best, "grid": rows,
+                   "analyzer": retriever.analyzer.config(), "num_docs": len(corpus),
+                   "num_queries": len(queries)}, f, indent=2)
+    logger.info(f"Saved BM25 sweep grid at {args.sweep_path}")
+
+def start_rerank_instrumentation(strategy_name: str, query_key: tuple, reranker_pool: RerankerPool,
+                                  reranker_name: str, retrieved_docs: list) -> tuple:
+    """
+    Instrumentation key of a reranked strategy for one query, linked to its first-stage key and
+    with the number of candidates the reranker rescored.
+    """
+    strategy_key = (strategy_name, query_key[1])
+    if instrumentation.is_enabled():
+        instrumentation.link(strategy_key, query_key)
+        depth = getattr(reranker_pool.get(reranker_name), "rerank_depth", None)
+        instrumentation.count(strategy_key, "rerank_candidates",
+                              len(retrieved_docs) if depth is None else min(depth, len(retrieved_docs)))
+    return strategy_key
+
+def run_pipeline(query: dict, retriever, retriever_name: str, reranker_names: list, topk: int,
+                 retrieved_docs: list = None, reranker_pool: RerankerPool = None) -> dict:
     """
     Run retrieval and optional reranking for a single query.
+    If retrieved_docs is given (e.g. from a batched retrieval), the retrieval step is skipped.
+    Rerankers come from reranker_pool, which should be shared across queries so models load once;
+    without one, rerankers are loaded for this call only.
     Returns a dict mapping strategy names to ranked document lists.
     """
+    if reranker_pool is None:
+        with RerankerPool() as pool:
+            return run_pipeline(query, retriever, retriever_name, reranker_names, topk, retrieved_docs, pool)
+
     query_id = query["query_id"]
     query_text = query["text"]
 
-    retrieved_docs = retriever.retrieve(query_text, topk)
+    # Instrumentation keys are (strategy, query id); reranked strategies include their retrieval
+    query_key = (retriever_name, query_id)
+    if retrieved_docs is None:
+        with instrumentation.scope([query_key]), instrumentation.span("retrieve"):
+            retrieved_docs = retriever.retrieve(query_text, topk)
+    instrumentation.count(query_key, "candidates", len(retrieved_docs))
     outputs = {retriever_name: retrieved_docs}
 
     for reranker_name in reranker_names:
-        if reranker_name not in RERANKER_REGISTRY:
+        if reranker_name not in reranker_pool:
             logger.warning(f"Skipping unknown reranker: {reranker_name}")
             continue
 
-        reranker = RERANKER_REGISTRY[reranker_name]()
-        reranked_docs = reranker.rerank(query_text, retrieved_docs)
         strategy_name = f"{retriever_name}+{reranker_name}"
+        strategy_key = start_rerank_instrumentation(strategy_name, query_key, reranker_pool, reranker_name, retrieved_docs)
+        with instrumentation.scope([strategy_key]):
+            reranked_docs = reranker_pool.rerank(reranker_name, query_text, retrieved_docs)
         outputs[strategy_name] = reranked_docs
 
     return outputs
 
+def run_batch_pipeline(queries: list, retriever, retriever_name: str, reranker_names: list, topk: int,
+                       reranker_pool: RerankerPool) -> list:
+    """
+    Run retrieval for a batch of queries in one retrieve_batch() call, then optional reranking per query.
+    Returns one strategy -> ranked documents dict per query, in input order.
+    """
+    # Batched retrieval time is amortized evenly over the batch's queries
+    with instrumentation.scope([(retriever_name, query["query_id"]) for query in queries]), instrumentation.span("retrieve"):
+        retrieved = retriever.retrieve_batch([query["text"] for query in queries], topk)
+    return [
+        run_pipeline(query, retriever, retriever_name, reranker_names, topk,
+                     retrieved_docs=docs, reranker_pool=reranker_pool)
+        for query, docs in zip(queries, retrieved)
+    ]
+
+_WORKER_DONE = object()
+
+def run_pipelined(queries: list, retriever, retriever_name: str, reranker_names: list, topk: int,
+                  reranker_pool: RerankerPool, batch_size: int = 64, num_workers: int = 2,
+                  queue_size: int = 256, max_wait_seconds: float = 0.01) -> list:
+    """
+    Run retrieval and reranking as overlapping stages.
+
+    Retrieval workers take query chunks, call retrieve_batch() and put each query's candidates
+    on a bounded queue (so retrieval cannot run arbitrarily far ahead of reranking). The
+    main thread hands candidates to one RerankScheduler per reranker, which batches
+    (query, passage) pairs across queries; rerankers without scheduler support are run
+    inline per query. Returns one strategy -> ranked documents dict per query, in input order.
+    """
+    schedulers = {}
+    for reranker_name in reranker_names:
+        if reranker_name not in reranker_pool:
+            logger.warning(f"Skipping unknown reranker: {reranker_name}")
+            continue
+        reranker = reranker_pool.get(reranker_name)
+        schedulers[reranker_name] = (
+            # Batches are charged to the pool, so its timing report covers pipelined inference too
+            RerankScheduler(reranker, max_wait_seconds=max_wait_seconds,
+                            on_batch=functools.partial(reranker_pool.record_inference, reranker_name))
+            if supports_scheduling(reranker) else None
+        )
+
+    chunks = queue.Queue()
+    for start in range(0, len(queries), batch_size):
+        chunks.put(start)
+    candidates = queue.Queue(maxsize=queue_size)
+
+    def retrieval_worker():
+        while True:
+            try:
+                start = chunks.get_nowait()
+            except queue.Empty:
+                break
+            chunk = queries[start:start + batch_size]
+            try:
+                with instrumentation.scope([(retriever_name, query["query_id"]) for query in chunk]), \
+                        instrumentation.span("retrieve"):
+                    retrieved = retriever.retrieve_batch([query["text"] for query in chunk], topk)
+            except Exception as exc:
+                candidates.put(exc)
+                return
+            for position, docs in enumerate(retrieved, start):
+                candidates.put((position, docs))
+        candidates.put(_WORKER_DONE)
+
+    num_workers = max(1, min(num_workers, chunks.qsize()))
+    workers = [threading.Thread(target=retrieval_worker, name=f"retrieval-{i}", daemon=True)
+               for i in range(num_workers)]
+    for worker in workers:
+        worker.start()
+
+    outputs = [None] * len(queries)
+    try:
+        finished = 0
+        while finished < num_workers:
+            item = candidates.get()
+            if item is _WORKER_DONE:
+                finished += 1
+                continue
+            if isinstance(item, Exception):
+                raise item
+
+            position, docs = item
+            query_text = queries[position]["text"]
+            query_key = (retriever_name, queries[position]["query_id"])
+            instrumentation.count(query_key, "candidates", len(docs))
+            output = {retriever_name: docs}
+            for reranker_name, scheduler in schedulers.items():
+                strategy_name = f"{retriever_name}+{reranker_name}"
+                strategy_key = start_rerank_instrumentation(strategy_name, query_key, reranker_pool, reranker_name, docs)
+                # The scheduler charges its batched model time to the submitting scope's key
+                with instrumentation.scope([strategy_key]):
+                    if scheduler is None:
+                        output[strategy_name] = reranker_pool.rerank(reranker_name, query_text, docs)
+                    else:
+                        output[strategy_name] = scheduler.submit(query_text, docs)
+            outputs[position] = output
+    finally:
+        for reranker_name, scheduler in schedulers.items():
+            if scheduler is None:
+                continue
+            scheduler.close()
+            stats = scheduler.stats()
+            logger.info(f"Reranker {reranker_name} scheduler: {stats['pairs']} pairs in {stats['batches']} batches "
+                        f"(mean {stats['mean_batch_size']:.1f}), utilization {100.0 * stats['utilization']:.0f}%")
+
+    for worker in workers:
+        worker.join()
+    for output in outputs:
+        for strategy, docs in output.items():
+            if isinstance(docs, Future):
+                output[strategy] = docs.result()
+    return outputs
+
 if __name__ == "__main__":
     args = parse_args()
+    if args.instrument:
+        instrumentation.enable()
+    cutoffs = [int(c) for c in args.cutoffs.split(",")]
+    sweep_grid = parse_sweep_args(args, cutoffs) if args.sweep else None
 
-    with open(args.corpus, "r") as f:
-        corpus = json.load(f)
-    with open(args.queries, "r") as f:
-        queries = json.load(f)
+    if args.doc_store:
+        corpus = open_doc_store(args.corpus)
+    else:
+        corpus = load_corpus(args.corpus)
+    queries = load_queries(args.queries)
 
     gt = None
     if args.gt and os.path.exists(args.gt):
         with open(args.gt, "r") as f:
             gt = json.load(f)
 
+    if args.workers > 1 and args.pipelined:
+        logger.warning("--workers is ignored with --pipelined, which uses --retrieval_workers threads")
+
+    if args.sweep:
+        run_sweep(args, sweep_grid, corpus, queries, gt, Evaluator(k=args.topk, cutoffs=cutoffs))
+        raise SystemExit(0)
+
     retrievers = args.retrievers.split(",")
     rerankers = args.rerankers.split(",") if args.rerankers else []
 
-    results = {}
+    # One instance per reranker for the whole run, shared by every query and retriever; the pool's
+    # models and the score cache are released (and pending cache writes committed) even if the run fails
+    with (ScoreCache(args.score_cache, max_entries=args.score_cache_max_entries) if args.score_cache
+          else contextlib.nullcontext()) as score_cache, \
+            RerankerPool(warmup_passes=args.reranker_warmup, options={
+                "rerank_depth": args.rerank_depth,
+                "max_tokens_per_batch": args.rerank_max_tokens,
+                "max_batch_size": args.rerank_batch_size,
+                "score_cache": score_cache,
+                "token_cache_dir": os.path.splitext(args.corpus)[0] + ".tokens" if args.token_cache else None,
+            }) as reranker_pool:
+        evaluator = Evaluator(k=args.topk, cutoffs=cutoffs)
+        metadata = {"args": vars(args), "num_docs": len(corpus), "num_queries": len(queries)}
+        # Rows are streamed per retriever; the reports are published only if the whole run succeeds,
+        # and both writers discard their temporary output if it fails
+        with ReportWriter(args.report_file_path, metadata) as report, \
+                (ColumnarReportWriter(args.columnar_report, metadata) if args.columnar_report
+                 else contextlib.nullcontext()) as columnar_report:
+            report_sinks = [report] + ([columnar_report] if columnar_report else [])
+            for retriever_name in retrievers:
+                if retriever_name not in RETRIEVER_REGISTRY:
+                    logger.warning(f"Skipping unknown retriever: {retriever_name}")
+                    continue
 
-    for retriever_name in retrievers:
-        if retriever_name not in RETRIEVER_REGISTRY:
-            logger.warning(f"Skipping unknown retriever: {retriever_name}")
-            continue
+                logger.info(f"Indexing with retriever: {retriever_name}")
+                retriever = build_retriever(retriever_name, args)
+                index_start = time.perf_counter()
+                loaded = False
+                if args.index_dir and supports_index_cache(retriever):
+                    loaded = load_or_build_index(retriever, corpus, args.index_dir, rebuild=args.rebuild_index,
+                                                 chunk_size=args.ingest_chunk_size, corpus_path=args.corpus)
+                else:
+                    retriever.index_chunks(iter_chunks(corpus, args.ingest_chunk_size), corpus)
+                index_seconds = time.perf_counter() - index_start
+                if not loaded:
+                    logger.info(f"{retriever_name}: indexed {len(corpus)} documents in {index_seconds:.2f}s "
+                                f"({len(corpus) / max(index_seconds, 1e-9):.0f} docs/sec)")
+
+                if args.ann_benchmark and getattr(retriever, "ann_index", None) is not None:
+                    nprobes = [int(n) for n in args.ann_benchmark_nprobes.split(",")]
+                    rows = run_ann_benchmark(retriever, [query["text"] for query in queries], args.topk, nprobes)
+                    for row in rows:
+                        logger.info(f"{retriever_name} ANN benchmark: {row}")
+                    os.makedirs(os.path.dirname(args.ann_benchmark_path) or ".", exist_ok=True)
+                    with open(args.ann_benchmark_path, "w") as f:
+                        json.dump({retriever_name: rows}, f, indent=2)
+
+                if args.workers > 1 and not args.pipelined:
+                    # Spans inside forked workers are not collected; retrieval wall time is amortized over all queries
+                    with instrumentation.scope([(retriever_name, query["query_id"]) for query in queries]), \
+                            instrumentation.span("retrieve"):
+                        retrieved = retrieve_parallel(retriever, corpus, [query["text"] for query in queries], args.topk,
+                                                      num_workers=args.workers, chunk_size=args.batch_size)
+                    all_outputs = [
+                        run_pipeline(query, retriever, retriever_name, rerankers, args.topk,
+                                     retrieved_docs=docs, reranker_pool=reranker_pool)
+                        for query, docs in zip(queries, retrieved)
+                    ]
+                elif args.pipelined:
+                    all_outputs = run_pipelined(queries, retriever, retriever_name, rerankers, args.topk, reranker_pool,
+                                                batch_size=args.batch_size, num_workers=args.retrieval_workers,
+                                                queue_size=args.candidate_queue_size,
+                                                max_wait_seconds=args.rerank_max_wait_ms / 1000.0)
+                else:
+                    all_outputs = []
+                    for start in range(0, len(queries), args.batch_size):
+                        batch = queries[start:start + args.batch_size]
+                        all_outputs.extend(run_batch_pipeline(batch, retriever, retriever_name, rerankers, args.topk, reranker_pool))
+
+                # Score this retriever's strategies now so only one retriever's results are held in memory
+                results = {}
+                for query, output_by_strategy in zip(queries, all_outputs):
+                    for strategy, docs in output_by_strategy.items():
+                        if strategy not in results:
+                            results[strategy] = {}
+                        results[strategy][query["query_id"]] = docs
+                for strategy, strategy_results in results.items():
+                    evaluator.write_rows(strategy, strategy_results, gt, report_sinks)
+                del results, all_outputs
+                instrumentation.reset()
+
+                # Hybrid retrievers time each branch; concurrent branches overlap, so the sum exceeds wall time
+                branch_seconds = getattr(retriever, "branch_seconds", None)
+                if branch_seconds:
+                    logger.info(f"{retriever_name} branches: " + ", ".join(
+                        f"{name} {seconds:.2f}s" for name, seconds in branch_seconds.items()))
+
+                # Dynamic-pruning retrievers keep per-query posting counts
+                query_stats = getattr(retriever, "query_stats", None)
+                if query_stats:
+                    total = sum(stats["postings_total"] for stats in query_stats)
+                    skipped = sum(stats["postings_skipped"] for stats in query_stats)
+                    logger.info(f"{retriever_name}: skipped {skipped}/{total} postings "
+                                f"({100.0 * skipped / max(total, 1):.1f}%) over {len(query_stats)} queries")
+                    query_stats.clear()
 
-        logger.info(f"Indexing with retriever: {retriever_name}")
-        retriever = RETRIEVER_REGISTRY[retriever_name]()
-        retriever.index(corpus)
-
-        for query in queries:
-            query_id = query["query_id"]
-            output_by_strategy = run_pipeline(query, retriever, retriever_name, rerankers, args.topk)
-
-            for strategy, docs in output_by_strategy.items():
-                if strategy not in results:
-                    results[strategy] = {}
-                results[strategy][query_id] = docs
-    
-    report_path = args.report_file_path
-
-    #if report directory is not valid, create it
-    if not os.path.exists(report_path):
-        os.makedirs(report_path)
-        
-    evaluator = Evaluator(k=args.topk)
-    evaluator.evaluate(results, gt, output_file_path=report_path)
+        for reranker_name, timing in reranker_pool.timing_report().items():
+            logger.info(f"Reranker {reranker_name}: load {timing['load_seconds']:.2f}s, "
+                        f"warm-up {timing['warmup_seconds']:.2f}s, "
+                        f"inference {timing['inference_seconds']:.2f}s over {timing['inference_calls']} calls")
+        if score_cache is not None:
+            stats = score_cache.stats()
+            logger.info(f"Reranker score cache: {100.0 * stats['hit_rate']:.1f}% hit rate "
+                        f"({stats['hits']} hits, {stats['misses']} misses), {stats['entries']} entries")
+    logger.info(f"Saved evaluation report at {args.report_file_path}")
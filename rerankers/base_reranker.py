@@ -16,3 +16,18 @@ class Reranker(ABC):
             List[Dict]: Reranked list of documents with added 'score' field, sorted by descending score.
         """
         pass
+
+    def warmup(self, num_passes: int = 1) -> None:
+        """
+        Run a few throwaway rerank calls so lazy initialisation (kernels, allocator pools,
+        caches) happens before the first timed query.
+        """
+        documents = [{"id": "warmup", "text": "Warmup passage for the reranker."}]
+        for _ in range(num_passes):
+            self.rerank("warmup query", [dict(doc) for doc in documents])
+
+    def close(self) -> None:
+        """
+        Release model weights and any other resources held by the reranker.
+        """
+        pass
@@ -0,0 +1,31 @@
+#helpers for grouping cross-encoder inputs into padding-efficient batches
+from typing import List
+
+
+def make_token_batches(lengths: List[int], max_tokens: int, max_batch_size: int) -> List[List[int]]:
+    """
+    Group sequences into batches whose padded size (batch size * longest sequence) stays within
+    `max_tokens`, sorting by length first so sequences of similar length share a batch.
+
+    Args:
+        lengths: Token count of each sequence.
+        max_tokens: Budget for batch size * longest sequence in the batch. A single sequence
+            longer than the budget still gets a batch of its own.
+        max_batch_size: Upper bound on sequences per batch.
+
+    Returns:
+        Lists of positions into `lengths`, one list per batch.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches = []
+    batch: List[int] = []
+    for position in order:
+        # Longest-first order means the batch's first sequence sets its padded length
+        padded_length = lengths[batch[0]] if batch else lengths[position]
+        if batch and ((len(batch) + 1) * padded_length > max_tokens or len(batch) >= max_batch_size):
+            batches.append(batch)
+            batch = []
+        batch.append(position)
+    if batch:
+        batches.append(batch)
+    return batches
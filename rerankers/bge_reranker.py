@@ -1,36 +1,162 @@
 from rerankers.base_reranker import Reranker
-from typing import List, Dict, Any
+from rerankers.batching import make_token_batches
+from rerankers.score_cache import ScoreCache
+from rerankers.token_cache import DocumentTokenCache, tokenize_pairs
+from utils import instrumentation
+from utils.ranked_list import RankedList
+import os
+from typing import List, Dict, Any, Optional, Tuple
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
 
 class BGEReranker(Reranker):
-    def __init__(self, model_name: str = "BAAI/bge-reranker-base", device: str = None):
+    """
+    Cross-encoder reranker (BGE by default).
+
+    Args:
+        model_name: Hugging Face model name.
+        device: "cuda" or "cpu"; defaults to cuda when available.
+        max_length: Truncation length of each (query, passage) pair.
+        rerank_depth: Only the first `rerank_depth` candidates are rescored; the tail keeps its
+            first-stage order after them (with reranker_score = -inf). None rescores everything.
+        max_tokens_per_batch: Budget for batch size * padded length of each forward pass.
+        max_batch_size: Upper bound on pairs per forward pass.
+        revision: Model revision (branch, tag or commit) to load.
+        score_cache: Optional ScoreCache; only pairs missing from it are sent to the model.
+        use_token_cache: Tokenize each passage once and reuse its ids across queries.
+        token_cache_dir: Optional directory (e.g. next to the corpus) where the passage token
+            cache is loaded from and saved to on close().
+    """
+    def __init__(
+        self,
+        model_name: str = "BAAI/bge-reranker-base",
+        device: str = None,
+        max_length: int = 512,
+        rerank_depth: Optional[int] = None,
+        max_tokens_per_batch: int = 16384,
+        max_batch_size: int = 64,
+        revision: Optional[str] = None,
+        score_cache: Optional[ScoreCache] = None,
+        use_token_cache: bool = True,
+        token_cache_dir: Optional[str] = None
+    ):
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(model_name).to(self.device)
+        self.model_name = model_name
+        self.max_length = max_length
+        self.rerank_depth = rerank_depth
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.max_batch_size = max_batch_size
+        self.revision = revision
+        self.score_cache = score_cache
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, revision=revision)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name, revision=revision).to(self.device)
         self.model.eval()
 
-    def rerank(self, query: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        # Prepare (query, doc) pairs
-        pairs = [[query, doc["text"]] for doc in documents]
+        self.token_cache = None
+        if use_token_cache:
+            path = os.path.join(token_cache_dir, model_name.replace("/", "__")) if token_cache_dir else None
+            self.token_cache = DocumentTokenCache(self.tokenizer, path)
+
+    def cache_namespace(self) -> str:
+        """
+        Everything besides the pair itself that determines a score (used to key the score cache).
+        """
+        revision = getattr(self.model.config, "_commit_hash", None) or self.revision or "main"
+        return f"{self.model_name}@{revision}:max_length={self.max_length}"
+
+    def lookup_scores(self, pairs: List[Tuple[str, str]]) -> List[Optional[float]]:
+        """
+        Cached scores for the pairs (None where not cached, or everywhere without a cache).
+        """
+        if self.score_cache is None:
+            return [None] * len(pairs)
+        return self.score_cache.get_many(self.cache_namespace(), pairs)
 
-        # Tokenize in batch
-        encodings = self.tokenizer.batch_encode_plus(
-            pairs,
-            padding=True,
-            truncation=True,
-            return_tensors="pt",
-            max_length=512
-        ).to(self.device)
+    def store_scores(self, pairs: List[Tuple[str, str]], scores: List[float]) -> None:
+        if self.score_cache is not None and pairs:
+            self.score_cache.put_many(self.cache_namespace(), pairs, scores)
 
-        # Run inference
-        with torch.no_grad():
-            logits = self.model(**encodings).logits.squeeze(-1)
+    def warmup(self, num_passes: int = 1) -> None:
+        # Warm-up has to reach the model, so it bypasses (and does not fill) the score cache
+        score_cache, self.score_cache = self.score_cache, None
+        try:
+            super().warmup(num_passes)
+        finally:
+            self.score_cache = score_cache
 
-        scores = logits.cpu().tolist()
+    def rerank(self, query: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        depth = len(documents) if self.rerank_depth is None else min(self.rerank_depth, len(documents))
+        head, tail = documents[:depth], documents[depth:]
+
+        if isinstance(documents, RankedList):
+            # Only the rescored head's passage texts are fetched from the corpus
+            return documents.rerank(self.score_pairs([(query, text) for text in head.texts()]))
+
+        # Prepare (query, doc) pairs
+        scores = self.score_pairs([(query, doc["text"]) for doc in head])
 
-        for doc, score in zip(documents, scores):
+        for doc, score in zip(head, scores):
             doc["reranker_score"] = score  # Consistent with evaluator naming
 
+        # Candidates below the rerank depth keep their first-stage order
+        for doc in tail:
+            doc["reranker_score"] = float("-inf")
+
         # Return sorted by descending score
-        return sorted(documents, key=lambda d: d["reranker_score"], reverse=True)
+        return sorted(head, key=lambda d: d["reranker_score"], reverse=True) + tail
+
+    def score_pairs(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """
+        Score (query, passage) pairs with streaming mini-batches.
+
+        Pairs are tokenized once without padding, grouped by length into batches that respect
+        max_tokens_per_batch, and padded per batch, so memory does not grow with the number of
+        candidates and short passages are not padded to the longest one. Pairs found in the
+        score cache skip tokenization and the model.
+        """
+        scores = self.lookup_scores(pairs)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            missing_pairs = [pairs[i] for i in missing]
+            computed = self.score_features(self.encode_pairs(missing_pairs))
+            for i, score in zip(missing, computed):
+                scores[i] = score
+            self.store_scores(missing_pairs, computed)
+        return scores
+
+    def encode_pairs(self, pairs: List[Tuple[str, str]]) -> List[Dict[str, List[int]]]:
+        """
+        Tokenize (query, passage) pairs without padding; padding happens per batch.
+        Returns one dict of model inputs (input_ids, attention_mask, ...) per pair.
+        Passage ids come from the token cache when it is enabled.
+        """
+        with instrumentation.span("rerank_tokenize"):
+            if self.token_cache is not None:
+                return self.token_cache.encode_pairs(pairs, self.max_length)
+            return tokenize_pairs(self.tokenizer, pairs, self.max_length)
+
+    def score_features(self, features: List[Dict[str, List[int]]]) -> List[float]:
+        """
+        Run the model over already-tokenized pairs (dicts of input_ids, attention_mask, ...).
+        """
+        scores = [0.0] * len(features)
+        lengths = [len(feature["input_ids"]) for feature in features]
+        for batch in make_token_batches(lengths, self.max_tokens_per_batch, self.max_batch_size):
+            with instrumentation.span("rerank_tokenize"):
+                inputs = self.tokenizer.pad([features[i] for i in batch], return_tensors="pt").to(self.device)
+
+            # Run inference
+            with instrumentation.span("model_forward"), torch.no_grad():
+                logits = self.model(**inputs).logits.view(-1).cpu().tolist()
+
+            for position, score in zip(batch, logits):
+                scores[position] = score
+        return scores
+
+    def close(self) -> None:
+        if self.token_cache is not None:
+            self.token_cache.save()
+        self.model = None
+        self.tokenizer = None
+        if self.device == "cuda":
+            torch.cuda.empty_cache()
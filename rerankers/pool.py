@@ -0,0 +1,122 @@
+#lifecycle management for reranker instances shared across queries
+import inspect
+import logging
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+from rerankers.base_reranker import Reranker
+
+logger = logging.getLogger(__name__)
+
+
+class RerankerPool:
+    """
+    Creates each reranker once per run and shares the instance across queries and retrievers.
+
+    Instances are created lazily on first use, optionally warmed up, and released by close()
+    (or on leaving a `with` block). Model load time and cumulative inference time are tracked
+    separately per reranker; see timing_report().
+
+    Args:
+        registry: Mapping of reranker name -> class. Defaults to RERANKER_REGISTRY.
+        warmup_passes: Throwaway rerank calls run right after loading (0 disables warm-up).
+        options: Constructor keyword arguments (e.g. rerank_depth); each reranker receives the
+            ones its constructor accepts. None values are ignored.
+    """
+    def __init__(
+        self,
+        registry: Optional[Dict[str, Any]] = None,
+        warmup_passes: int = 0,
+        options: Optional[Dict[str, Any]] = None
+    ) -> None:
+        if registry is None:
+            from rerankers.registry import RERANKER_REGISTRY
+            registry = RERANKER_REGISTRY
+        self.registry = registry
+        self.warmup_passes = warmup_passes
+        self.options = {name: value for name, value in (options or {}).items() if value is not None}
+        self._instances: Dict[str, Reranker] = {}
+        self._lock = threading.Lock()
+        self.load_seconds: Dict[str, float] = {}
+        self.warmup_seconds: Dict[str, float] = {}
+        self.inference_seconds: Dict[str, float] = {}
+        self.inference_calls: Dict[str, int] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.registry
+
+    def get(self, name: str) -> Reranker:
+        """
+        Return the shared instance for `name`, loading (and warming up) it on first use.
+        """
+        with self._lock:
+            if name not in self._instances:
+                if name not in self.registry:
+                    raise KeyError(f"Unknown reranker: {name}")
+
+                reranker_cls = self.registry[name]
+                accepted = inspect.signature(reranker_cls).parameters
+                kwargs = {key: value for key, value in self.options.items() if key in accepted}
+
+                start = time.perf_counter()
+                reranker = reranker_cls(**kwargs)
+                self.load_seconds[name] = time.perf_counter() - start
+                logger.info(f"Loaded reranker {name} in {self.load_seconds[name]:.2f}s")
+
+                if self.warmup_passes > 0:
+                    start = time.perf_counter()
+                    reranker.warmup(self.warmup_passes)
+                    self.warmup_seconds[name] = time.perf_counter() - start
+
+                self._instances[name] = reranker
+                self.inference_seconds[name] = 0.0
+                self.inference_calls[name] = 0
+            return self._instances[name]
+
+    def rerank(self, name: str, query: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Rerank with the shared instance for `name`, accounting the call as inference time.
+        """
+        reranker = self.get(name)
+        start = time.perf_counter()
+        reranked = reranker.rerank(query, documents)
+        self.record_inference(name, time.perf_counter() - start)
+        return reranked
+
+    def record_inference(self, name: str, seconds: float, calls: int = 1) -> None:
+        """
+        Account model time spent outside rerank(), e.g. batches run by a RerankScheduler.
+        """
+        with self._lock:
+            self.inference_seconds[name] = self.inference_seconds.get(name, 0.0) + seconds
+            self.inference_calls[name] = self.inference_calls.get(name, 0) + calls
+
+    def timing_report(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-reranker load, warm-up and inference timings.
+        """
+        return {
+            name: {
+                "load_seconds": self.load_seconds.get(name, 0.0),
+                "warmup_seconds": self.warmup_seconds.get(name, 0.0),
+                "inference_seconds": self.inference_seconds.get(name, 0.0),
+                "inference_calls": self.inference_calls.get(name, 0),
+            }
+            for name in self._instances
+        }
+
+    def close(self) -> None:
+        """
+        Close and drop every instance. The pool can be reused; rerankers reload on next use.
+        """
+        with self._lock:
+            for reranker in self._instances.values():
+                reranker.close()
+            self._instances.clear()
+
+    def __enter__(self) -> "RerankerPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
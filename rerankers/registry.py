@@ -1,5 +1,7 @@
-from rerankers.bge_reranker import BGEReranker
+from utils.plugins import LazyRegistry
 
-RERANKER_REGISTRY = {
-    "bge": BGEReranker,
-}
\ No newline at end of file
+# Name -> "module:class"; torch and transformers are imported only when a reranker is selected.
+# Third-party rerankers register under the "rag_bench.rerankers" entry point group.
+RERANKER_REGISTRY = LazyRegistry("rag_bench.rerankers", {
+    "bge": "rerankers.bge_reranker:BGEReranker",
+})
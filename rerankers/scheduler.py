@@ -0,0 +1,217 @@
+#cross-query dynamic batching for cross-encoder rerankers
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Dict, Any, Callable, Optional
+
+from rerankers.batching import make_token_batches
+from utils import instrumentation
+from utils.ranked_list import RankedList
+
+logger = logging.getLogger(__name__)
+
+
+def supports_scheduling(reranker) -> bool:
+    """
+    The scheduler needs separate tokenization (encode_pairs) and model (score_features) steps.
+    """
+    return hasattr(reranker, "encode_pairs") and hasattr(reranker, "score_features")
+
+
+class _Request:
+    """
+    One query's reranking job: pending scores for its head candidates plus the untouched tail.
+    """
+    __slots__ = ("documents", "head", "tail", "scores", "remaining", "future", "keys")
+
+    def __init__(self, documents: List[Dict[str, Any]], depth: int) -> None:
+        self.documents = documents
+        # Instrumentation keys of the submitting scope; model time is charged to them per pair
+        self.keys = instrumentation.current_keys()
+        self.head = documents[:depth]
+        self.tail = documents[depth:]
+        self.scores = [0.0] * depth
+        self.remaining = depth
+        self.future: Future = Future()
+
+    def finish(self) -> None:
+        if isinstance(self.documents, RankedList):
+            self.future.set_result(self.documents.rerank(self.scores))
+            return
+        # Copies keep concurrent rerankers from overwriting each other's scores on shared dicts
+        reranked = [{**doc, "reranker_score": score} for doc, score in zip(self.head, self.scores)]
+        reranked.sort(key=lambda d: d["reranker_score"], reverse=True)
+        tail = [{**doc, "reranker_score": float("-inf")} for doc in self.tail]
+        self.future.set_result(reranked + tail)
+
+
+class RerankScheduler:
+    """
+    Dynamic batching scheduler that feeds one reranker model from many queries at once.
+
+    submit() tokenizes a query's candidates in the caller's thread and queues the (query, passage)
+    pairs. A background thread packs pending pairs from all queries into length-bucketed batches
+    (see make_token_batches) and runs the model. A batch is dispatched as soon as it is full; a
+    partial batch waits at most `max_wait_seconds` for more pairs. Scores are routed back to their
+    query, whose Future resolves to the same output as reranker.rerank().
+
+    Args:
+        reranker: Reranker exposing encode_pairs() and score_features() (e.g. BGEReranker).
+        max_tokens_per_batch: Budget for batch size * padded length; defaults to the reranker's.
+        max_batch_size: Pairs per forward pass; defaults to the reranker's.
+        max_wait_seconds: Longest a partial batch waits for more pairs before running.
+        on_batch: Called with the seconds of every model batch that ran, e.g.
+            partial(RerankerPool.record_inference, name) so the pool's timing report counts them.
+    """
+    def __init__(
+        self,
+        reranker,
+        max_tokens_per_batch: Optional[int] = None,
+        max_batch_size: Optional[int] = None,
+        max_wait_seconds: float = 0.01,
+        on_batch: Optional[Callable[[float], None]] = None
+    ) -> None:
+        if not supports_scheduling(reranker):
+            raise ValueError(f"{type(reranker).__name__} does not support cross-query batching")
+        self.reranker = reranker
+        self.max_tokens_per_batch = max_tokens_per_batch or getattr(reranker, "max_tokens_per_batch", 16384)
+        self.max_batch_size = max_batch_size or getattr(reranker, "max_batch_size", 64)
+        self.max_wait_seconds = max_wait_seconds
+        self.on_batch = on_batch
+        self.rerank_depth = getattr(reranker, "rerank_depth", None)
+
+        self._pending = []         # (request, position, features, pair) tuples
+        self._oldest = None        # arrival time of the oldest pending pair
+        self._condition = threading.Condition()
+        self._closed = False
+        self.batches = 0
+        self.pairs = 0
+        self.busy_seconds = 0.0
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="rerank-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, query: str, documents: List[Dict[str, Any]]) -> Future:
+        """
+        Queue a query's candidates for reranking. Returns a Future for the reranked list.
+        """
+        depth = len(documents) if self.rerank_depth is None else min(self.rerank_depth, len(documents))
+        request = _Request(documents, depth)
+        if request.remaining == 0:
+            request.finish()
+            return request.future
+
+        texts = request.head.texts() if isinstance(request.head, RankedList) else [doc["text"] for doc in request.head]
+        pairs = [(query, text) for text in texts]
+        # Rerankers with a score cache only send uncached pairs to the model
+        positions = list(range(len(pairs)))
+        if hasattr(self.reranker, "lookup_scores"):
+            cached = self.reranker.lookup_scores(pairs)
+            positions = [i for i, score in enumerate(cached) if score is None]
+            request.scores = [0.0 if score is None else score for score in cached]
+            request.remaining = len(positions)
+            if not positions:
+                request.finish()
+                return request.future
+
+        features = self.reranker.encode_pairs([pairs[i] for i in positions])
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Scheduler is closed")
+            if not self._pending:
+                self._oldest = time.perf_counter()
+            self._pending.extend(
+                (request, position, feature, pairs[position]) for position, feature in zip(positions, features)
+            )
+            self._condition.notify()
+        return request.future
+
+    def _take_batches(self, flush: bool) -> List[list]:
+        """
+        Pack pending pairs into batches; keep the last partial batch pending unless flushing.
+        Must be called with the condition held.
+        """
+        lengths = [len(feature["input_ids"]) for _, _, feature, _ in self._pending]
+        batches = make_token_batches(lengths, self.max_tokens_per_batch, self.max_batch_size)
+        if not flush and batches and not self._is_full(batches[-1], lengths):
+            batches = batches[:-1]
+
+        taken = {i for batch in batches for i in batch}
+        result = [[self._pending[i] for i in batch] for batch in batches]
+        self._pending = [item for i, item in enumerate(self._pending) if i not in taken]
+        self._oldest = time.perf_counter() if self._pending else None
+        return result
+
+    def _is_full(self, batch: List[int], lengths: List[int]) -> bool:
+        padded_length = lengths[batch[0]]
+        return (len(batch) >= self.max_batch_size
+                or (len(batch) + 1) * padded_length > self.max_tokens_per_batch)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._pending:
+                        waited = time.perf_counter() - self._oldest
+                        flush = self._closed or waited >= self.max_wait_seconds
+                        batches = self._take_batches(flush)
+                        if batches:
+                            break
+                        self._condition.wait(self.max_wait_seconds - waited)
+                    elif self._closed:
+                        return
+                    else:
+                        self._condition.wait()
+
+            for batch in batches:
+                self._score_batch(batch)
+
+    def _score_batch(self, batch: list) -> None:
+        start = time.perf_counter()
+        try:
+            with instrumentation.scope([key for request, _, _, _ in batch for key in request.keys]):
+                scores = self.reranker.score_features([feature for _, _, feature, _ in batch])
+        except Exception as exc:
+            logger.exception("Reranker batch failed")
+            for request in {id(r): r for r, _, _, _ in batch}.values():
+                if not request.future.done():
+                    request.future.set_exception(exc)
+            return
+        elapsed = time.perf_counter() - start
+        self.busy_seconds += elapsed
+        self.batches += 1
+        self.pairs += len(batch)
+        if self.on_batch is not None:
+            self.on_batch(elapsed)
+
+        if hasattr(self.reranker, "store_scores"):
+            self.reranker.store_scores([pair for _, _, _, pair in batch], scores)
+
+        for (request, position, _, _), score in zip(batch, scores):
+            request.scores[position] = score
+            request.remaining -= 1
+            if request.remaining == 0 and not request.future.done():
+                request.finish()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Throughput counters: batches, pairs, mean batch size and model utilization.
+        """
+        elapsed = time.perf_counter() - self._started
+        return {
+            "batches": self.batches,
+            "pairs": self.pairs,
+            "mean_batch_size": self.pairs / self.batches if self.batches else 0.0,
+            "busy_seconds": self.busy_seconds,
+            "utilization": self.busy_seconds / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def close(self) -> None:
+        """
+        Score everything still pending, then stop the background thread.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
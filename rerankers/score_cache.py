@@ -0,0 +1,209 @@
+#persistent cache of cross-encoder scores for (query, passage) pairs
+import hashlib
+import os
+import sqlite3
+import threading
+from argparse import ArgumentParser
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# SQLite limits the number of bound parameters per statement
+_CHUNK_SIZE = 500
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def pair_key(namespace: str, query: str, text: str) -> str:
+    """
+    Cache key of one (query, passage) pair under a reranker namespace (model, revision, max_length).
+    """
+    digest = hashlib.sha256()
+    for part in (namespace, query, content_hash(text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ScoreCache:
+    """
+    Reranker score cache: an in-memory LRU in front of a SQLite table.
+
+    Keys combine the reranker namespace (see BGEReranker.cache_namespace), the query text and a
+    hash of the passage content, so changing the model, its revision or max_length never
+    returns stale scores. The table is bounded to `max_entries` rows; the least recently used
+    rows (by a logical clock advanced on every lookup and insert) are evicted first. Safe to share between threads.
+
+    Lookups never commit: the recency of hits is kept in memory and written back in one batch
+    by the next put_many() (before it evicts), when too many hits are pending, or on close().
+
+    Args:
+        path: SQLite file; ":memory:" keeps the cache for this process only.
+        max_entries: Maximum rows kept on disk.
+        memory_entries: Maximum entries kept in the in-memory LRU.
+    """
+    def __init__(self, path: str = ":memory:", max_entries: int = 10_000_000, memory_entries: int = 100_000) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._touched: Dict[str, int] = {}   # key -> last_used not yet written to disk
+        self._lock = threading.Lock()
+        self._closed = False
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, score REAL NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+        self._conn.commit()
+        self._count, self._clock = self._conn.execute("SELECT COUNT(*), COALESCE(MAX(last_used), 0) FROM scores").fetchone()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, namespace: str, pairs: List[Tuple[str, str]]) -> List[Optional[float]]:
+        """
+        Cached scores for (query, passage) pairs, None where the pair has not been scored yet.
+        """
+        keys = [pair_key(namespace, query, text) for query, text in pairs]
+        scores: List[Optional[float]] = [None] * len(keys)
+        with self._lock:
+            disk_lookups = []
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    scores[i] = self._memory[key]
+                else:
+                    disk_lookups.append(i)
+
+            found = {}
+            for start in range(0, len(disk_lookups), _CHUNK_SIZE):
+                chunk = [keys[i] for i in disk_lookups[start:start + _CHUNK_SIZE]]
+                rows = self._conn.execute(
+                    f"SELECT key, score FROM scores WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update(rows)
+            for i in disk_lookups:
+                if keys[i] in found:
+                    scores[i] = found[keys[i]]
+                    self._remember(keys[i], scores[i])
+
+            self._clock += 1
+            hit_keys = [key for key, score in zip(keys, scores) if score is not None]
+            self._touched.update((key, self._clock) for key in hit_keys)
+            if len(self._touched) > max(self.memory_entries, _CHUNK_SIZE):
+                # Bound the pending set; the update is committed with the next write or on close
+                self._write_recency()
+            self.hits += len(hit_keys)
+            self.misses += len(keys) - len(hit_keys)
+        return scores
+
+    def _write_recency(self) -> None:
+        if self._touched:
+            self._conn.executemany("UPDATE scores SET last_used = ? WHERE key = ?",
+                                   [(clock, key) for key, clock in self._touched.items()])
+            self._touched.clear()
+
+    def put_many(self, namespace: str, pairs: List[Tuple[str, str]], scores: List[float]) -> None:
+        """
+        Store freshly computed scores, evicting the least recently used rows beyond max_entries.
+        """
+        keys = [pair_key(namespace, query, text) for query, text in pairs]
+        with self._lock:
+            self._clock += 1
+            rows = [(key, namespace, float(score), self._clock) for key, score in zip(keys, scores)]
+            for key, _, score, _ in rows:
+                self._remember(key, score)
+            self._write_recency()
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO scores VALUES (?, ?, ?, ?)", rows)
+            self._count += self._conn.total_changes - before
+            if self._count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)",
+                    (self._count - self.max_entries,)
+                )
+                self._count = self.max_entries
+            self._conn.commit()
+
+    def _remember(self, key: str, score: float) -> None:
+        self._memory[key] = score
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def invalidate(self, namespace: Optional[str] = None) -> int:
+        """
+        Drop every cached score, or only those of one namespace (a namespace prefix such as a
+        model name also matches). Returns the number of rows removed.
+        """
+        with self._lock:
+            self._memory.clear()
+            self._write_recency()
+            if namespace is None:
+                removed = self._conn.execute("DELETE FROM scores").rowcount
+            else:
+                removed = self._conn.execute(
+                    "DELETE FROM scores WHERE namespace = ? OR substr(namespace, 1, ?) = ?",
+                    (namespace, len(namespace) + 1, namespace + "@")
+                ).rowcount
+            self._conn.commit()
+            self._count -= removed
+        return removed
+
+    def namespaces(self) -> dict:
+        """
+        Number of cached scores per namespace.
+        """
+        with self._lock:
+            return dict(self._conn.execute("SELECT namespace, COUNT(*) FROM scores GROUP BY namespace").fetchall())
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {"entries": self._count, "hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+    def close(self) -> None:
+        """
+        Write pending recency, commit and close the connection. Closing twice is a no-op.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._write_recency()
+            self._conn.commit()
+            self._conn.close()
+            self._closed = True
+
+    def __enter__(self) -> "ScoreCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Inspect or invalidate a reranker score cache")
+    parser.add_argument("path", type=str, help="SQLite score cache file")
+    parser.add_argument("--invalidate", action="store_true", help="Delete cached scores")
+    parser.add_argument("--namespace", type=str, default=None,
+                        help="Only invalidate this namespace or model name (default: everything)")
+    args = parser.parse_args()
+
+    cache = ScoreCache(args.path)
+    if args.invalidate:
+        print(f"Removed {cache.invalidate(args.namespace)} cached scores")
+    else:
+        for namespace, count in cache.namespaces().items():
+            print(f"{namespace}: {count}")
+        print(f"total: {len(cache)}")
+    cache.close()
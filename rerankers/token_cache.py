@@ -0,0 +1,223 @@
+#pre-tokenized passage cache for cross-encoder inputs
+import json
+import logging
+import os
+import shutil
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from rerankers.score_cache import content_hash
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+
+# Pairs used to derive and check the tokenizer's pair layout
+_PROBE_PAIRS = [
+    ("what is the capital of france", "paris is the capital and largest city of france"),
+    ("galaxy and solar system", "the milky way galaxy contains our solar system"),
+]
+
+
+def tokenize_pairs(tokenizer, pairs: List[Tuple[str, str]], max_length: int) -> List[Dict[str, List[int]]]:
+    """
+    Reference encoding: tokenize (query, passage) pairs together, truncated and unpadded.
+    """
+    if not pairs:
+        return []
+    encodings = tokenizer(
+        [query for query, _ in pairs],
+        [text for _, text in pairs],
+        truncation=True,
+        max_length=max_length
+    )
+    return [{key: encodings[key][i] for key in encodings.keys()} for i in range(len(pairs))]
+
+
+class _PairTemplate:
+    """
+    Where the special tokens go when the tokenizer encodes a pair:
+    prefix + query + middle + passage + suffix, with one token type per region.
+    """
+    def __init__(self, keys, prefix, middle, suffix, type_ids) -> None:
+        self.keys = keys
+        self.prefix = prefix
+        self.middle = middle
+        self.suffix = suffix
+        self.type_ids = type_ids   # (prefix, query, middle, passage, suffix) token types, or None
+        self.num_special = len(prefix) + len(middle) + len(suffix)
+
+    def join(self, query_ids: List[int], passage_ids: List[int]) -> Dict[str, List[int]]:
+        input_ids = self.prefix + query_ids + self.middle + passage_ids + self.suffix
+        feature = {"input_ids": input_ids}
+        if self.type_ids is not None:
+            prefix, query, middle, passage, suffix = self.type_ids
+            feature["token_type_ids"] = (prefix + [query] * len(query_ids) + middle
+                                         + [passage] * len(passage_ids) + suffix)
+        if "attention_mask" in self.keys:
+            feature["attention_mask"] = [1] * len(input_ids)
+        return {key: feature[key] for key in self.keys}
+
+
+def _derive_template(tokenizer) -> Optional[_PairTemplate]:
+    """
+    Learn the pair layout from the tokenizer's own output and check it on every probe pair.
+    Returns None if the tokenizer does not encode pairs as plain concatenation.
+    """
+    try:
+        query, passage = _PROBE_PAIRS[0]
+        query_ids = tokenizer(query, add_special_tokens=False)["input_ids"]
+        passage_ids = tokenizer(passage, add_special_tokens=False)["input_ids"]
+        reference = tokenize_pairs(tokenizer, [(query, passage)], max_length=10_000)[0]
+        ids = reference["input_ids"]
+
+        start = next(i for i in range(len(ids)) if ids[i:i + len(query_ids)] == query_ids)
+        query_end = start + len(query_ids)
+        middle_end = next(i for i in range(query_end, len(ids)) if ids[i:i + len(passage_ids)] == passage_ids)
+        passage_end = middle_end + len(passage_ids)
+
+        type_ids = None
+        if "token_type_ids" in reference:
+            types = reference["token_type_ids"]
+            type_ids = (types[:start], types[start], types[query_end:middle_end],
+                        types[middle_end], types[passage_end:])
+        template = _PairTemplate(list(reference.keys()), ids[:start], ids[query_end:middle_end],
+                                 ids[passage_end:], type_ids)
+
+        for query, passage in _PROBE_PAIRS:
+            joined = template.join(tokenizer(query, add_special_tokens=False)["input_ids"],
+                                   tokenizer(passage, add_special_tokens=False)["input_ids"])
+            if joined != tokenize_pairs(tokenizer, [(query, passage)], max_length=10_000)[0]:
+                return None
+        return template
+    except (StopIteration, KeyError, IndexError, TypeError):
+        return None
+
+
+class DocumentTokenCache:
+    """
+    Passage input ids, tokenized once and reused for every query that retrieves the passage.
+
+    Entries are keyed by a hash of the passage text. encode_pairs() joins cached passage ids with
+    the query's ids using the special-token layout learned from the tokenizer itself, producing
+    exactly what the tokenizer returns for the pair. Pairs that would need truncation go
+    through the tokenizer instead, so its truncation strategy is always respected. If the
+    tokenizer's pair encoding is not a plain concatenation, the cache disables itself.
+
+    Args:
+        tokenizer: Hugging Face tokenizer of the reranker.
+        path: Optional directory to load the cache from and save() it to.
+    """
+    def __init__(self, tokenizer, path: Optional[str] = None) -> None:
+        self.tokenizer = tokenizer
+        self.path = path
+        self.template = _derive_template(tokenizer)
+        if self.template is None:
+            logger.warning(f"{type(tokenizer).__name__} pair layout not recognised, document token cache disabled")
+        self._ids: Dict[str, List[int]] = {}
+        self._new_entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        if path and os.path.exists(os.path.join(path, META_FILE)):
+            self.load(path)
+
+    @property
+    def enabled(self) -> bool:
+        return self.template is not None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get_many(self, texts: List[str]) -> List[List[int]]:
+        """
+        Input ids (without special tokens) of each text, tokenizing only unseen texts.
+        """
+        keys = [content_hash(text) for text in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self._ids and key not in missing:
+                missing[key] = text
+        if missing:
+            encoded = self.tokenizer(list(missing.values()), add_special_tokens=False)["input_ids"]
+            self._ids.update(zip(missing.keys(), encoded))
+            self._new_entries += len(missing)
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+        return [self._ids[key] for key in keys]
+
+    def encode_pairs(self, pairs: List[Tuple[str, str]], max_length: int) -> List[Dict[str, List[int]]]:
+        """
+        Same output as tokenize_pairs(), reusing cached passage ids where no truncation is needed.
+        """
+        if not pairs or not self.enabled:
+            return tokenize_pairs(self.tokenizer, pairs, max_length)
+
+        queries = list(dict.fromkeys(query for query, _ in pairs))
+        query_ids = dict(zip(queries, self.tokenizer(queries, add_special_tokens=False)["input_ids"]))
+        passage_ids = self.get_many([text for _, text in pairs])
+
+        features: List[Optional[Dict[str, List[int]]]] = [None] * len(pairs)
+        overflow = []
+        for i, ((query, _), ids) in enumerate(zip(pairs, passage_ids)):
+            if len(query_ids[query]) + len(ids) + self.template.num_special <= max_length:
+                features[i] = self.template.join(query_ids[query], ids)
+            else:
+                overflow.append(i)
+
+        if overflow:
+            self.fallbacks += len(overflow)
+            for i, feature in zip(overflow, tokenize_pairs(self.tokenizer, [pairs[i] for i in overflow], max_length)):
+                features[i] = feature
+        return features
+
+    def save(self, path: Optional[str] = None) -> None:
+        """
+        Write the cache as flat int32 ids + offsets; skipped if nothing new was tokenized.
+        The files are written to a temporary directory and renamed into place.
+        """
+        path = path or self.path
+        if path is None or self._new_entries == 0:
+            return
+
+        keys = list(self._ids.keys())
+        lengths = np.array([len(self._ids[key]) for key in keys], dtype=np.int64)
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        flat = np.fromiter((token for key in keys for token in self._ids[key]), dtype=np.int32, count=int(offsets[-1]))
+
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, "keys.npy"), np.array(keys, dtype="S64"))
+        np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+        np.save(os.path.join(tmp_path, "ids.npy"), flat)
+        with open(os.path.join(tmp_path, META_FILE), "w") as f:
+            json.dump({"tokenizer": self._tokenizer_name(), "num_passages": len(keys)}, f, indent=2)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self._new_entries = 0
+        logger.info(f"Saved {len(keys)} tokenized passages to {path}")
+
+    def load(self, path: str) -> None:
+        with open(os.path.join(path, META_FILE), "r") as f:
+            meta = json.load(f)
+        if meta.get("tokenizer") != self._tokenizer_name():
+            logger.warning(f"Token cache at {path} was built with another tokenizer, ignoring it")
+            return
+
+        keys = np.load(os.path.join(path, "keys.npy"))
+        offsets = np.load(os.path.join(path, "offsets.npy"))
+        flat = np.load(os.path.join(path, "ids.npy"))
+        for row, key in enumerate(keys):
+            self._ids.setdefault(key.decode("ascii"), flat[offsets[row]:offsets[row + 1]].tolist())
+
+    def _tokenizer_name(self) -> str:
+        return f"{getattr(self.tokenizer, 'name_or_path', '')}:{type(self.tokenizer).__name__}:{len(self.tokenizer)}"
@@ -0,0 +1,226 @@
+#approximate nearest-neighbour index (IVF-PQ) for dense retrieval, pure NumPy
+import os
+from typing import List, Tuple, Optional
+
+import numpy as np
+
+
+def kmeans(
+    vectors: np.ndarray,
+    num_clusters: int,
+    num_iters: int = 20,
+    seed: int = 0,
+    block_size: int = 65536
+) -> np.ndarray:
+    """
+    Lloyd's k-means with squared L2 distance.
+
+    Args:
+        vectors: float32 array of shape (n, dim).
+        num_clusters: Number of centroids; clipped to n.
+        num_iters: Number of assignment/update rounds.
+        seed: Seed for the initial centroid sample.
+        block_size: Rows assigned per distance computation, bounds memory.
+
+    Returns:
+        float32 array of shape (num_clusters, dim).
+    """
+    rng = np.random.default_rng(seed)
+    num_clusters = min(num_clusters, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), num_clusters, replace=False)].astype(np.float32)
+
+    for _ in range(num_iters):
+        assignments = assign_nearest(vectors, centroids, block_size)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=num_clusters)
+
+        # Empty clusters are re-seeded with random points
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+            counts[empty] = 1
+        centroids = (sums / counts[:, None]).astype(np.float32)
+
+    return centroids
+
+
+def assign_nearest(vectors: np.ndarray, centroids: np.ndarray, block_size: int = 65536) -> np.ndarray:
+    """
+    Index of the nearest centroid (squared L2) for every row of `vectors`.
+    """
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block_size):
+        block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+        # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, and ||x||^2 does not change the argmin
+        distances = centroid_norms[None, :] - 2 * block @ centroids.T
+        assignments[start:start + len(block)] = distances.argmin(axis=1)
+    return assignments
+
+
+class IVFPQIndex:
+    """
+    Inverted-file index with product quantization for maximum inner-product search.
+
+    Vectors are assigned to `nlist` coarse k-means cells; the residual to the cell centroid is
+    compressed to `m` one-byte product-quantizer codes. A query probes the `nprobe` cells with
+    the highest centroid score and scores their members with per-query lookup tables
+    (asymmetric distance computation). With `refine_factor > 0`, the best k * refine_factor
+    candidates are re-scored exactly against the original vectors.
+    """
+    # Arrays written by save() and memory-mapped by load()
+    index_arrays = ("coarse_centroids", "pq_centroids", "list_offsets", "list_ids", "codes")
+
+    def __init__(
+        self,
+        nlist: int = 1024,
+        m: int = 16,
+        nprobe: int = 16,
+        refine_factor: int = 4,
+        train_size: int = 100000,
+        num_iters: int = 20,
+        seed: int = 0
+    ) -> None:
+        self.nlist = nlist
+        self.m = m
+        self.nprobe = nprobe
+        self.refine_factor = refine_factor
+        self.train_size = train_size
+        self.num_iters = num_iters
+        self.seed = seed
+        self.coarse_centroids = None   # (nlist, dim)
+        self.pq_centroids = None       # (m, 256, dim // m)
+        self.list_offsets = None       # (nlist + 1,) slice of each cell in list_ids / codes
+        self.list_ids = None           # doc indices grouped by cell
+        self.codes = None              # (num_docs, m) uint8 PQ codes grouped by cell
+
+    def build_config(self) -> dict:
+        """
+        Parameters that determine the built index (nprobe and refine_factor are search-time only).
+        """
+        return {"type": "ivfpq", "nlist": self.nlist, "m": self.m, "train_size": self.train_size,
+                "num_iters": self.num_iters, "seed": self.seed}
+
+    def build(self, vectors: np.ndarray, scales: Optional[np.ndarray] = None, block_size: int = 65536) -> None:
+        """
+        Train the coarse quantizer and product quantizer on a sample and encode all vectors.
+        `vectors` may be a memory-mapped (and int8-quantized, with per-row `scales`) matrix;
+        it is read in blocks.
+        """
+        num_docs, dim = vectors.shape
+        if dim % self.m != 0:
+            raise ValueError(f"Vector dimension {dim} is not divisible by m={self.m}")
+
+        rng = np.random.default_rng(self.seed)
+        sample_ids = np.sort(rng.choice(num_docs, min(self.train_size, num_docs), replace=False))
+        sample = _dequantize(vectors, scales, sample_ids)
+
+        self.coarse_centroids = kmeans(sample, self.nlist, self.num_iters, self.seed)
+        residuals = sample - self.coarse_centroids[assign_nearest(sample, self.coarse_centroids)]
+        sub_dim = dim // self.m
+        self.pq_centroids = np.stack([
+            _pad_centroids(kmeans(residuals[:, j * sub_dim:(j + 1) * sub_dim], 256, self.num_iters, self.seed + j))
+            for j in range(self.m)
+        ])
+
+        cells = np.empty(num_docs, dtype=np.int64)
+        codes = np.empty((num_docs, self.m), dtype=np.uint8)
+        for start in range(0, num_docs, block_size):
+            block = _dequantize(vectors, scales, np.arange(start, min(start + block_size, num_docs)))
+            block_cells = assign_nearest(block, self.coarse_centroids)
+            cells[start:start + len(block)] = block_cells
+            codes[start:start + len(block)] = self._encode(block - self.coarse_centroids[block_cells])
+
+        order = np.argsort(cells, kind="stable")
+        self.list_ids = order
+        self.codes = codes[order]
+        self.list_offsets = np.zeros(len(self.coarse_centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=len(self.coarse_centroids)), out=self.list_offsets[1:])
+
+    def _encode(self, residuals: np.ndarray) -> np.ndarray:
+        sub_dim = residuals.shape[1] // self.m
+        return np.stack([
+            assign_nearest(residuals[:, j * sub_dim:(j + 1) * sub_dim], self.pq_centroids[j])
+            for j in range(self.m)
+        ], axis=1).astype(np.uint8)
+
+    def search(
+        self,
+        query_vectors: np.ndarray,
+        k: int,
+        vectors: Optional[np.ndarray] = None,
+        scales: Optional[np.ndarray] = None,
+        nprobe: Optional[int] = None
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """
+        Approximate top-k inner-product search.
+
+        Args:
+            query_vectors: float32 array of shape (num_queries, dim).
+            k: Number of results per query.
+            vectors: Original (possibly quantized, memory-mapped) vectors, used for exact refinement.
+            scales: Per-row dequantization scales for `vectors`, if any.
+            nprobe: Cells probed per query; defaults to self.nprobe.
+
+        Returns:
+            Tuple of (doc indices, scores) lists of arrays, one per query, sorted by descending score.
+            Queries can get fewer than k results when the probed cells are small.
+        """
+        nprobe = min(nprobe or self.nprobe, len(self.coarse_centroids))
+        sub_dim = self.pq_centroids.shape[2]
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        coarse_scores = query_vectors @ self.coarse_centroids.T
+        probes = np.argsort(-coarse_scores, axis=1)[:, :nprobe]
+
+        all_ids, all_scores = [], []
+        for row, query in enumerate(query_vectors):
+            # Lookup tables: score of every PQ centroid against the matching query slice
+            tables = np.einsum("jcd,jd->jc", self.pq_centroids, query.reshape(self.m, sub_dim))
+
+            cells = probes[row]
+            ids = np.concatenate([self.list_ids[self.list_offsets[c]:self.list_offsets[c + 1]] for c in cells])
+            codes = np.concatenate([self.codes[self.list_offsets[c]:self.list_offsets[c + 1]] for c in cells])
+            base = np.repeat(coarse_scores[row, cells], np.diff(self.list_offsets)[cells])
+            scores = base + tables[np.arange(self.m), codes].sum(axis=1)
+
+            shortlist = k * self.refine_factor if vectors is not None and self.refine_factor > 0 else k
+            if len(scores) > shortlist:
+                keep = np.argpartition(-scores, shortlist - 1)[:shortlist]
+                ids, scores = ids[keep], scores[keep]
+
+            if vectors is not None and self.refine_factor > 0 and len(ids):
+                ids = np.sort(ids)
+                scores = _dequantize(vectors, scales, ids) @ query
+
+            order = np.lexsort((ids, -scores))[:k]
+            all_ids.append(ids[order])
+            all_scores.append(scores[order].astype(np.float32))
+        return all_ids, all_scores
+
+    def save(self, path: str) -> None:
+        for name in self.index_arrays:
+            np.save(os.path.join(path, f"ann_{name}.npy"), getattr(self, name))
+
+    def load(self, path: str) -> None:
+        for name in self.index_arrays:
+            setattr(self, name, np.load(os.path.join(path, f"ann_{name}.npy"), mmap_mode="r"))
+
+
+def _pad_centroids(centroids: np.ndarray) -> np.ndarray:
+    """
+    PQ codebooks always have 256 entries; pad with copies when trained on fewer points.
+    """
+    if len(centroids) == 256:
+        return centroids
+    return centroids[np.arange(256) % len(centroids)]
+
+
+def _dequantize(vectors: np.ndarray, scales: Optional[np.ndarray], rows: np.ndarray) -> np.ndarray:
+    """
+    Read the given rows (ascending) as float32, applying per-row scales if the matrix is quantized.
+    """
+    block = np.asarray(vectors[rows], dtype=np.float32)
+    if scales is not None:
+        block *= np.asarray(scales[rows])[:, None]
+    return block
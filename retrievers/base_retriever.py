@@ -1,6 +1,6 @@
 
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Iterable, Optional
 from typing import Any
 
 # Define the base class
@@ -25,6 +25,51 @@ class BaseRetriever(ABC):
 
         pass
 
+    def index_chunks(self, chunks: Iterable[List[Dict[str, str]]], corpus: Optional[List[Dict[str, str]]] = None) -> None:
+        """
+        Build the index from a stream of document chunks (e.g. utils.data_loader.load_document_chunks).
+        `corpus` is the sequence results are served from, holding the same documents in the same
+        order (e.g. a memory-mapped DocStore); if None, the chunks are collected into a list.
+        The default implementation calls index() on the whole corpus; retrievers that can build
+        incrementally should override it so only one chunk of raw text is held at a time.
+        """
+
+        if corpus is None:
+            corpus = [doc for chunk in chunks for doc in chunk]
+        self.index(corpus)
+
+    def add_documents(self, documents: Iterable[Dict[str, str]]) -> None:
+        """
+        Add documents to a built index; they are placed after all existing documents.
+        The default implementation rebuilds the index over self.corpus plus the new documents;
+        retrievers with incremental indexes (e.g. SegmentedBM25Retriever) override it.
+        """
+
+        if getattr(self, "corpus", None) is None:
+            raise ValueError("The index has not been built. Please call index() first.")
+        documents = list(documents)
+        existing = {doc["id"] for doc in self.corpus}
+        duplicates = [doc["id"] for doc in documents if doc["id"] in existing]
+        if duplicates:
+            raise ValueError(f"Duplicate document ids: {duplicates[:10]}")
+        self.index(list(self.corpus) + documents)
+
+    def delete_documents(self, doc_ids: Iterable[Any]) -> int:
+        """
+        Remove documents from a built index by id and return how many were removed.
+        The default implementation rebuilds the index over the remaining documents.
+        """
+
+        if getattr(self, "corpus", None) is None:
+            raise ValueError("The index has not been built. Please call index() first.")
+        doc_ids = set(doc_ids)
+        remaining = [doc for doc in self.corpus if doc["id"] not in doc_ids]
+        missing = len(doc_ids) - (len(self.corpus) - len(remaining))
+        if missing:
+            raise ValueError(f"{missing} of the document ids to delete are not in the index")
+        self.index(remaining)
+        return len(doc_ids)
+
     @abstractmethod
     def retrieve(self, query: str, k: int) -> List[Dict[str, Any]]:
         """
@@ -34,7 +79,18 @@ class BaseRetriever(ABC):
         - 'id': The unique identifier of the document.
         - 'text': The text of the document.
         - 'score': The score assigned to the document by the retriever.
+        Built-in retrievers return a utils.ranked_list.RankedList, which stores corpus positions
+        and scores as arrays and reads like this list of dicts.
         """
 
         pass
 
+    def retrieve_batch(self, queries: List[str], k: int) -> List[List[Dict[str, Any]]]:
+        """
+        Retrieve the top k documents for each query in a batch.
+        Returns one result list per query, in the same order and format as retrieve().
+        The default implementation loops over retrieve(); retrievers that can vectorize
+        scoring across queries should override it.
+        """
+
+        return [self.retrieve(query, k) for query in queries]
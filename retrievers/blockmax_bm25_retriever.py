@@ -0,0 +1,266 @@
+import logging
+from collections import deque
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from retrievers.fast_bm25_retriever import FastBM25Retriever, select_top_k, accumulate_scores, _partial_sort
+from utils.ranked_list import RankedList
+from utils.tokenizer import Analyzer
+
+logger = logging.getLogger(__name__)
+
+PRUNING_MODES = ("pruned", "exhaustive")
+
+# Most recent per-query stats kept in `query_stats`
+MAX_QUERY_STATS = 100_000
+
+
+class BlockMaxBM25Retriever(FastBM25Retriever):
+    """
+    BM25 retriever with Block-Max MaxScore dynamic pruning.
+
+    The document id space is cut into fixed-size ranges ("blocks"). At index time every
+    term stores the maximum BM25 contribution it can make in each block it occurs in, plus
+    a global per-term maximum. At query time:
+    - blocks are visited in decreasing order of their upper bound (sum of block maxima), and
+      the traversal stops once no remaining block can beat the current k-th best score;
+    - inside a visited block, query terms whose cumulative term upper bound is below the
+      k-th best score are non-essential: documents that only contain those terms are never
+      scored, and their postings are only probed for documents found via essential terms.
+
+    Scores are exact, so results are identical to `FastBM25Retriever` / `BM25Retriever`.
+    Set `pruning_mode="exhaustive"` to disable pruning (useful as a baseline).
+    Per-query posting counts are kept in `last_query_stats` and appended to `query_stats`
+    (the last MAX_QUERY_STATS queries; callers reading it should clear() it afterwards).
+    """
+    index_arrays = FastBM25Retriever.index_arrays + (
+        "term_max", "block_offsets", "block_ids", "block_max", "block_starts", "block_ends"
+    )
+
+    def __init__(
+        self,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+        pruning_mode: str = "pruned",
+        block_size: int = 128,
+        blocks_per_step: int = 32,
+        analyzer: Optional[Analyzer] = None
+    ) -> None:
+        super().__init__(k1=k1, b=b, epsilon=epsilon, analyzer=analyzer)
+        if pruning_mode not in PRUNING_MODES:
+            raise ValueError(f"Unknown pruning mode: {pruning_mode}. Expected one of {PRUNING_MODES}")
+        self.pruning_mode = pruning_mode
+        self.block_size = block_size
+        self.blocks_per_step = blocks_per_step
+        self.term_max = None         # term id -> max contribution over its postings
+        self.block_offsets = None    # term id -> slice into the block arrays
+        self.block_ids = None        # doc range id of each term block
+        self.block_max = None        # max contribution inside each term block
+        self.block_starts = None     # posting offset where each term block starts
+        self.block_ends = None       # posting offset where each term block ends
+        self.last_query_stats = {}
+        self.query_stats = deque(maxlen=MAX_QUERY_STATS)
+
+    def cache_config(self) -> Dict[str, Any]:
+        return {**super().cache_config(), "block_size": self.block_size}
+
+    def _build(self, *args) -> None:
+        super()._build(*args)
+        self._build_block_max()
+
+    def _build_block_max(self) -> None:
+        """
+        Precompute per-term and per-(term, block) upper bounds over the postings arrays.
+        """
+        num_terms = len(self.offsets) - 1
+        dfs = np.diff(self.offsets)
+        posting_terms = np.repeat(np.arange(num_terms, dtype=np.int64), dfs)
+
+        # Postings are sorted by (term, doc), so (term, block) keys are non-decreasing
+        contributions = self.postings_weights
+        num_blocks = (len(self.doc_lens) + self.block_size - 1) // self.block_size
+        keys = posting_terms * num_blocks + self.postings_docs // self.block_size
+        starts = np.flatnonzero(np.diff(keys)) + 1
+        starts = np.concatenate([[0], starts]) if len(keys) else np.empty(0, dtype=np.int64)
+
+        self.block_starts = starts.astype(np.int64)
+        self.block_ends = np.append(self.block_starts[1:], len(keys)).astype(np.int64)
+        self.block_ids = (self.postings_docs[self.block_starts] // self.block_size).astype(np.int64)
+        self.block_max = (
+            np.maximum.reduceat(contributions, self.block_starts) if len(keys) else np.empty(0)
+        )
+        self.block_offsets = np.searchsorted(posting_terms[self.block_starts], np.arange(num_terms + 1))
+        self.term_max = np.full(num_terms, -np.inf)
+        np.maximum.at(self.term_max, posting_terms[self.block_starts], self.block_max)
+
+    def score(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        term_ids = self._query_term_ids(query)
+        doc_indices, scores = self._score_terms(term_ids)
+        num_postings = sum(self._posting_count(t) for t in term_ids)
+        self._record_stats(num_postings, num_postings, 0, 0)
+        return doc_indices, scores
+
+    def retrieve(self, query: str, k: int) -> RankedList:
+        if self.vocab is None:
+            raise ValueError("The index has not been built. Please call index() first.")
+
+        if self.pruning_mode == "exhaustive":
+            return super().retrieve(query, k)
+
+        top_docs, top_scores = self._retrieve_pruned(query, k)
+        return self._format_results(top_docs, top_scores)
+
+    def retrieve_batch(self, queries: List[str], k: int) -> List[RankedList]:
+        # Pruning is per query; the vectorized batch path is exhaustive
+        if self.pruning_mode == "pruned":
+            return [self.retrieve(query, k) for query in queries]
+        return super().retrieve_batch(queries, k)
+
+    def _posting_count(self, term_id: int) -> int:
+        return int(self.offsets[term_id + 1] - self.offsets[term_id])
+
+    def _record_stats(self, total: int, scored: int, blocks_total: int, blocks_skipped: int) -> None:
+        self.last_query_stats = {
+            "postings_total": total,
+            "postings_scored": scored,
+            "postings_skipped": total - scored,
+            "blocks_total": blocks_total,
+            "blocks_skipped": blocks_skipped,
+        }
+        self.query_stats.append(self.last_query_stats)
+        logger.debug(f"Block-max query stats: {self.last_query_stats}")
+
+    def _retrieve_pruned(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Block-Max MaxScore traversal. Returns (doc indices, scores) of the top-k documents.
+        """
+        num_docs = len(self.doc_lens)
+        term_ids = self._query_term_ids(query)
+        num_postings = sum(self._posting_count(t) for t in term_ids)
+        if not term_ids or k <= 0:
+            self._record_stats(num_postings, 0, 0, 0)
+            return select_top_k(np.empty(0, dtype=np.int64), np.empty(0), k, num_docs)
+
+        # Gather the blocks of every query term occurrence (in query order)
+        block_slices = [slice(self.block_offsets[t], self.block_offsets[t + 1]) for t in term_ids]
+        block_ids = np.concatenate([self.block_ids[s] for s in block_slices])
+        # Clip at zero so bounds stay valid when a floored idf makes contributions negative
+        block_bounds = np.maximum(np.concatenate([self.block_max[s] for s in block_slices]), 0)
+
+        # Upper bound per doc range, summed in query order like the exact scores
+        ranges, inverse = np.unique(block_ids, return_inverse=True)
+        range_bounds = np.bincount(inverse, weights=block_bounds, minlength=len(ranges))
+        order = np.lexsort((ranges, -range_bounds))
+        ranges, range_bounds = ranges[order], range_bounds[order]
+
+        # Term-level bounds for the MaxScore essential/non-essential split
+        term_bounds = np.maximum(self.term_max[term_ids], 0)
+        bound_order = np.argsort(term_bounds, kind="stable")
+        cumulative_bounds = np.cumsum(term_bounds[bound_order])
+
+        top_docs = np.empty(0, dtype=np.int64)
+        top_scores = np.empty(0)
+        threshold = -np.inf
+        scored = 0
+        visited = 0
+
+        while visited < len(ranges):
+            step_size = self.blocks_per_step
+            if len(top_docs) == k and threshold > 0:
+                # Ranges are sorted by bound, so only a prefix of the rest can still qualify;
+                # take a quarter of it per step to amortize Python overhead while the threshold rises
+                remaining = int(np.searchsorted(-range_bounds[visited:], -threshold, side="right"))
+                if remaining == 0:
+                    break
+                step_size = max(step_size, remaining // 4)
+            step = ranges[visited:visited + step_size]
+            visited += len(step)
+
+            # Occurrences whose bound (plus every smaller bound) cannot reach the threshold
+            # (with a small margin, since bounds and scores are summed in different orders)
+            essential = np.ones(len(term_ids), dtype=bool)
+            if len(top_docs) == k and threshold > 0:
+                essential[bound_order[cumulative_bounds * (1 + 1e-9) < threshold]] = False
+
+            docs, contributions, step_scored = self._score_ranges(term_ids, essential, step)
+            scored += step_scored
+            if len(docs) == 0:
+                continue
+
+            candidates = np.concatenate([top_docs, docs])
+            candidate_scores = np.concatenate([top_scores, contributions])
+            top_docs, top_scores = _partial_sort(candidates, candidate_scores, k)
+            if len(top_docs) == k:
+                threshold = top_scores[-1]
+
+        self._record_stats(num_postings, scored, len(ranges), len(ranges) - visited)
+
+        if len(top_docs) == k and top_scores[-1] > 0:
+            return top_docs, top_scores
+
+        # Fewer than k positive hits: nothing was pruned, resolve zero/negative padding exactly
+        doc_indices, scores = self._score_terms(term_ids)
+        return select_top_k(doc_indices, scores, k, num_docs)
+
+    def _score_ranges(
+        self,
+        term_ids: List[int],
+        essential: np.ndarray,
+        ranges: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Exactly score the documents in the given doc ranges that contain an essential term.
+
+        Returns:
+            Tuple of (unique doc indices, scores, number of postings scored).
+        """
+        slices = []
+        for term_id in term_ids:
+            lo, hi = self.block_offsets[term_id], self.block_offsets[term_id + 1]
+            term_blocks = self.block_ids[lo:hi]
+            positions = np.searchsorted(term_blocks, ranges)
+            found = positions < len(term_blocks)
+            found[found] = term_blocks[positions[found]] == ranges[found]
+            blocks = lo + positions[found]
+            slices.append(_expand_slices(self.block_starts[blocks], self.block_ends[blocks]))
+
+        # Sorted documents of the step that contain an essential term (bounded by the step size,
+        # not the corpus)
+        candidates = None
+        if not essential.all():
+            essential_docs = [self.postings_docs[positions] for positions, is_essential in zip(slices, essential)
+                              if is_essential]
+            candidates = np.unique(np.concatenate(essential_docs)) if essential_docs else np.empty(0, dtype=np.int32)
+
+        docs, contributions = [], []
+        scored = 0
+        for positions, is_essential in zip(slices, essential):
+            term_docs = self.postings_docs[positions]
+            if not is_essential:
+                # Non-essential postings are only probed for documents found via essential terms
+                found = np.searchsorted(candidates, term_docs)
+                hit = found < len(candidates)
+                hit[hit] = candidates[found[hit]] == term_docs[hit]
+                positions, term_docs = positions[hit], term_docs[hit]
+            docs.append(term_docs)
+            contributions.append(self.postings_weights[positions])
+            scored += len(positions)
+
+        unique_docs, scores = accumulate_scores(
+            np.concatenate(docs), np.concatenate(contributions), len(self.doc_lens)
+        )
+        return unique_docs, scores, scored
+
+
+def _expand_slices(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Concatenate the integer ranges [starts[i], ends[i]) into one index array.
+    """
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return np.arange(total, dtype=np.int64) + offsets
@@ -1,27 +1,31 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Optional
 from rank_bm25 import BM25Okapi
 from retrievers.base_retriever import BaseRetriever
-from utils.tokenizer import simple_tokenize
+from utils import instrumentation
+from utils.tokenizer import Analyzer
+from utils.ranked_list import RankedList
 
 class BM25Retriever(BaseRetriever):
     """
     BM25 retriever for document retrieval.
     """
-    def __init__(self) -> None:
+    def __init__(self, analyzer: Optional[Analyzer] = None) -> None:
+        self.analyzer = analyzer or Analyzer()
         self.bm25 = None
         self.corpus = None
 
     def index(self, corpus: List[Dict[str, str]]) -> None:
-        tokenized_corpus = [simple_tokenize(doc['text']) for doc in corpus]
+        tokenized_corpus = [self.analyzer.analyze(doc['text']) for doc in corpus]
         self.bm25 = BM25Okapi(tokenized_corpus)
         self.corpus = corpus
 
-    def retrieve(self, query: str, k: int) -> List[Dict[str, Any]]:
+    def retrieve(self, query: str, k: int) -> RankedList:
         if self.bm25 is None:
             raise ValueError("The index has not been built. Please call index() first.")
         
         # Tokenize the query
-        tokenized_query = simple_tokenize(query)
+        with instrumentation.span("tokenize"):
+            tokenized_query = self.analyzer.analyze(query)
         
         # Get BM25 scores for all documents
         scores = self.bm25.get_scores(tokenized_query)
@@ -32,14 +36,5 @@ class BM25Retriever(BaseRetriever):
         # Retrieve the top-k documents
         top_k = ranked_indices[:k]
         
-        # Prepare the result as a list of dictionaries with document id, text and score
-        results = [
-            {
-                "id": self.corpus[idx]["id"],
-                "text":self.corpus[idx]["text"],
-                "score": scores[idx]
-            } 
-            for idx in top_k
-        ]
-        
-        return results
\ No newline at end of file
+        # Keep only corpus positions and scores; ids and texts are resolved when read
+        return RankedList(top_k, scores[top_k], self.corpus)
@@ -1 +1,226 @@
-#dense retriever logic
\ No newline at end of file
+#dense retriever logic
+import os
+import shutil
+import tempfile
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from retrievers.ann_index import IVFPQIndex
+from retrievers.base_retriever import BaseRetriever
+from utils import instrumentation
+from utils.base_embedder import BaseEmbedder, load_embedder
+from utils.data_loader import DEFAULT_CHUNK_SIZE, iter_chunks
+from utils.ranked_list import RankedList
+
+ANN_TYPES = ("ivfpq",)
+
+STORAGE_DTYPES = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+
+
+class DenseRetriever(BaseRetriever):
+    """
+    Dense (bi-encoder) retriever with exact inner-product search.
+
+    Corpus embeddings are computed on CPU in length-sorted batches, one chunk of passages at a
+    time, and written straight to an on-disk matrix stored as float16 or int8 (symmetric per-row scale), which is memory-mapped
+    at query time. Search walks the matrix in fixed-size row blocks and keeps a running top-k
+    per query, so memory stays bounded by `block_size` regardless of corpus size.
+
+    With `ann="ivfpq"`, an `IVFPQIndex` is built over the stored vectors and used for search
+    instead; `exact_search` stays available as the reference for recall measurements.
+
+    Args:
+        embedder: Embedder instance. If None, `model_name` is loaded with `load_embedder`.
+        model_name: Embedder name used when no embedder is given ("hashing" needs no download).
+        storage: On-disk vector type, one of "float32", "float16" or "int8".
+        block_size: Corpus rows scored per matrix multiply.
+        batch_size: Texts per embedding batch.
+        query_batch_size: Queries searched together per pass over the corpus.
+        ann: Approximate index type (None for exact search, or "ivfpq").
+        nlist, nprobe, pq_m, refine_factor: IVF-PQ build and search parameters (see IVFPQIndex).
+    """
+    def __init__(
+        self,
+        embedder: Optional[BaseEmbedder] = None,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        storage: str = "float16",
+        block_size: int = 65536,
+        batch_size: int = 32,
+        query_batch_size: int = 256,
+        ann: Optional[str] = None,
+        nlist: int = 1024,
+        nprobe: int = 16,
+        pq_m: int = 16,
+        refine_factor: int = 4
+    ) -> None:
+        if storage not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown storage type: {storage}. Expected one of {list(STORAGE_DTYPES)}")
+        if ann is not None and ann not in ANN_TYPES:
+            raise ValueError(f"Unknown ANN index type: {ann}. Expected one of {ANN_TYPES}")
+        self.embedder = embedder
+        self.model_name = model_name
+        self.storage = storage
+        self.block_size = block_size
+        self.batch_size = batch_size
+        self.query_batch_size = query_batch_size
+        self.corpus = None
+        self.embeddings = None   # (num_docs, dim) memmap in the storage dtype
+        self.scales = None       # per-row dequantization scales (all ones unless int8)
+        self._work_dir = None
+        self.ann_index = None
+        if ann == "ivfpq":
+            self.ann_index = IVFPQIndex(nlist=nlist, m=pq_m, nprobe=nprobe, refine_factor=refine_factor)
+
+    def _get_embedder(self) -> BaseEmbedder:
+        if self.embedder is None:
+            self.embedder = load_embedder(self.model_name)
+        return self.embedder
+
+    def index(self, corpus: List[Dict[str, str]]) -> None:
+        # Embeddings live in a private temporary directory until save_index() copies them
+        self._work_dir = tempfile.TemporaryDirectory(prefix="rag-bench-dense-")
+        self._write_embeddings(self._work_dir.name, corpus)
+        self._open(self._work_dir.name)
+        if self.ann_index is not None:
+            self.ann_index.build(self.embeddings, self._scales_or_none(), self.block_size)
+        self.corpus = corpus
+
+    def _write_embeddings(self, path: str, corpus: List[Dict[str, str]]) -> None:
+        embedder = self._get_embedder()
+        num_docs = len(corpus)
+        embeddings = np.lib.format.open_memmap(
+            os.path.join(path, "embeddings.npy"),
+            mode="w+",
+            dtype=STORAGE_DTYPES[self.storage],
+            shape=(num_docs, embedder.dim)
+        )
+        scales = np.ones(num_docs, dtype=np.float32)
+
+        # Only one chunk of passages is held at a time (a DocStore corpus stays on disk);
+        # batches are length-sorted within the chunk
+        offset = 0
+        for chunk in iter_chunks(corpus, DEFAULT_CHUNK_SIZE):
+            texts = [doc["text"] for doc in chunk]
+            for positions, batch in embedder.iter_batches(texts, self.batch_size):
+                positions = positions + offset
+                if self.storage == "int8":
+                    batch_scales = np.maximum(np.abs(batch).max(axis=1), 1e-12) / 127.0
+                    embeddings[positions] = np.round(batch / batch_scales[:, None]).astype(np.int8)
+                    scales[positions] = batch_scales
+                else:
+                    embeddings[positions] = batch
+            offset += len(texts)
+        if offset != num_docs:
+            raise ValueError(f"Embedded {offset} documents but the corpus has {num_docs}")
+
+        embeddings.flush()
+        del embeddings
+        np.save(os.path.join(path, "scales.npy"), scales)
+
+    def _open(self, path: str) -> None:
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        self.scales = np.load(os.path.join(path, "scales.npy"), mmap_mode="r")
+
+    def _scales_or_none(self) -> Optional[np.ndarray]:
+        return self.scales if self.storage == "int8" else None
+
+    def cache_config(self) -> Dict[str, Any]:
+        config = {"embedder": self._get_embedder().config(), "storage": self.storage}
+        if self.ann_index is not None:
+            config["ann"] = self.ann_index.build_config()
+        return config
+
+    def save_index(self, path: str) -> None:
+        if self.embeddings is None:
+            raise ValueError("The index has not been built. Please call index() first.")
+        for name in ("embeddings.npy", "scales.npy"):
+            shutil.copyfile(os.path.join(self._work_dir.name, name), os.path.join(path, name))
+        if self.ann_index is not None:
+            self.ann_index.save(path)
+
+    def load_index(self, path: str, corpus: List[Dict[str, str]]) -> None:
+        self._open(path)
+        if len(self.embeddings) != len(corpus):
+            raise ValueError(f"Index at {path} has {len(self.embeddings)} vectors, corpus has {len(corpus)}")
+        if self.ann_index is not None:
+            self.ann_index.load(path)
+        self.corpus = corpus
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        return self._get_embedder().encode(queries, self.batch_size)
+
+    def retrieve(self, query: str, k: int) -> RankedList:
+        return self.retrieve_batch([query], k)[0]
+
+    def retrieve_batch(self, queries: List[str], k: int) -> List[RankedList]:
+        if self.embeddings is None:
+            raise ValueError("The index has not been built. Please call index() first.")
+
+        with instrumentation.span("encode"):
+            query_vectors = self.embed_queries(queries)
+        results = []
+        for start in range(0, len(queries), self.query_batch_size):
+            top_ids, top_scores = self.search(query_vectors[start:start + self.query_batch_size], k)
+            for ids, scores in zip(top_ids, top_scores):
+                results.append(RankedList(ids, scores, self.corpus))
+        return results
+
+    def search(self, query_vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k search with the ANN index if one is configured, exact search otherwise.
+        Returns per-query (doc indices, scores) rows sorted by descending score.
+        """
+        if self.ann_index is not None:
+            return self.ann_index.search(query_vectors, k, self.embeddings, self._scales_or_none())
+        return self.exact_search(query_vectors, k)
+
+    def exact_search(self, query_vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact blocked inner-product search.
+
+        Args:
+            query_vectors: float32 array of shape (num_queries, dim).
+            k: Number of results per query.
+
+        Returns:
+            Tuple of (doc indices, scores), each of shape (num_queries, min(k, num_docs)),
+            sorted by descending score (ties by ascending doc index).
+        """
+        num_queries = len(query_vectors)
+        k = min(k, len(self.embeddings))
+        best_ids = np.empty((num_queries, 0), dtype=np.int64)
+        best_scores = np.empty((num_queries, 0), dtype=np.float32)
+        if k <= 0:
+            return best_ids, best_scores
+
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        for start in range(0, len(self.embeddings), self.block_size):
+            block = np.asarray(self.embeddings[start:start + self.block_size], dtype=np.float32)
+            scores = query_vectors @ block.T
+            if self.storage == "int8":
+                scores *= self.scales[start:start + len(block)]
+            ids = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+
+            best_ids, best_scores = _keep_top_k(
+                np.concatenate([best_ids, ids], axis=1),
+                np.concatenate([best_scores, scores], axis=1),
+                k
+            )
+
+        order = np.lexsort((best_ids, -best_scores))
+        return np.take_along_axis(best_ids, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+
+def _keep_top_k(ids: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise: keep the k highest-scoring columns (unordered).
+    """
+    if scores.shape[1] <= k:
+        return ids, scores
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(ids, part, axis=1), np.take_along_axis(scores, part, axis=1)
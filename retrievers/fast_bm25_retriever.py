@@ -0,0 +1,410 @@
+import json
+import math
+import os
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from retrievers.base_retriever import BaseRetriever
+from utils.ranked_list import RankedList
+from utils.string_table import SortedStringIndex, write_string_table
+from utils import instrumentation
+from utils.data_loader import iter_chunks
+from utils.tokenizer import Analyzer, Vocabulary
+
+
+def select_top_k(
+    doc_indices: np.ndarray,
+    scores: np.ndarray,
+    k: int,
+    num_docs: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pick the top-k documents from a sparse set of scored candidates.
+
+    Documents that are not in `doc_indices` implicitly score 0. The ordering matches
+    a full stable descending sort over all `num_docs` scores, i.e. ties are broken by
+    ascending document index, so results line up with `BM25Retriever`.
+
+    Args:
+        doc_indices: Unique document indices that received a score.
+        scores: Scores aligned with `doc_indices`.
+        k: Number of documents to return.
+        num_docs: Total number of documents in the index.
+
+    Returns:
+        Tuple of (document indices, scores) of length min(k, num_docs).
+    """
+    k = min(k, num_docs)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    doc_indices = np.asarray(doc_indices, dtype=np.int64)
+    scores = np.asarray(scores, dtype=np.float64)
+
+    positive = scores > 0
+    top_docs, top_scores = _partial_sort(doc_indices[positive], scores[positive], k)
+    need = k - len(top_docs)
+    if need == 0:
+        return top_docs, top_scores
+
+    # Not enough positive hits: pad with zero-score documents in index order,
+    # then with negative-score candidates (possible when the idf floor is negative)
+    nonzero = np.sort(doc_indices[scores != 0])
+    window = np.arange(min(num_docs, need + len(nonzero)), dtype=np.int64)
+    zero_docs = np.setdiff1d(window, nonzero, assume_unique=True)[:need]
+
+    negative = scores < 0
+    neg_docs, neg_scores = _partial_sort(doc_indices[negative], scores[negative], need - len(zero_docs))
+
+    return (
+        np.concatenate([top_docs, zero_docs, neg_docs]),
+        np.concatenate([top_scores, np.zeros(len(zero_docs)), neg_scores])
+    )
+
+
+def accumulate_scores(
+    doc_indices: np.ndarray,
+    contributions: np.ndarray,
+    num_docs: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum per-posting contributions into per-document scores.
+
+    Contributions are added in input order (term by term), which keeps results bit-identical
+    to rank_bm25. Small posting sets are merged with a sort; once they cover a sizeable share
+    of the corpus a dense bincount accumulator is cheaper.
+
+    Returns:
+        Tuple of (unique doc indices in ascending order, scores).
+    """
+    if len(doc_indices) * 8 < num_docs:
+        unique_docs, inverse = np.unique(doc_indices, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions, minlength=len(unique_docs))
+        return unique_docs.astype(np.int64), scores
+
+    touched = np.zeros(num_docs, dtype=bool)
+    touched[doc_indices] = True
+    unique_docs = np.flatnonzero(touched)
+    scores = np.bincount(doc_indices, weights=contributions, minlength=num_docs)
+    return unique_docs, scores[unique_docs]
+
+
+def chunk_postings(term_ids: np.ndarray, doc_lens: np.ndarray, first_doc: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Turn the flat int32 term ids of consecutive documents into postings.
+
+    Args:
+        term_ids: Term ids of all documents, concatenated in document order.
+        doc_lens: Number of term ids of each document.
+        first_doc: Index of the first document.
+
+    Returns:
+        (term ids, doc indices, term frequencies) of every distinct (term, document) pair as
+        int32 arrays, sorted by term and then document.
+    """
+    docs = np.repeat(np.arange(first_doc, first_doc + len(doc_lens), dtype=np.int64), doc_lens)
+    keys, tfs = np.unique((term_ids.astype(np.int64) << 32) | docs, return_counts=True)
+    return (keys >> 32).astype(np.int32), (keys & 0xFFFFFFFF).astype(np.int32), tfs.astype(np.int32)
+
+
+def _partial_sort(doc_indices: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the k best (doc, score) pairs sorted by descending score, then ascending doc index.
+    Uses argpartition so only the selected candidates are fully sorted.
+    """
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    if len(scores) > k:
+        # k-th largest score; everything strictly above it is in, ties are resolved by doc index
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)
+        ties = ties[np.argsort(doc_indices[ties], kind="stable")][:k - len(above)]
+        keep = np.concatenate([above, ties])
+        doc_indices, scores = doc_indices[keep], scores[keep]
+
+    order = np.lexsort((doc_indices, -scores))
+    return doc_indices[order], scores[order]
+
+
+class FastBM25Retriever(BaseRetriever):
+    """
+    BM25 retriever backed by a NumPy inverted index.
+
+    Postings are stored per term as flat (doc index, term frequency) arrays, so a query only
+    touches documents that contain at least one query term. Top-k selection uses argpartition
+    instead of sorting the whole corpus. Scoring follows `rank_bm25.BM25Okapi` (same idf floor
+    and parameters), so rankings are identical to `BM25Retriever`.
+
+    `retrieve_batch` scores a whole batch of queries with one sparse (query x term) @ (term x doc)
+    matrix product followed by a row-wise top-k.
+
+    Text goes through an Analyzer (default: simple_tokenize-equivalent) and is interned into
+    int32 term ids; postings are built from those arrays chunk by chunk, without per-term
+    Python lists. The analyzer configuration is part of cache_config() and of the saved index.
+
+    The index can be persisted with `save_index` as flat .npy / binary files and reopened with
+    `load_index`, which memory-maps every array (see `retrievers.index_cache`), so processes
+    loading the same index share its pages instead of each holding a copy.
+    """
+    # Arrays written by save_index() and memory-mapped by load_index()
+    index_arrays = ("offsets", "postings_docs", "postings_tfs", "postings_weights", "doc_lens", "idf")
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25, analyzer: Optional[Analyzer] = None) -> None:
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.analyzer = analyzer or Analyzer()
+        self.corpus = None
+        self.vocabulary = None       # interned terms
+        self.vocab = None            # term -> term id (the vocabulary's mapping)
+        self.idf = None              # term id -> idf
+        self.offsets = None          # term id -> slice start/end into postings arrays
+        self.postings_docs = None    # concatenated doc indices, sorted within each term
+        self.postings_tfs = None     # term frequencies aligned with postings_docs
+        self.postings_weights = None # BM25 contribution of each posting
+        self.doc_lens = None
+        self.avgdl = 0.0
+        self.doc_norms = None        # k1 * (1 - b + b * dl / avgdl) per document
+        self._term_doc_matrix = None
+
+    def index(self, corpus: List[Dict[str, str]]) -> None:
+        self.index_chunks(iter_chunks(corpus), corpus)
+
+    def index_chunks(self, chunks: Iterable[List[Dict[str, str]]], corpus: Optional[List[Dict[str, str]]] = None) -> None:
+        """
+        Build the index one chunk at a time. Each chunk is analyzed into int32 term ids and
+        reduced to (term, doc, tf) postings arrays, so with a `corpus` such as a DocStore no raw
+        text outlives its chunk.
+        """
+        vocabulary = Vocabulary()
+        parts: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        doc_lens: List[np.ndarray] = []
+        num_docs = 0
+        collected: List[Dict[str, str]] = []
+
+        for chunk in chunks:
+            if corpus is None:
+                collected.extend(chunk)
+            term_ids, lengths = vocabulary.encode_texts((doc["text"] for doc in chunk), self.analyzer)
+            parts.append(chunk_postings(term_ids, lengths, num_docs))
+            doc_lens.append(lengths)
+            num_docs += len(lengths)
+
+        corpus = collected if corpus is None else corpus
+        if len(corpus) != num_docs:
+            raise ValueError(f"Indexed {num_docs} documents but the corpus has {len(corpus)}")
+
+        # Chunks are in document order, so a stable sort by term keeps each posting list sorted by doc
+        terms = np.concatenate([p[0] for p in parts]) if parts else np.empty(0, dtype=np.int32)
+        dfs = np.bincount(terms, minlength=len(vocabulary)).astype(np.int64)
+        order = np.argsort(terms, kind="stable")
+        del terms
+        postings_docs = np.concatenate([p[1] for p in parts])[order] if parts else np.empty(0, dtype=np.int32)
+        postings_tfs = np.concatenate([p[2] for p in parts])[order] if parts else np.empty(0, dtype=np.int32)
+        del parts, order
+        self._build(vocabulary, dfs, postings_docs, postings_tfs,
+                    np.concatenate(doc_lens) if doc_lens else np.empty(0, dtype=np.int64))
+        self.corpus = corpus
+
+    def _build(
+        self,
+        vocabulary: Vocabulary,
+        dfs: np.ndarray,
+        postings_docs: np.ndarray,
+        postings_tfs: np.ndarray,
+        doc_lens: np.ndarray
+    ) -> None:
+        """
+        Store postings as CSR-style arrays and precompute idf and length norms. Postings are
+        grouped by term id and sorted by doc within a term; term ids must be assigned in order
+        of first appearance in the corpus.
+        """
+        self.offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(dfs, out=self.offsets[1:])
+        self.postings_docs = postings_docs
+        self.postings_tfs = postings_tfs
+        self.vocabulary = vocabulary
+        self.vocab = vocabulary.term_ids
+        self.doc_lens = doc_lens
+        self.idf = self._compute_idf(dfs, len(doc_lens))
+        self._compute_doc_norms()
+
+        # Contributions do not depend on the query, so compute them once per posting:
+        # idf * tf * (k1 + 1) / (tf + norm), in place to keep the build peak low
+        weights = self.doc_norms[self.postings_docs]
+        weights += self.postings_tfs
+        np.divide(self.postings_tfs * (self.k1 + 1), weights, out=weights)
+        weights *= np.repeat(self.idf, dfs)
+        self.postings_weights = weights
+
+    def _compute_doc_norms(self) -> None:
+        self.avgdl = int(self.doc_lens.sum()) / len(self.doc_lens)
+        self.doc_norms = self.k1 * (1 - self.b + self.b * self.doc_lens / self.avgdl)
+        self._term_doc_matrix = None
+
+    def cache_config(self) -> Dict[str, Any]:
+        """
+        Everything besides the corpus that determines the index contents.
+        """
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "tokenizer": self.tokenizer_config,
+        }
+
+    @property
+    def tokenizer_config(self) -> Dict[str, Any]:
+        return self.analyzer.config()
+
+    def save_index(self, path: str) -> None:
+        """
+        Write the index as flat arrays: postings and per-document arrays as .npy files, the
+        vocabulary as a sorted string table and the doc-id table as a string table.
+        """
+        if self.vocab is None:
+            raise ValueError("The index has not been built. Please call index() first.")
+
+        for name in self.index_arrays:
+            np.save(os.path.join(path, f"{name}.npy"), np.asarray(getattr(self, name)))
+        SortedStringIndex.write(os.path.join(path, "vocab"), self.vocab)
+        write_string_table(os.path.join(path, "doc_ids"), (str(doc["id"]) for doc in self.corpus))
+        with open(os.path.join(path, "stats.json"), "w") as f:
+            json.dump({"num_docs": len(self.doc_lens), "num_terms": len(self.vocab),
+                       "analyzer": self.analyzer.config()}, f)
+
+    def load_index(self, path: str, corpus: List[Dict[str, str]]) -> None:
+        """
+        Memory-map an index written by save_index(). `corpus` supplies document texts and must
+        be the corpus the index was built from. Queries are analyzed with the analyzer the
+        index was built with.
+        """
+        with open(os.path.join(path, "stats.json"), "r") as f:
+            stats = json.load(f)
+        if stats["num_docs"] != len(corpus):
+            raise ValueError(f"Index at {path} has {stats['num_docs']} documents, corpus has {len(corpus)}")
+
+        for name in self.index_arrays:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+        self.vocabulary = Vocabulary(SortedStringIndex.load(os.path.join(path, "vocab")))
+        self.vocab = self.vocabulary.term_ids
+        if "analyzer" in stats:
+            self.analyzer = Analyzer.from_config(stats["analyzer"])
+        self.corpus = corpus
+        self._compute_doc_norms()
+
+    def _compute_idf(self, dfs: np.ndarray, num_docs: int) -> np.ndarray:
+        """
+        Okapi idf with a floor of epsilon * average idf for terms in more than half the documents.
+        Summed in term-id (first appearance) order to reproduce rank_bm25 bit for bit.
+        """
+        idf = np.empty(len(dfs), dtype=np.float64)
+        idf_sum = 0
+        for term_id, freq in enumerate(dfs.tolist()):
+            value = math.log(num_docs - freq + 0.5) - math.log(freq + 0.5)
+            idf[term_id] = value
+            idf_sum += value
+
+        if len(idf):
+            average_idf = idf_sum / len(idf)
+            idf[idf < 0] = self.epsilon * average_idf
+        return idf
+
+    def _query_term_ids(self, query: str) -> List[int]:
+        """
+        Map query tokens to term ids, keeping duplicates (each occurrence adds to the score)
+        and dropping out-of-vocabulary terms (they contribute nothing).
+        """
+        with instrumentation.span("tokenize"):
+            return self.vocabulary.lookup(self.analyzer.analyze(query))
+
+    def _term_contributions(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (doc indices, BM25 contributions) for a single term's posting list.
+        """
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.postings_docs[start:end], self.postings_weights[start:end]
+
+    def score(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every document containing at least one query term.
+
+        Returns:
+            Tuple of (unique doc indices, scores).
+        """
+        return self._score_terms(self._query_term_ids(query))
+
+    def _score_terms(self, term_ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        score() for an already analyzed query.
+        """
+        if not term_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        parts = [self._term_contributions(term_id) for term_id in term_ids]
+        docs = np.concatenate([p[0] for p in parts])
+        contributions = np.concatenate([p[1] for p in parts])
+
+        return accumulate_scores(docs, contributions, len(self.doc_lens))
+
+    def retrieve(self, query: str, k: int) -> RankedList:
+        if self.vocab is None:
+            raise ValueError("The index has not been built. Please call index() first.")
+
+        doc_indices, scores = self.score(query)
+        top_docs, top_scores = select_top_k(doc_indices, scores, k, len(self.doc_lens))
+        return self._format_results(top_docs, top_scores)
+
+    def retrieve_batch(self, queries: List[str], k: int) -> List[RankedList]:
+        if self.vocab is None:
+            raise ValueError("The index has not been built. Please call index() first.")
+
+        scores = self.score_batch(queries)
+        results = []
+        for row in range(len(queries)):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            top_docs, top_scores = select_top_k(
+                scores.indices[start:end], scores.data[start:end], k, len(self.doc_lens)
+            )
+            results.append(self._format_results(top_docs, top_scores))
+        return results
+
+    def score_batch(self, queries: List[str]) -> sparse.csr_matrix:
+        """
+        Score a batch of queries with a single sparse matrix product.
+
+        Returns:
+            CSR matrix of shape (len(queries), num_docs); row i holds the scores of every
+            document that contains at least one term of query i.
+        """
+        indptr = [0]
+        indices: List[int] = []
+        for query in queries:
+            indices.extend(self._query_term_ids(query))
+            indptr.append(len(indices))
+
+        # Repeated query terms stay as duplicate entries (not summed counts), so each row is
+        # accumulated term by term in query order, exactly like score()
+        query_matrix = sparse.csr_matrix(
+            (np.ones(len(indices)), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(len(queries), len(self.vocab))
+        )
+        return (query_matrix @ self._get_term_doc_matrix()).tocsr()
+
+    def _get_term_doc_matrix(self) -> sparse.csr_matrix:
+        """
+        Lazily wrap the postings arrays as a (term x doc) CSR matrix of BM25 contributions.
+        """
+        if self._term_doc_matrix is None:
+            self._term_doc_matrix = sparse.csr_matrix(
+                (self.postings_weights, self.postings_docs, self.offsets),
+                shape=(len(self.vocab), len(self.doc_lens))
+            )
+        return self._term_doc_matrix
+
+    def _format_results(self, top_docs: np.ndarray, top_scores: np.ndarray) -> RankedList:
+        return RankedList(top_docs, top_scores, self.corpus)
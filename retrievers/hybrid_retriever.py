@@ -0,0 +1,196 @@
+#hybrid first stage: sparse (BM25) and dense retrieval run concurrently, fused into one top-k
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from retrievers.base_retriever import BaseRetriever
+from retrievers.dense_retriever import DenseRetriever
+from retrievers.fast_bm25_retriever import FastBM25Retriever, accumulate_scores, _partial_sort
+from utils import instrumentation
+from utils.ranked_list import RankedList
+from utils.tokenizer import Analyzer
+
+FUSION_METHODS = ("rrf", "normalized")
+BRANCHES = ("sparse", "dense")
+
+
+def fuse_rankings(
+    rankings: List[RankedList],
+    k: int,
+    method: str = "rrf",
+    weights: Optional[List[float]] = None,
+    rrf_k: int = 60
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fuse ranked lists over the same corpus into one top-k.
+
+    "rrf" (reciprocal-rank fusion) scores a document sum(w / (rrf_k + rank)) over the lists it
+    appears in (rank starts at 1). "normalized" min-max scales each list's scores to [0, 1] and
+    sums the weighted values; a list whose scores are all equal gives every hit 1.
+
+    Lists are merged on their int32 doc indices: contributions of all lists are concatenated,
+    summed per document and the k best picked with argpartition (ties by ascending doc index),
+    so the merge is linear in the total number of candidates.
+
+    Returns:
+        Tuple of (doc indices, fused scores) sorted by descending score.
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method: {method}. Expected one of {FUSION_METHODS}")
+    weights = weights or [1.0] * len(rankings)
+
+    docs_parts, contribution_parts = [], []
+    for ranking, weight in zip(rankings, weights):
+        if not len(ranking):
+            continue
+        if method == "rrf":
+            contributions = weight / (rrf_k + np.arange(1, len(ranking) + 1, dtype=np.float64))
+        else:
+            scores = ranking.scores.astype(np.float64)
+            spread = scores.max() - scores.min()
+            contributions = weight * ((scores - scores.min()) / spread if spread > 0 else np.ones(len(scores)))
+        docs_parts.append(ranking.doc_indices.astype(np.int64))
+        contribution_parts.append(contributions)
+
+    if not docs_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    docs = np.concatenate(docs_parts)
+    doc_indices, scores = accumulate_scores(docs, np.concatenate(contribution_parts), int(docs.max()) + 1)
+    return _partial_sort(doc_indices, scores, min(k, len(doc_indices)))
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Sparse + dense first stage with rank fusion.
+
+    Both branches index the same corpus and are queried concurrently on a two-thread pool (their
+    NumPy / torch kernels release the GIL), so a query costs about as much as the slower branch.
+    Each branch returns `sparse_depth` / `dense_depth` candidates (default: k), which may be
+    lower than the final k; the lists are fused with fuse_rankings().
+
+    Args:
+        sparse: Sparse retriever (default FastBM25Retriever, which ranks exactly like BM25Retriever).
+        dense: Dense retriever (default DenseRetriever built from the dense options below).
+        fusion: "rrf" or "normalized".
+        rrf_k: Rank offset for reciprocal-rank fusion.
+        sparse_depth, dense_depth: Candidates requested from each branch (None: k).
+        sparse_weight, dense_weight: Per-branch fusion weights.
+        model_name, storage, batch_size, ann, nlist, nprobe, pq_m, refine_factor: DenseRetriever options.
+        analyzer: Analyzer of the default sparse branch.
+    """
+    def __init__(
+        self,
+        sparse: Optional[BaseRetriever] = None,
+        dense: Optional[BaseRetriever] = None,
+        fusion: str = "rrf",
+        rrf_k: int = 60,
+        sparse_depth: Optional[int] = None,
+        dense_depth: Optional[int] = None,
+        sparse_weight: float = 1.0,
+        dense_weight: float = 1.0,
+        model_name: Optional[str] = None,
+        storage: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        ann: Optional[str] = None,
+        nlist: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        pq_m: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        analyzer: Optional[Analyzer] = None
+    ) -> None:
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method: {fusion}. Expected one of {FUSION_METHODS}")
+        if dense is None:
+            dense_options = {
+                "model_name": model_name, "storage": storage, "batch_size": batch_size, "ann": ann,
+                "nlist": nlist, "nprobe": nprobe, "pq_m": pq_m, "refine_factor": refine_factor,
+            }
+            dense = DenseRetriever(**{name: value for name, value in dense_options.items() if value is not None})
+        self.branches = {"sparse": sparse or FastBM25Retriever(analyzer=analyzer), "dense": dense}
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.depths = {"sparse": sparse_depth, "dense": dense_depth}
+        self.weights = {"sparse": sparse_weight, "dense": dense_weight}
+        self.corpus = None
+        self.branch_seconds = {name: 0.0 for name in BRANCHES}
+        self._doc_index = None
+        self._executor = None
+        self._executor_pid = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Threads do not survive fork, so forked retrieval workers (--workers) start their own pool
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=len(BRANCHES), thread_name_prefix="hybrid")
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _run_branches(self, method: str, branch_args: Dict[str, tuple], timed: bool = False) -> Dict[str, Any]:
+        """
+        Call `method` on both branches concurrently and return their results by branch name.
+        """
+        # Branch threads report their spans (e.g. tokenize) to the caller's instrumentation scope
+        caller_scope = instrumentation.current_scope()
+
+        def call(name: str) -> Any:
+            start = time.perf_counter()
+            with instrumentation.use_scope(caller_scope):
+                result = getattr(self.branches[name], method)(*branch_args[name])
+            if timed:
+                self.branch_seconds[name] += time.perf_counter() - start
+            return result
+
+        executor = self._get_executor()
+        futures = {name: executor.submit(call, name) for name in BRANCHES}
+        return {name: future.result() for name, future in futures.items()}
+
+    def index(self, corpus: List[Dict[str, str]]) -> None:
+        self._run_branches("index", {name: (corpus,) for name in BRANCHES})
+        self.corpus = corpus
+        self._doc_index = None
+
+    def cache_config(self) -> Dict[str, Any]:
+        return {name: branch.cache_config() for name, branch in self.branches.items()}
+
+    def save_index(self, path: str) -> None:
+        for name, branch in self.branches.items():
+            os.makedirs(os.path.join(path, name), exist_ok=True)
+            branch.save_index(os.path.join(path, name))
+
+    def load_index(self, path: str, corpus: List[Dict[str, str]]) -> None:
+        for name, branch in self.branches.items():
+            branch.load_index(os.path.join(path, name), corpus)
+        self.corpus = corpus
+        self._doc_index = None
+
+    def retrieve(self, query: str, k: int) -> RankedList:
+        return self.retrieve_batch([query], k)[0]
+
+    def retrieve_batch(self, queries: List[str], k: int) -> List[RankedList]:
+        if self.corpus is None:
+            raise ValueError("The index has not been built. Please call index() first.")
+
+        results = self._run_branches(
+            "retrieve_batch", {name: (queries, self.depths[name] or k) for name in BRANCHES}, timed=True
+        )
+        weights = [self.weights[name] for name in BRANCHES]
+        fused = []
+        for rankings in zip(*(results[name] for name in BRANCHES)):
+            rankings = [self._as_ranked(ranking) for ranking in rankings]
+            doc_indices, scores = fuse_rankings(rankings, k, self.fusion, weights, self.rrf_k)
+            fused.append(RankedList(doc_indices, scores, self.corpus))
+        return fused
+
+    def _as_ranked(self, docs) -> RankedList:
+        """
+        Branches returning result dicts are mapped onto corpus positions by doc id.
+        """
+        if isinstance(docs, RankedList):
+            return docs
+        if self._doc_index is None:
+            self._doc_index = self.corpus.id_index if hasattr(self.corpus, "id_index") else {
+                doc["id"]: position for position, doc in enumerate(self.corpus)
+            }
+        return RankedList([self._doc_index[doc["id"]] for doc in docs], [doc["score"] for doc in docs], self.corpus)
@@ -0,0 +1,154 @@
+#on-disk index cache shared by retrievers that can persist their index
+import hashlib
+import json
+import logging
+import os
+import shutil
+from typing import List, Dict, Any, Optional
+
+from utils.data_loader import DEFAULT_CHUNK_SIZE, iter_chunks
+from utils.doc_store import source_info
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+META_FILE = "meta.json"
+# Corpus file identity (path, size, mtime) -> content hash, so unchanged files are not rehashed
+SOURCES_FILE = "corpus_sources.json"
+
+
+def corpus_fingerprint(corpus: List[Dict[str, str]]) -> str:
+    """
+    Content hash of a corpus (document order, ids and texts).
+    """
+    digest = hashlib.sha256()
+    for doc in corpus:
+        digest.update(str(doc["id"]).encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(doc["text"].encode("utf-8"))
+        digest.update(b"\x01")
+    return digest.hexdigest()
+
+
+def _source_key(corpus_path: str) -> str:
+    return json.dumps(source_info(corpus_path), sort_keys=True)
+
+
+def _read_sources(index_dir: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(index_dir, SOURCES_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _remember_source(index_dir: str, corpus_path: str, corpus_hash: str) -> None:
+    sources = _read_sources(index_dir)
+    key = _source_key(corpus_path)
+    if sources.get(key) == corpus_hash:
+        return
+    sources[key] = corpus_hash
+    tmp_path = os.path.join(index_dir, f"{SOURCES_FILE}.tmp-{os.getpid()}")
+    with open(tmp_path, "w") as f:
+        json.dump(sources, f, indent=2)
+    os.replace(tmp_path, os.path.join(index_dir, SOURCES_FILE))
+
+
+def known_corpus_hash(corpus, index_dir: str, corpus_path: Optional[str] = None) -> Optional[str]:
+    """
+    The corpus content hash if it is available without reading the corpus: recorded in a
+    DocStore when it was built, or remembered for an unchanged corpus file (same path, size
+    and mtime) by an earlier run. None if the full hash has to be computed.
+    """
+    fingerprint = getattr(corpus, "fingerprint", None)
+    if fingerprint:
+        return fingerprint
+    if corpus_path and os.path.exists(corpus_path):
+        return _read_sources(index_dir).get(_source_key(corpus_path))
+    return None
+
+
+def supports_index_cache(retriever) -> bool:
+    """
+    A retriever can be cached if it implements cache_config(), save_index() and load_index().
+    """
+    return all(hasattr(retriever, name) for name in ("cache_config", "save_index", "load_index"))
+
+
+def index_cache_path(retriever, corpus_hash: str, index_dir: str) -> str:
+    """
+    Directory holding the cached index for this retriever configuration and corpus.
+    """
+    config = json.dumps(retriever.cache_config(), sort_keys=True)
+    key = hashlib.sha256(f"{INDEX_FORMAT_VERSION}:{corpus_hash}:{config}".encode("utf-8")).hexdigest()
+    return os.path.join(index_dir, f"{type(retriever).__name__}-{key[:16]}")
+
+
+def load_or_build_index(
+    retriever,
+    corpus: List[Dict[str, str]],
+    index_dir: str,
+    rebuild: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    corpus_path: Optional[str] = None
+) -> bool:
+    """
+    Load the retriever's index from `index_dir` if a cache for this corpus and configuration
+    exists, otherwise build it with retriever.index_chunks() over `chunk_size`-document chunks
+    of the corpus and persist it.
+
+    Caches are keyed by the corpus content hash. It is taken from known_corpus_hash() when
+    possible (a DocStore, or `corpus_path` unchanged since an earlier run), so a cache hit does
+    not read the corpus; otherwise, and always with `rebuild`, the full hash is computed.
+
+    The cache is written to a temporary directory and renamed into place, so concurrent
+    runs and crashes never leave a half-written index behind.
+
+    Returns:
+        True if the index was loaded from the cache, False if it was (re)built.
+    """
+    corpus_hash = None if rebuild else known_corpus_hash(corpus, index_dir, corpus_path)
+    if corpus_hash is None:
+        corpus_hash = corpus_fingerprint(corpus)
+    if corpus_path and os.path.exists(corpus_path) and getattr(corpus, "fingerprint", None) is None:
+        os.makedirs(index_dir, exist_ok=True)
+        _remember_source(index_dir, corpus_path, corpus_hash)
+    path = index_cache_path(retriever, corpus_hash, index_dir)
+    meta_path = os.path.join(path, META_FILE)
+
+    if not rebuild and os.path.exists(meta_path):
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        if meta.get("corpus_hash") == corpus_hash and meta.get("config") == retriever.cache_config():
+            retriever.load_index(path, corpus)
+            logger.info(f"Loaded cached index from {path}")
+            return True
+        logger.warning(f"Cached index at {path} does not match the corpus or configuration, rebuilding")
+
+    retriever.index_chunks(iter_chunks(corpus, chunk_size), corpus)
+
+    os.makedirs(index_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    retriever.save_index(tmp_path)
+
+    meta: Dict[str, Any] = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "retriever": type(retriever).__name__,
+        "corpus_hash": corpus_hash,
+        "num_docs": len(corpus),
+        "config": retriever.cache_config(),
+    }
+    with open(os.path.join(tmp_path, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Another process published the same index first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    logger.info(f"Saved index to {path}")
+    return False
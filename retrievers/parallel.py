@@ -0,0 +1,102 @@
+#query-parallel retrieval over a process pool sharing one built index
+import logging
+import multiprocessing
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+from utils.ranked_list import RankedList
+
+logger = logging.getLogger(__name__)
+
+# Set in the parent before the pool forks; workers read it copy-on-write
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _doc_index() -> Any:
+    """
+    Worker: doc id -> corpus position, built on first use and kept for the worker's later chunks.
+    """
+    if "doc_index" not in _WORKER_STATE:
+        corpus = _WORKER_STATE["corpus"]
+        # Document stores already carry a doc id -> position index
+        _WORKER_STATE["doc_index"] = (corpus.id_index if hasattr(corpus, "id_index")
+                                      else {doc["id"]: i for i, doc in enumerate(corpus)})
+    return _WORKER_STATE["doc_index"]
+
+
+def _retrieve_chunk(bounds: Tuple[int, int]) -> Tuple[List[Tuple[np.ndarray, np.ndarray]], list]:
+    """
+    Worker: retrieve one chunk of queries and return compact (doc indices, scores) arrays.
+    Retrievers that return result dicts instead of RankedLists are mapped back via doc ids.
+    """
+    retriever = _WORKER_STATE["retriever"]
+    start, end = bounds
+
+    # The forked copy of the stats only needs to carry this chunk's entries back
+    query_stats = getattr(retriever, "query_stats", None)
+    if query_stats is not None:
+        query_stats.clear()
+
+    results = retriever.retrieve_batch(_WORKER_STATE["queries"][start:end], _WORKER_STATE["k"])
+    compact = [
+        (docs.doc_indices, docs.scores) if isinstance(docs, RankedList) else (
+            np.array([_doc_index()[doc["id"]] for doc in docs], dtype=np.int32),
+            np.array([doc["score"] for doc in docs], dtype=np.float32),
+        )
+        for docs in results
+    ]
+    new_stats = list(query_stats) if query_stats is not None else []
+    return compact, new_stats
+
+
+def retrieve_parallel(
+    retriever,
+    corpus: List[Dict[str, str]],
+    queries: List[str],
+    k: int,
+    num_workers: int,
+    chunk_size: int = 64
+) -> List[RankedList]:
+    """
+    Run retriever.retrieve_batch() for all queries on a pool of forked worker processes.
+
+    The retriever must already be indexed. Workers are forked after indexing, so they share its
+    arrays (NumPy buffers, memory-mapped cache files) copy-on-write instead of receiving copies.
+    Each worker gets chunks of `chunk_size` queries and sends back int32 doc indices and float32
+    scores only; the parent wraps them as RankedLists over its corpus. Chunks are collected in order,
+    so the output is identical to a serial retrieve_batch() run.
+
+    Falls back to serial retrieval when fork is unavailable or num_workers <= 1.
+    """
+    chunks = [(start, min(start + chunk_size, len(queries))) for start in range(0, len(queries), chunk_size)]
+    if num_workers <= 1 or len(chunks) <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        if num_workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+            logger.warning("Process start method 'fork' is unavailable, retrieving serially")
+        results = []
+        for start, end in chunks:
+            results.extend(retriever.retrieve_batch(queries[start:end], k))
+        return results
+
+    _WORKER_STATE.update({
+        "retriever": retriever,
+        # The doc id index is only needed for retrievers that do not return RankedLists
+        "corpus": corpus,
+        "queries": queries,
+        "k": k,
+    })
+    try:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(processes=min(num_workers, len(chunks))) as pool:
+            chunk_results = pool.map(_retrieve_chunk, chunks, chunksize=1)
+    finally:
+        _WORKER_STATE.clear()
+
+    query_stats = getattr(retriever, "query_stats", None)
+    results = []
+    for compact, stats in chunk_results:
+        if query_stats is not None:
+            query_stats.extend(stats)
+        for doc_indices, scores in compact:
+            results.append(RankedList(doc_indices, scores, corpus))
+    return results
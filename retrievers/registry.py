@@ -1,6 +1,13 @@
-from retrievers.bm25_retriever import BM25Retriever
+from utils.plugins import LazyRegistry
 
-RETRIEVER_REGISTRY = {
-    "bm25": BM25Retriever,
+# Name -> "module:class"; a retriever's module (and its dependencies) is imported only when it is selected.
+# Third-party retrievers register under the "rag_bench.retrievers" entry point group.
+RETRIEVER_REGISTRY = LazyRegistry("rag_bench.retrievers", {
+    "bm25": "retrievers.bm25_retriever:BM25Retriever",
+    "bm25_fast": "retrievers.fast_bm25_retriever:FastBM25Retriever",
+    "bm25_bmw": "retrievers.blockmax_bm25_retriever:BlockMaxBM25Retriever",
+    "bm25_segmented": "retrievers.segmented_bm25_retriever:SegmentedBM25Retriever",
+    "dense": "retrievers.dense_retriever:DenseRetriever",
+    "hybrid": "retrievers.hybrid_retriever:HybridRetriever",
     # Add more retrievers 
-}
+})
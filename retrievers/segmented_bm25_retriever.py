@@ -0,0 +1,486 @@
+#BM25 over immutable index segments: incremental adds, tombstone deletes, background merging
+import bisect
+import logging
+import math
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from retrievers.base_retriever import BaseRetriever
+from retrievers.fast_bm25_retriever import accumulate_scores, select_top_k
+from utils.ranked_list import RankedList
+from utils import instrumentation
+from utils.tokenizer import Analyzer, Vocabulary
+
+logger = logging.getLogger(__name__)
+
+# Posting keys are (document sequence number << _RANK_BITS) | rank of the term within the document
+_RANK_BITS = 20
+_NO_KEY = np.iinfo(np.int64).max
+
+
+class _Segment:
+    """
+    Immutable postings for a run of consecutive documents.
+
+    Term ids are global (shared vocabulary), sorted within the segment; postings are sorted by
+    (term, local doc). Every posting also carries a key made of the document's sequence number
+    (stable across merges) and the term's first-appearance rank in that document, which
+    orders terms the way a rebuilt index would have assigned them.
+    """
+    __slots__ = ("docs", "doc_lens", "terms", "offsets", "postings_docs", "postings_tfs", "postings_keys",
+                 "_posting_terms")
+
+    def __init__(self, docs, doc_lens, terms, offsets, postings_docs, postings_tfs, postings_keys) -> None:
+        self.docs = docs
+        self.doc_lens = doc_lens
+        self.terms = terms
+        self.offsets = offsets
+        self.postings_docs = postings_docs
+        self.postings_tfs = postings_tfs
+        self.postings_keys = postings_keys
+        self._posting_terms = None
+
+    def posting_terms(self) -> np.ndarray:
+        if self._posting_terms is None:
+            self._posting_terms = np.repeat(self.terms, np.diff(self.offsets))
+        return self._posting_terms
+
+    def term_slice(self, term_id: int) -> Optional[Tuple[int, int]]:
+        position = int(np.searchsorted(self.terms, term_id))
+        if position == len(self.terms) or self.terms[position] != term_id:
+            return None
+        return int(self.offsets[position]), int(self.offsets[position + 1])
+
+
+class SegmentedCorpus:
+    """
+    Read-only sequence of the live documents of a segment list, in index order.
+    Position i is the i-th document a full rebuild over the live corpus would hold.
+    """
+    def __init__(self, segments: List[_Segment], live_locals: List[np.ndarray]) -> None:
+        self._docs = [segment.docs for segment in segments]
+        self._live_locals = live_locals
+        self._bases = np.concatenate([[0], np.cumsum([len(local) for local in live_locals])]).astype(np.int64).tolist()
+
+    def __len__(self) -> int:
+        return self._bases[-1]
+
+    def __getitem__(self, idx: int) -> Dict[str, str]:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f"Document index {idx} out of range")
+        segment = bisect.bisect_right(self._bases, idx) - 1
+        return self._docs[segment][int(self._live_locals[segment][idx - self._bases[segment]])]
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for docs, live_locals in zip(self._docs, self._live_locals):
+            for local in live_locals.tolist():
+                yield docs[local]
+
+
+class _Snapshot:
+    """
+    Consistent read view for queries: segments, tombstones and the global statistics of one index version.
+    """
+    __slots__ = ("segments", "deleted", "live_ranks", "doc_norms", "idf", "num_docs", "corpus")
+
+    def __init__(self, segments, deleted, live_ranks, doc_norms, idf, num_docs, corpus) -> None:
+        self.segments = segments
+        self.deleted = deleted
+        self.live_ranks = live_ranks
+        self.doc_norms = doc_norms
+        self.idf = idf
+        self.num_docs = num_docs
+        self.corpus = corpus
+
+
+class SegmentedBM25Retriever(BaseRetriever):
+    """
+    BM25 retriever that supports incremental add_documents() / delete_documents().
+
+    The index is a list of immutable segments. Adding documents tokenizes only the new
+    documents into a new segment; deleting marks tombstones, so neither touches existing
+    postings. Global statistics (document frequencies, document count, average length and
+    the idf floor) are maintained incrementally and applied at query time, so scores and
+    rankings are identical to a FastBM25Retriever / BM25Retriever rebuilt over the live
+    documents in index order (surviving documents in their original order, additions
+    appended).
+
+    Small segments are merged in the background: whenever `merge_factor` adjacent segments
+    fall in the same size tier (powers of `merge_factor`) they are rewritten as one, and a
+    segment whose tombstoned share exceeds `max_deleted_ratio` is rewritten without its
+    deleted documents. Merges reuse the postings and never re-tokenize. Queries read an
+    immutable snapshot, so they never wait on updates or merges.
+
+    Args:
+        k1, b, epsilon: BM25 parameters, as in rank_bm25.BM25Okapi.
+        merge_factor: Number of same-tier adjacent segments merged at once.
+        max_deleted_ratio: Tombstoned share above which a segment is rewritten.
+        background_merge: Run merges on a background thread; if False they run inside the update call.
+        analyzer: Text analysis for documents and queries (default: equivalent to simple_tokenize).
+    """
+    def __init__(
+        self,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+        merge_factor: int = 4,
+        max_deleted_ratio: float = 0.3,
+        background_merge: bool = True,
+        analyzer: Optional[Analyzer] = None
+    ) -> None:
+        if merge_factor < 2:
+            raise ValueError(f"merge_factor must be at least 2, got {merge_factor}")
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.merge_factor = merge_factor
+        self.max_deleted_ratio = max_deleted_ratio
+        self.background_merge = background_merge
+        self.analyzer = analyzer or Analyzer()
+        self.corpus = None
+        self._lock = threading.RLock()
+        self._merge_executor = None
+        self._last_merge: Optional[Future] = None
+        self.num_merges = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self.vocabulary = Vocabulary()
+        self.vocab = self.vocabulary.term_ids
+        self._segments: List[_Segment] = []
+        self._deleted: List[np.ndarray] = []
+        self._locations: Dict[Any, Tuple[_Segment, int]] = {}   # doc id -> (segment, local doc)
+        self._df = np.zeros(0, dtype=np.int64)                    # live document frequency per term
+        self._first_key = np.zeros(0, dtype=np.int64)             # smallest live posting key per term
+        self._total_len = 0
+        self._num_docs = 0
+        self._next_seq = 0
+        self._snapshot: Optional[_Snapshot] = None
+
+    def index(self, corpus: List[Dict[str, str]]) -> None:
+        self.wait_for_merges()
+        with self._lock:
+            self._reset()
+            self.add_documents(corpus)
+
+    def add_documents(self, documents: Iterable[Dict[str, str]]) -> None:
+        """
+        Index new documents as a new segment, appended after all existing documents.
+        """
+        documents = list(documents)
+        with self._lock:
+            seen = set()
+            for doc in documents:
+                if doc["id"] in self._locations or doc["id"] in seen:
+                    raise ValueError(f"Duplicate document id: {doc['id']}")
+                seen.add(doc["id"])
+
+            segment = self._build_segment(documents)
+            if len(self._df) < len(self.vocab):
+                grow = len(self.vocab) - len(self._df)
+                self._df = np.concatenate([self._df, np.zeros(grow, dtype=np.int64)])
+                self._first_key = np.concatenate([self._first_key, np.full(grow, _NO_KEY, dtype=np.int64)])
+
+            if len(segment.terms):
+                self._df[segment.terms] += np.diff(segment.offsets)
+                first_keys = np.minimum.reduceat(segment.postings_keys, segment.offsets[:-1])
+                self._first_key[segment.terms] = np.minimum(self._first_key[segment.terms], first_keys)
+            self._total_len += int(segment.doc_lens.sum())
+            self._num_docs += len(documents)
+            for local, doc in enumerate(documents):
+                self._locations[doc["id"]] = (segment, local)
+
+            self._segments.append(segment)
+            self._deleted.append(np.zeros(len(documents), dtype=bool))
+            self._publish()
+        self._schedule_merge()
+
+    def delete_documents(self, doc_ids: Iterable[Any]) -> int:
+        """
+        Tombstone documents by id. Their postings stay in place until their segment is merged.
+
+        Returns:
+            Number of documents deleted.
+        """
+        doc_ids = list(dict.fromkeys(doc_ids))
+        with self._lock:
+            missing = [doc_id for doc_id in doc_ids if doc_id not in self._locations]
+            if missing:
+                raise ValueError(f"Unknown document ids: {missing[:10]}")
+
+            by_segment: Dict[int, List[int]] = {}
+            positions = {id(segment): i for i, segment in enumerate(self._segments)}
+            for doc_id in doc_ids:
+                segment, local = self._locations.pop(doc_id)
+                by_segment.setdefault(positions[id(segment)], []).append(local)
+
+            stale_terms = []
+            for position, locals_ in by_segment.items():
+                segment = self._segments[position]
+                removed = np.zeros(len(segment.docs), dtype=bool)
+                removed[locals_] = True
+                # Tombstone arrays are replaced, never modified, so snapshots stay consistent
+                self._deleted[position] = self._deleted[position] | removed
+
+                hit = removed[segment.postings_docs]
+                terms = segment.posting_terms()[hit]
+                np.subtract.at(self._df, terms, 1)
+                stale_terms.append(terms[segment.postings_keys[hit] == self._first_key[terms]])
+                self._total_len -= int(segment.doc_lens[removed].sum())
+                self._num_docs -= len(locals_)
+
+            if stale_terms:
+                self._refresh_first_keys(np.unique(np.concatenate(stale_terms)))
+            self._publish()
+        self._schedule_merge()
+        return len(doc_ids)
+
+    def _build_segment(self, documents: List[Dict[str, str]]) -> _Segment:
+        """
+        Tokenize documents into a segment, assigning global ids to new terms.
+        """
+        term_docs: Dict[int, List[int]] = {}
+        term_tfs: Dict[int, List[int]] = {}
+        term_keys: Dict[int, List[int]] = {}
+        doc_lens = np.zeros(len(documents), dtype=np.int64)
+
+        for local, doc in enumerate(documents):
+            doc_term_ids = self.vocabulary.intern(self.analyzer.analyze(doc["text"]))
+            doc_lens[local] = len(doc_term_ids)
+
+            frequencies: Dict[int, int] = {}
+            for term_id in doc_term_ids:
+                frequencies[term_id] = frequencies.get(term_id, 0) + 1
+
+            seq_key = (self._next_seq + local) << _RANK_BITS
+            for rank, (term_id, freq) in enumerate(frequencies.items()):
+                if term_id not in term_docs:
+                    term_docs[term_id], term_tfs[term_id], term_keys[term_id] = [], [], []
+                term_docs[term_id].append(local)
+                term_tfs[term_id].append(freq)
+                term_keys[term_id].append(seq_key | rank)
+        self._next_seq += len(documents)
+
+        terms = np.array(sorted(term_docs), dtype=np.int64)
+        dfs = np.array([len(term_docs[t]) for t in terms.tolist()], dtype=np.int64)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(dfs, out=offsets[1:])
+        count = int(offsets[-1])
+        ordered = terms.tolist()
+        return _Segment(
+            docs=documents,
+            doc_lens=doc_lens,
+            terms=terms,
+            offsets=offsets,
+            postings_docs=np.fromiter((d for t in ordered for d in term_docs[t]), dtype=np.int32, count=count),
+            postings_tfs=np.fromiter((f for t in ordered for f in term_tfs[t]), dtype=np.int32, count=count),
+            postings_keys=np.fromiter((key for t in ordered for key in term_keys[t]), dtype=np.int64, count=count),
+        )
+
+    def _refresh_first_keys(self, term_ids: np.ndarray) -> None:
+        """
+        Recompute the first live posting key of terms whose first occurrence was deleted.
+        """
+        for term_id in term_ids.tolist():
+            best = _NO_KEY
+            for segment, deleted in zip(self._segments, self._deleted):
+                bounds = segment.term_slice(term_id)
+                if bounds is None:
+                    continue
+                live = ~deleted[segment.postings_docs[bounds[0]:bounds[1]]]
+                if live.any():
+                    # Postings are in document order, so the first live one has the smallest key
+                    best = min(best, int(segment.postings_keys[bounds[0]:bounds[1]][live][0]))
+                    break
+            self._first_key[term_id] = best
+
+    def _compute_idf(self) -> np.ndarray:
+        """
+        Okapi idf over live terms with rank_bm25's floor (epsilon * average idf for negative idf).
+        The idf sum runs in the term order a rebuild would use (first live occurrence), so the
+        floor is bit-identical to a fresh index.
+        """
+        idf = np.zeros(len(self._df), dtype=np.float64)
+        live_terms = np.flatnonzero(self._df > 0)
+        if not len(live_terms):
+            return idf
+
+        unique_dfs, inverse = np.unique(self._df[live_terms], return_inverse=True)
+        values = np.array([math.log(self._num_docs - freq + 0.5) - math.log(freq + 0.5)
+                           for freq in unique_dfs.tolist()])[inverse]
+        idf[live_terms] = values
+        negative = values < 0
+        if negative.any():
+            order = np.argsort(self._first_key[live_terms], kind="stable")
+            average_idf = np.cumsum(values[order])[-1] / len(live_terms)
+            idf[live_terms[negative]] = self.epsilon * average_idf
+        return idf
+
+    def _publish(self) -> None:
+        """
+        Build a new query snapshot from the current segments and statistics. Caller holds the lock.
+        """
+        live_locals = [np.flatnonzero(~deleted) for deleted in self._deleted]
+        live_ranks, doc_norms = [], []
+        base = 0
+        avgdl = self._total_len / self._num_docs if self._num_docs else 1.0
+        for segment, deleted, local in zip(self._segments, self._deleted, live_locals):
+            live_ranks.append(base + np.cumsum(~deleted) - 1)
+            doc_norms.append(self.k1 * (1 - self.b + self.b * segment.doc_lens / avgdl))
+            base += len(local)
+
+        corpus = SegmentedCorpus(self._segments, live_locals)
+        self._snapshot = _Snapshot(list(self._segments), list(self._deleted), live_ranks, doc_norms,
+                                   self._compute_idf(), self._num_docs, corpus)
+        self.corpus = corpus
+
+    def _schedule_merge(self) -> None:
+        if not self.background_merge:
+            self._run_merges()
+            return
+        if self._merge_executor is None:
+            self._merge_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bm25-merge")
+        self._last_merge = self._merge_executor.submit(self._run_merges)
+
+    def wait_for_merges(self) -> None:
+        """
+        Block until all scheduled background merges have finished.
+        """
+        if self._last_merge is not None:
+            self._last_merge.result()
+
+    def _find_merge(self) -> Optional[Tuple[int, int]]:
+        """
+        Pick the next [start, end) range of segments to rewrite, or None.
+        """
+        sizes = [int((~deleted).sum()) for deleted in self._deleted]
+        tiers = [int(math.log(max(size, 1), self.merge_factor)) for size in sizes]
+        for start in range(len(tiers) - self.merge_factor + 1):
+            if len(set(tiers[start:start + self.merge_factor])) == 1:
+                return start, start + self.merge_factor
+        for position, deleted in enumerate(self._deleted):
+            if len(deleted) and deleted.mean() > self.max_deleted_ratio:
+                return position, position + 1
+        return None
+
+    def _run_merges(self) -> None:
+        while True:
+            with self._lock:
+                plan = self._find_merge()
+                if plan is None:
+                    return
+                sources = self._segments[plan[0]:plan[1]]
+                source_deleted = self._deleted[plan[0]:plan[1]]
+
+            merged, local_maps = _merge_segments(sources, source_deleted)
+
+            with self._lock:
+                start = next((i for i, segment in enumerate(self._segments) if segment is sources[0]), None)
+                if start is None or self._segments[start:start + len(sources)] != sources:
+                    continue
+                # Documents deleted while the merge ran are carried over as tombstones
+                deleted = np.zeros(len(merged.docs), dtype=bool)
+                for local_map, before, after in zip(local_maps, source_deleted, self._deleted[start:start + len(sources)]):
+                    newly = np.flatnonzero(after & ~before)
+                    deleted[local_map[newly]] = True
+                for local, doc in enumerate(merged.docs):
+                    if not deleted[local]:
+                        self._locations[doc["id"]] = (merged, local)
+
+                # Segments left with no documents are dropped
+                keep = len(merged.docs) > 0
+                self._segments[start:start + len(sources)] = [merged] if keep else []
+                self._deleted[start:start + len(sources)] = [deleted] if keep else []
+                self.num_merges += 1
+                self._publish()
+            logger.debug(f"Merged {len(sources)} segments into one of {len(merged.docs)} documents")
+
+    def score(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every live document containing at least one query term.
+
+        Returns:
+            Tuple of (unique live doc positions, scores), as FastBM25Retriever.score() on a rebuild.
+        """
+        snapshot = self._snapshot
+        docs_parts, contribution_parts = [], []
+        with instrumentation.span("tokenize"):
+            term_ids = self.vocabulary.lookup(self.analyzer.analyze(query))
+        for term_id in term_ids:
+            if term_id >= len(snapshot.idf):
+                continue
+            for segment, deleted, live_ranks, doc_norms in zip(
+                snapshot.segments, snapshot.deleted, snapshot.live_ranks, snapshot.doc_norms
+            ):
+                bounds = segment.term_slice(term_id)
+                if bounds is None:
+                    continue
+                docs = segment.postings_docs[bounds[0]:bounds[1]]
+                live = ~deleted[docs]
+                docs, tfs = docs[live], segment.postings_tfs[bounds[0]:bounds[1]][live]
+                docs_parts.append(live_ranks[docs])
+                contribution_parts.append(snapshot.idf[term_id] * (tfs * (self.k1 + 1) / (tfs + doc_norms[docs])))
+
+        if not docs_parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        return accumulate_scores(np.concatenate(docs_parts), np.concatenate(contribution_parts), snapshot.num_docs)
+
+    def retrieve(self, query: str, k: int) -> RankedList:
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise ValueError("The index has not been built. Please call index() first.")
+
+        doc_indices, scores = self.score(query)
+        top_docs, top_scores = select_top_k(doc_indices, scores, k, snapshot.num_docs)
+        return RankedList(top_docs, top_scores, snapshot.corpus)
+
+    @property
+    def num_segments(self) -> int:
+        return len(self._segments)
+
+
+def _merge_segments(segments: List[_Segment], deleted: List[np.ndarray]) -> Tuple[_Segment, List[np.ndarray]]:
+    """
+    Rewrite adjacent segments as one, dropping tombstoned documents.
+
+    Returns:
+        The merged segment and, per source, an array mapping old local doc -> merged local doc.
+    """
+    local_maps, docs, doc_lens = [], [], []
+    terms_parts, docs_parts, tfs_parts, keys_parts = [], [], [], []
+    base = 0
+    for segment, dead in zip(segments, deleted):
+        live = ~dead
+        local_map = np.full(len(segment.docs), -1, dtype=np.int64)
+        local_map[live] = base + np.arange(int(live.sum()))
+        local_maps.append(local_map)
+        docs.extend(doc for doc, keep in zip(segment.docs, live.tolist()) if keep)
+        doc_lens.append(segment.doc_lens[live])
+
+        keep = live[segment.postings_docs]
+        terms_parts.append(segment.posting_terms()[keep])
+        docs_parts.append(local_map[segment.postings_docs[keep]])
+        tfs_parts.append(segment.postings_tfs[keep])
+        keys_parts.append(segment.postings_keys[keep])
+        base += int(live.sum())
+
+    posting_terms = np.concatenate(terms_parts)
+    posting_docs = np.concatenate(docs_parts)
+    order = np.lexsort((posting_docs, posting_terms))
+    posting_terms = posting_terms[order]
+    terms = np.unique(posting_terms)
+    offsets = np.searchsorted(posting_terms, np.append(terms, np.iinfo(np.int64).max)).astype(np.int64)
+    return _Segment(
+        docs=docs,
+        doc_lens=np.concatenate(doc_lens),
+        terms=terms,
+        offsets=offsets,
+        postings_docs=posting_docs[order].astype(np.int32),
+        postings_tfs=np.concatenate(tfs_parts)[order],
+        postings_keys=np.concatenate(keys_parts)[order],
+    ), local_maps
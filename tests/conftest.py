@@ -0,0 +1,13 @@
+import pytest
+from benchmarks.synthetic import synthetic_corpus
+
+
+@pytest.fixture(scope="session")
+def zipf_docs():
+    """
+    Small seeded Zipf corpora from benchmarks.synthetic. Terms are benchmarks.synthetic.make_vocab()
+    ranks and ids run from "doc<id_offset>", so batches added later get their own seed and id range.
+    """
+    def make(num_docs, seed=0, id_offset=0, vocab_size=200, mean_length=15):
+        return synthetic_corpus(num_docs, seed, id_offset=id_offset, vocab_size=vocab_size, mean_length=mean_length)
+    return make
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from retrievers.ann_index import IVFPQIndex, kmeans
+from retrievers.dense_retriever import DenseRetriever
+from evaluation.ann_benchmark import run_ann_benchmark
+from utils.hashing_embedder import HashingEmbedder
+
+def clustered_vectors(num_vectors: int = 2000, dim: int = 32, num_clusters: int = 20, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(num_clusters, dim))
+    vectors = centers[rng.integers(num_clusters, size=num_vectors)] + 0.3 * rng.normal(size=(num_vectors, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+
+def recall(approx, exact) -> float:
+    return float(np.mean([len(set(a.tolist()) & set(e.tolist())) / len(e) for a, e in zip(approx, exact)]))
+
+def test_kmeans_recovers_separated_clusters():
+    points = np.concatenate([np.zeros((50, 2)), np.full((50, 2), 10.0)]).astype(np.float32)
+    centroids = kmeans(points, 2, seed=1)
+    assert sorted(centroids[:, 0].round().tolist()) == [0.0, 10.0]
+
+def test_ivfpq_recall_improves_with_nprobe():
+    vectors = clustered_vectors()
+    queries = vectors[:50] + 0.05
+    index = IVFPQIndex(nlist=16, m=8, refine_factor=0)
+    index.build(vectors)
+    exact = exact_top_k(vectors, queries, 10)
+
+    low = recall(index.search(queries, 10, nprobe=1)[0], exact)
+    high = recall(index.search(queries, 10, nprobe=16)[0], exact)
+    assert high >= low
+    assert high > 0.5, f"PQ recall too low with all cells probed: {high}"
+
+def test_ivfpq_refinement_with_all_cells_is_exact():
+    vectors = clustered_vectors()
+    queries = vectors[:20]
+    index = IVFPQIndex(nlist=16, m=8, refine_factor=50)
+    index.build(vectors)
+
+    ids, _ = index.search(queries, 5, vectors=vectors, nprobe=16)
+    assert recall(ids, exact_top_k(vectors, queries, 5)) == pytest.approx(1.0)
+
+def test_ivfpq_rejects_indivisible_dimension():
+    with pytest.raises(ValueError):
+        IVFPQIndex(m=5).build(clustered_vectors(dim=32))
+
+def test_dense_ann_benchmark_reports_recall_and_qps():
+    corpus = [{"id": f"d{i}", "text": f"topic{i % 7} word{i % 13} item{i}"} for i in range(300)]
+    retriever = DenseRetriever(embedder=HashingEmbedder(dim=32), storage="int8", ann="ivfpq", nlist=8, pq_m=4)
+    retriever.index(corpus)
+
+    assert len(retriever.retrieve("topic3 word5", 5)) == 5
+    rows = run_ann_benchmark(retriever, ["topic3 word5", "topic1", "item42"], 5, [1, 8])
+    assert [row["nprobe"] for row in rows] == [1, 8]
+    assert all(0.0 <= row["recall@5"] <= 1.0 and row["ann_qps"] > 0 for row in rows)
+    assert rows[-1]["recall@5"] >= rows[0]["recall@5"]
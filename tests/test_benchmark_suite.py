@@ -0,0 +1,73 @@
+import copy
+from collections import Counter
+from benchmarks.synthetic import iter_synthetic_documents, synthetic_corpus, synthetic_queries
+from benchmarks.suite import run_suite, compare_results, latency_stats
+from benchmarks.startup import measure_startup
+
+def test_synthetic_corpus_is_seeded_and_zipfian():
+    corpus = synthetic_corpus(2000, seed=3, vocab_size=5000, mean_length=40)
+    assert corpus == synthetic_corpus(2000, seed=3, vocab_size=5000, mean_length=40), "Same seed should give the same corpus"
+    assert corpus != synthetic_corpus(2000, seed=4, vocab_size=5000, mean_length=40)
+    assert corpus[:500] == list(iter_synthetic_documents(500, seed=3, vocab_size=5000, mean_length=40)), \
+        "A smaller corpus should be a prefix of a larger one"
+    assert len({doc["id"] for doc in corpus}) == 2000
+
+    counts = Counter(term for doc in corpus for term in doc["text"].split())
+    frequencies = [count for _, count in counts.most_common(10)]
+    assert 1.6 < frequencies[0] / frequencies[1] < 2.4, "Rank 1 should be about twice as frequent as rank 2"
+    lengths = sorted(len(doc["text"].split()) for doc in corpus)
+    assert 30 <= lengths[len(lengths) // 2] <= 50 and lengths[-1] > 2 * lengths[len(lengths) // 2], \
+        "Lengths should have median near mean_length and a long tail"
+
+    queries = synthetic_queries(50, seed=3, vocab_size=5000)
+    assert queries == synthetic_queries(50, seed=3, vocab_size=5000)
+    assert all(2 <= len(query["text"].split()) <= 6 for query in queries)
+    vocab = set(counts)
+    assert sum(term in vocab for query in queries for term in query["text"].split()) > 0
+
+def test_run_suite_reports_every_case():
+    report = run_suite(["bm25_fast", "bm25_segmented"], [], scales=[200, 400], num_queries=20, k=5,
+                       vocab_size=2000, mean_length=20, isolate=False)
+    rows = report["results"]
+    assert [(row["name"], row["num_docs"]) for row in rows] == [
+        ("bm25_fast", 200), ("bm25_segmented", 200), ("bm25_fast", 400), ("bm25_segmented", 400)
+    ]
+    for row in rows:
+        assert "error" not in row, row.get("error")
+        assert row["build_seconds"] > 0 and row["qps"] > 0 and row["batch_qps"] > 0 and row["peak_rss_mb"] > 0
+        assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+    assert rows[0]["index_bytes"] > 0, "Cacheable retrievers should report their on-disk index size"
+    assert rows[1]["index_bytes"] is None
+
+def test_unknown_component_is_reported_not_raised():
+    report = run_suite(["no_such_retriever"], [], scales=[50], num_queries=2, vocab_size=500, isolate=False)
+    assert "KeyError" in report["results"][0]["error"]
+
+def test_compare_results_flags_regressions():
+    baseline = {"config": {}, "results": [
+        {"kind": "retriever", "name": "bm25_fast", "num_docs": 1000, "build_seconds": 1.0, "index_bytes": 100,
+         "p50_ms": 1.0, "p95_ms": 2.0, "p99_ms": 3.0, "qps": 100.0, "batch_qps": 200.0, "peak_rss_mb": 50.0},
+    ]}
+    current = copy.deepcopy(baseline)
+    assert compare_results(current, baseline) == []
+
+    row = current["results"][0]
+    row.update({"p99_ms": 4.0, "qps": 70.0, "build_seconds": 0.5, "batch_qps": 190.0})
+    regressions = compare_results(current, baseline, tolerance=0.2)
+    assert {regression["metric"] for regression in regressions} == {"p99_ms", "qps"}, \
+        "Only slowdowns beyond the tolerance should be flagged"
+    current["results"].append({"kind": "retriever", "name": "dense", "num_docs": 1000, "error": "ImportError"})
+    assert len(compare_results(current, baseline, tolerance=0.2)) == 2
+
+def test_latency_stats():
+    stats = latency_stats([0.001] * 98 + [0.01, 0.1])
+    assert stats["p50_ms"] == 1.0
+    assert stats["p99_ms"] > 10.0
+    assert abs(stats["qps"] - 100 / 0.208) < 1e-6
+
+def test_bm25_only_startup_skips_heavy_imports():
+    row = measure_startup("bm25_only", repeats=1)
+    assert "torch" not in row["heavy_modules"] and "transformers" not in row["heavy_modules"], \
+        "A BM25-only run should not import reranker or embedding frameworks"
+    assert "rank_bm25" not in row["heavy_modules"], "Unselected retrievers should not be imported"
+    assert row["wall_seconds"] > 0 and row["peak_rss_mb"] > 0 and not row["errors"]
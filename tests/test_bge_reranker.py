@@ -41,3 +41,54 @@ def test_bge_valid_rerank():
     assert check_correct_score_order(reranked_docs), "Scores not sorted in descending order"
 
     
+
+def test_bge_rerank_depth_keeps_tail_order():
+    query = "galaxy and Solar System"
+    documents = [
+        {"id": "doc3", "text": "Mars is the fourth planet from the Sun."},
+        {"id": "doc1", "text": "The Milky Way galaxy contains our Solar System."},
+        {"id": "doc4", "text": "The James Webb Space Telescope is the most powerful telescope ever launched."},
+        {"id": "doc2", "text": "Black holes are regions of spacetime with extreme gravity."},
+    ]
+
+    reranked_docs = BGEReranker(rerank_depth=2, max_tokens_per_batch=64).rerank(query, documents)
+
+    assert len(reranked_docs) == len(documents), "Mismatch in document count"
+    assert {doc["id"] for doc in reranked_docs[:2]} == {"doc3", "doc1"}, "Only the head should be reranked"
+    assert [doc["id"] for doc in reranked_docs[2:]] == ["doc4", "doc2"], "Tail should keep first-stage order"
+    assert check_keys_in_results(reranked_docs, ["id", "text", "reranker_score"]), "Missing keys"
+    assert check_correct_score_order(reranked_docs), "Scores not sorted in descending order"
+
+def test_bge_score_cache_reuses_scores():
+    from rerankers.score_cache import ScoreCache
+
+    query = "galaxy and Solar System"
+    documents = [
+        {"id": "doc1", "text": "The Milky Way galaxy contains our Solar System."},
+        {"id": "doc2", "text": "Black holes are regions of spacetime with extreme gravity."},
+    ]
+    cache = ScoreCache()
+    reranker = BGEReranker(score_cache=cache)
+    first = [doc["reranker_score"] for doc in reranker.rerank(query, [dict(doc) for doc in documents])]
+    second = [doc["reranker_score"] for doc in reranker.rerank(query, [dict(doc) for doc in documents])]
+
+    assert first == second, "Cached scores should match computed scores"
+    assert cache.hits == len(documents) and cache.misses == len(documents)
+
+def test_bge_reranks_ranked_lists_like_dicts():
+    from utils.ranked_list import RankedList
+    query = "galaxy and Solar System"
+    corpus = [
+        {"id": "doc3", "text": "Mars is the fourth planet from the Sun."},
+        {"id": "doc1", "text": "The Milky Way galaxy contains our Solar System."},
+        {"id": "doc4", "text": "The James Webb Space Telescope is the most powerful telescope ever launched."},
+    ]
+    ranked = RankedList([0, 1, 2], [3.0, 2.0, 1.0], corpus)
+
+    reranker = BGEReranker(rerank_depth=2, max_tokens_per_batch=64)
+    reranked = reranker.rerank(query, ranked)
+    expected = reranker.rerank(query, ranked.to_dicts())
+
+    assert isinstance(reranked, RankedList), "RankedList input should produce a RankedList"
+    assert reranked.ids() == [doc["id"] for doc in expected], "Order should match the dict path"
+    assert check_correct_score_order(reranked), "Scores not sorted in descending order"
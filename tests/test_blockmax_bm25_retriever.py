@@ -0,0 +1,65 @@
+import random
+import pytest
+from benchmarks.synthetic import make_vocab
+from retrievers.fast_bm25_retriever import FastBM25Retriever
+from retrievers.blockmax_bm25_retriever import BlockMaxBM25Retriever
+
+# Ranks 500 and above never occur in the corpus
+vocab = make_vocab(521)
+
+@pytest.fixture(scope="module")
+def corpus(zipf_docs):
+    return zipf_docs(2000, vocab_size=500, mean_length=20)
+
+def build(retriever_cls, corpus, **kwargs):
+    retriever = retriever_cls(**kwargs)
+    retriever.index(corpus)
+    return retriever
+
+def test_blockmax_unindexed_retrieve():
+    with pytest.raises(ValueError):
+        BlockMaxBM25Retriever().retrieve(vocab[1], 3)
+
+def test_blockmax_invalid_mode():
+    with pytest.raises(ValueError):
+        BlockMaxBM25Retriever(pruning_mode="fastest")
+
+@pytest.mark.parametrize("k", [1, 10, 100])
+def test_blockmax_matches_exhaustive(k, corpus):
+    reference = build(FastBM25Retriever, corpus)
+    retriever = build(BlockMaxBM25Retriever, corpus, block_size=32, blocks_per_step=2)
+
+    rng = random.Random(k)
+    for _ in range(25):
+        query = " ".join(vocab[rng.randint(0, 520)] for _ in range(rng.randint(1, 6)))
+        expected = reference.retrieve(query, k)
+        results = retriever.retrieve(query, k)
+        assert [doc["id"] for doc in results] == [doc["id"] for doc in expected], f"Mismatch for {query!r}"
+        assert [doc["score"] for doc in results] == pytest.approx([doc["score"] for doc in expected])
+
+def test_blockmax_skips_postings(corpus):
+    retriever = build(BlockMaxBM25Retriever, corpus, block_size=32, blocks_per_step=1)
+    retriever.retrieve(" ".join(vocab[[0, 1, 2, 400]]), 5)
+
+    stats = retriever.last_query_stats
+    assert stats["postings_skipped"] > 0, "Expected pruning to skip postings for common terms"
+    assert stats["postings_scored"] + stats["postings_skipped"] == stats["postings_total"]
+    assert len(retriever.query_stats) == 1
+
+def test_blockmax_exhaustive_mode_skips_nothing(corpus):
+    retriever = build(BlockMaxBM25Retriever, corpus, pruning_mode="exhaustive")
+    retriever.retrieve(" ".join(vocab[[0, 1, 2, 400]]), 5)
+
+    assert retriever.last_query_stats["postings_skipped"] == 0
+
+def test_blockmax_score_analyzes_query_once(monkeypatch, corpus):
+    import retrievers.blockmax_bm25_retriever as blockmax
+    monkeypatch.setattr(blockmax, "MAX_QUERY_STATS", 3)
+    retriever = build(BlockMaxBM25Retriever, corpus)
+    calls = []
+    analyze = retriever.analyzer.analyze
+    monkeypatch.setattr(retriever.analyzer, "analyze", lambda text: calls.append(text) or analyze(text))
+    for _ in range(5):
+        retriever.score(" ".join(vocab[:2]))
+    assert len(calls) == 5, "Each score() call should analyze its query once"
+    assert len(retriever.query_stats) == 3, "query_stats should keep only the most recent queries"
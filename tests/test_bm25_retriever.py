@@ -61,3 +61,39 @@ def test_bm25_k_greater_than_corpus_size():
 
     # Should not return more than corpus size
     assert len(results) <= len(dummy_corpus), "Should not return more than available documents"
+
+def test_bm25_retrieve_batch_default_loop():
+    retriever = BM25Retriever()
+    retriever.index(dummy_corpus)
+    queries = ["galaxy and Solar System", "planet"]
+
+    batch_results = retriever.retrieve_batch(queries, 3)
+
+    assert [[doc["id"] for doc in results] for results in batch_results] == \
+        [[doc["id"] for doc in retriever.retrieve(query, 3)] for query in queries]
+
+def test_bm25_parallel_retrieval_matches_serial():
+    from retrievers.parallel import retrieve_parallel
+
+    retriever = BM25Retriever()
+    retriever.index(dummy_corpus)
+    queries = ["planet from the Sun", "galaxy", "explosion of a star", "telescope space", "black holes", "ring system"]
+
+    serial = retriever.retrieve_batch(queries, 3)
+    parallel = retrieve_parallel(retriever, dummy_corpus, queries, 3, num_workers=2, chunk_size=2)
+    assert parallel == serial, "Parallel retrieval should match a serial run exactly"
+
+def test_parallel_retrieval_maps_result_dicts():
+    from retrievers.parallel import retrieve_parallel
+
+    class DictRetriever(BM25Retriever):
+        def retrieve_batch(self, queries, k):
+            return [list(results) for results in super().retrieve_batch(queries, k)]
+
+    retriever = DictRetriever()
+    retriever.index(dummy_corpus)
+    queries = ["planet from the Sun", "galaxy", "explosion of a star", "telescope space"]
+
+    parallel = retrieve_parallel(retriever, dummy_corpus, queries, 3, num_workers=2, chunk_size=2)
+    assert [[doc["id"] for doc in docs] for docs in parallel] == \
+        [[doc["id"] for doc in docs] for docs in retriever.retrieve_batch(queries, 3)]
@@ -0,0 +1,87 @@
+import random
+import numpy as np
+import pytest
+from evaluation.bm25_sweep import parse_sweep, parameter_grid, score_parameter_grid, sweep_bm25, run_bm25_sweep
+from evaluation.evaluator import Evaluator
+from retrievers.fast_bm25_retriever import FastBM25Retriever
+from utils.tokenizer import Analyzer
+
+def random_corpus(num_docs: int, vocab_size: int, seed: int = 0):
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(vocab_size)]
+    return [
+        {"id": f"d{i}", "text": " ".join(rng.choices(vocab, k=rng.randint(1, 30)))}
+        for i in range(num_docs)
+    ]
+
+corpus = random_corpus(300, 60)
+queries = ["w1 w2", "w3 w3 w40", "w7", "", "unknownterm w5", "w10 w11 w12 w13"]
+
+def test_parse_sweep():
+    ranges = parse_sweep("k1=0.6:1.8:0.2, b=0.75")
+    assert ranges["k1"] == [0.6, 0.8, 1.0, 1.2, 1.4, 1.6, 1.8], "Stop value should be included"
+    assert ranges["b"] == [0.75]
+    grid = parameter_grid(parse_sweep("b=0.3:0.9:0.1"), k1=1.2)
+    assert len(grid) == 7 and grid[0] == {"k1": 1.2, "b": 0.3} and grid[-1] == {"k1": 1.2, "b": 0.9}
+    for spec in ["", "k3=1", "k1=1:0:0.1", "k1=0:1:0", "k1=a:b:c", "k1=1,k1=2"]:
+        with pytest.raises(ValueError):
+            parse_sweep(spec)
+
+def test_grid_scores_match_rebuilt_retrievers():
+    base = FastBM25Retriever()
+    base.index(corpus)
+    grid = parameter_grid({"k1": [0.6, 1.2, 2.0], "b": [0.0, 0.4, 1.0]})
+    k1s = np.array([p["k1"] for p in grid])
+    bs = np.array([p["b"] for p in grid])
+    for query in queries:
+        results = score_parameter_grid(base, base._query_term_ids(query), k1s, bs, 10)
+        for params, (docs, scores) in zip(grid, results):
+            expected = FastBM25Retriever(**params)
+            expected.index(corpus)
+            ranked = expected.retrieve(query, 10)
+            assert docs.tolist() == ranked.doc_indices.tolist(), f"Ranking differs for {query!r} at {params}"
+            assert scores.astype(np.float32).tolist() == ranked.scores.tolist(), f"Scores differ for {query!r} at {params}"
+
+def test_small_blocks_match_one_block(monkeypatch):
+    import evaluation.bm25_sweep as bm25_sweep
+    retriever = FastBM25Retriever()
+    retriever.index(corpus)
+    k1s, bs = np.linspace(0.5, 2.0, 7), np.linspace(0.1, 0.9, 7)
+    term_ids = retriever._query_term_ids("w1 w2 w3")
+    expected = score_parameter_grid(retriever, term_ids, k1s, bs, 5)
+    monkeypatch.setattr(bm25_sweep, "MAX_BLOCK_ELEMENTS", 1)
+    for (docs, scores), (exp_docs, exp_scores) in zip(score_parameter_grid(retriever, term_ids, k1s, bs, 5), expected):
+        assert np.array_equal(docs, exp_docs) and np.array_equal(scores, exp_scores)
+
+def test_parallel_sweep_matches_serial():
+    retriever = FastBM25Retriever(analyzer=Analyzer(stemmer="s"))
+    retriever.index(corpus)
+    grid = parameter_grid({"k1": [0.9, 1.5], "b": [0.5, 0.75]})
+    serial = list(sweep_bm25(retriever, queries * 5, grid, 5, num_workers=1, chunk_size=4))
+    parallel = list(sweep_bm25(retriever, queries * 5, grid, 5, num_workers=2, chunk_size=4))
+    assert [start for start, _ in parallel] == list(range(0, 30, 4)), "Chunks should arrive in query order"
+    assert [[[r.doc_indices.tolist() for r in by_query] for by_query in chunk] for _, chunk in serial] == \
+        [[[r.doc_indices.tolist() for r in by_query] for by_query in chunk] for _, chunk in parallel]
+
+def test_run_bm25_sweep_metric_grid():
+    retriever = FastBM25Retriever()
+    retriever.index(corpus)
+    query_dicts = [{"query_id": f"q{i}", "text": text} for i, text in enumerate(queries)]
+    grid = parameter_grid({"k1": [0.9, 1.5], "b": [0.3, 0.75]})
+    # Ground truth: the top document of the default parameters
+    gt = {q["query_id"]: [retriever.retrieve(q["text"], 1)[0]["id"]] for q in query_dicts}
+    evaluator = Evaluator(k=5, cutoffs=[1, 5])
+    rows = run_bm25_sweep(retriever, query_dicts, grid, evaluator, gt, 5, num_workers=2, chunk_size=2)
+
+    assert [(row["k1"], row["b"]) for row in rows] == [(0.9, 0.3), (0.9, 0.75), (1.5, 0.3), (1.5, 0.75)]
+    default = rows[3]
+    expected = FastBM25Retriever(k1=1.5, b=0.75)
+    expected.index(corpus)
+    _, metrics = evaluator.compute_metrics({q["query_id"]: expected.retrieve(q["text"], 5) for q in query_dicts}, gt)
+    for name, values in metrics.items():
+        assert default[name] == pytest.approx(float(values.mean())), f"{name} differs from a direct evaluation"
+    assert default["precision@1"] == 1.0, "Default parameters should retrieve their own top document"
+
+def test_sweep_requires_index():
+    with pytest.raises(ValueError):
+        list(sweep_bm25(FastBM25Retriever(), queries, parameter_grid({"k1": [1.0]}), 5))
@@ -0,0 +1,50 @@
+import math
+import pytest
+from evaluation.columnar_report import ColumnarReport, ColumnarReportWriter, is_columnar_report
+
+rows = [
+    {"query_id": "q1", "retriever": "bm25", "precision@5_value": 0.2, "precision@5_status": "fail",
+     "retrieved_doc_ids": ["doc3", "doc1"]},
+    {"query_id": "q2", "retriever": "bm25", "precision@5_value": 0.6, "precision@5_status": "pass",
+     "retrieved_doc_ids": []},
+    {"query_id": "q1", "retriever": "bm25+bge", "precision@5_value": 0.4, "precision@5_status": "fail",
+     "recall@5_value": 1.0, "retrieved_doc_ids": ["doc1", "doc2"]},
+]
+
+def write_report(path):
+    with ColumnarReportWriter(str(path), {"topk": 5}) as writer:
+        for row in rows:
+            writer.write(row)
+
+def test_columnar_round_trip(tmp_path):
+    path = tmp_path / "report"
+    write_report(path)
+    assert is_columnar_report(str(path))
+
+    report = ColumnarReport(str(path))
+    assert report.num_rows == 3
+    assert report.metadata == {"topk": 5}
+    data = report.read(["query_id", "retriever", "precision@5_value", "precision@5_status", "retrieved_doc_ids"])
+    for name in data:
+        values = list(data[name])
+        assert values == [row[name] for row in rows], f"Column {name} differs"
+
+def test_late_columns_are_missing_for_earlier_rows(tmp_path):
+    path = tmp_path / "report"
+    write_report(path)
+    recall = ColumnarReport(str(path)).read(["recall@5_value"])["recall@5_value"]
+    assert math.isnan(recall[0]) and math.isnan(recall[1]) and recall[2] == 1.0
+
+def test_filters_select_rows(tmp_path):
+    path = tmp_path / "report"
+    write_report(path)
+    report = ColumnarReport(str(path))
+
+    data = report.read(["retriever", "retrieved_doc_ids"], filters={"query_id": ["q1"]})
+    assert data["retriever"] == ["bm25", "bm25+bge"]
+    assert data["retrieved_doc_ids"] == [["doc3", "doc1"], ["doc1", "doc2"]]
+    assert report.read(["retriever"], filters={"query_id": ["missing"]})["retriever"] == []
+    assert report.categories("retriever") == ["bm25", "bm25+bge"]
+
+    with pytest.raises(ValueError):
+        report.read(["retriever"], filters={"precision@5_value": [0.2]})
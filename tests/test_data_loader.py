@@ -0,0 +1,72 @@
+import gzip
+import json
+import pytest
+from retrievers.bm25_retriever import BM25Retriever
+from retrievers.fast_bm25_retriever import FastBM25Retriever
+from utils.data_loader import iter_chunks, load_corpus, load_document_chunks, load_queries
+from utils.doc_store import open_doc_store
+
+dummy_corpus = [
+    {"id": "doc1", "text": "The Milky Way galaxy is a barred spiral galaxy that contains our Solar System."},
+    {"id": "doc2", "text": "Black holes are regions of spacetime where gravity is so strong that nothing can escape from it."},
+    {"id": "doc3", "text": "Mars is the fourth planet from the Sun and is often referred to as the Red Planet."},
+    {"id": "doc4", "text": "The Andromeda galaxy is the nearest large galaxy to the Milky Way."},
+    {"id": "doc5", "text": "Jupiter is the largest planet in the Solar System."},
+]
+
+def write_jsonl(path, records, compress=False):
+    lines = "".join(json.dumps(record) + "\n" for record in records)
+    if compress:
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(lines)
+    else:
+        path.write_text(lines)
+
+@pytest.mark.parametrize("name", ["corpus.json", "corpus.jsonl", "corpus.jsonl.gz"])
+def test_corpus_formats_load_the_same_documents(tmp_path, name):
+    path = tmp_path / name
+    if name.endswith(".json"):
+        path.write_text(json.dumps(dummy_corpus))
+    else:
+        write_jsonl(path, dummy_corpus, compress=name.endswith(".gz"))
+    assert load_corpus(str(path)) == dummy_corpus
+
+def test_documents_are_streamed_in_bounded_chunks(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    write_jsonl(path, dummy_corpus)
+    chunks = list(load_document_chunks(str(path), chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1], "Chunks should hold at most chunk_size documents"
+    assert [doc for chunk in chunks for doc in chunk] == dummy_corpus
+
+def test_invalid_records_are_rejected(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    path.write_text(json.dumps(dummy_corpus[0]) + "\n{not json\n")
+    with pytest.raises(ValueError):
+        load_corpus(str(path))
+    path.write_text(json.dumps({"id": "doc1"}) + "\n")
+    with pytest.raises(ValueError):
+        load_corpus(str(path))
+    with pytest.raises(ValueError):
+        list(iter_chunks(dummy_corpus, 0))
+
+def test_queries_load_from_gzipped_jsonl(tmp_path):
+    queries = [{"query_id": "q1", "text": "galaxy"}, {"query_id": "q2", "text": "planet"}]
+    path = tmp_path / "queries.jsonl.gz"
+    write_jsonl(path, queries, compress=True)
+    assert load_queries(str(path)) == queries
+
+def test_chunked_index_matches_full_index(tmp_path):
+    path = tmp_path / "corpus.jsonl.gz"
+    write_jsonl(path, dummy_corpus, compress=True)
+    store = open_doc_store(str(path))
+
+    full, chunked, base = FastBM25Retriever(), FastBM25Retriever(), BM25Retriever()
+    full.index(dummy_corpus)
+    chunked.index_chunks(load_document_chunks(str(path), chunk_size=2), store)
+    base.index_chunks(iter_chunks(dummy_corpus, 2))
+    for query in ["galaxy milky way", "largest planet", "gravity"]:
+        assert chunked.retrieve(query, 3) == full.retrieve(query, 3), "Chunked indexing should not change results"
+        assert [doc["id"] for doc in base.retrieve(query, 3)] == [doc["id"] for doc in full.retrieve(query, 3)]
+
+    with pytest.raises(ValueError):
+        FastBM25Retriever().index_chunks(iter_chunks(dummy_corpus, 2), dummy_corpus[:3])
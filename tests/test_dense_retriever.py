@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from retrievers.dense_retriever import DenseRetriever
+from retrievers.index_cache import load_or_build_index
+from utils.doc_store import DocStore
+from utils.hashing_embedder import HashingEmbedder
+
+dummy_corpus = [
+    {"id": "doc1", "text": "The Milky Way galaxy is a barred spiral galaxy that contains our Solar System."},
+    {"id": "doc2", "text": "Black holes are regions of spacetime where gravity is so strong that nothing can escape from it."},
+    {"id": "doc3", "text": "Mars is the fourth planet from the Sun and is often referred to as the Red Planet."},
+    {"id": "doc4", "text": "The James Webb Space Telescope is the most powerful telescope ever launched into space."},
+    {"id": "doc5", "text": "A supernova is the explosion of a star, the largest explosion that takes place in space."},
+    {"id": "doc6", "text": "Saturn is the sixth planet from the Sun and is famous for its beautiful ring system."}
+]
+
+queries = ["galaxy and Solar System", "planet from the Sun", "black holes gravity", ""]
+
+def build(**kwargs):
+    retriever = DenseRetriever(embedder=HashingEmbedder(dim=64), **kwargs)
+    retriever.index(dummy_corpus)
+    return retriever
+
+def brute_force(query: str, k: int):
+    embedder = HashingEmbedder(dim=64)
+    doc_vectors = embedder.encode([doc["text"] for doc in dummy_corpus])
+    scores = doc_vectors @ embedder.encode([query])[0]
+    order = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
+    return [dummy_corpus[i]["id"] for i in order]
+
+def test_dense_unindexed_retrieve():
+    with pytest.raises(ValueError):
+        DenseRetriever(embedder=HashingEmbedder()).retrieve("galaxy", 3)
+
+def test_dense_invalid_storage():
+    with pytest.raises(ValueError):
+        DenseRetriever(storage="bfloat8")
+
+@pytest.mark.parametrize("block_size", [2, 4, 100])
+def test_dense_blocked_search_is_exact(block_size):
+    retriever = build(storage="float32", block_size=block_size)
+    for query in queries:
+        results = retriever.retrieve(query, 4)
+        assert [doc["id"] for doc in results] == brute_force(query, 4), f"Mismatch for {query!r}"
+        scores = [doc["score"] for doc in results]
+        assert all(scores[i] >= scores[i + 1] for i in range(len(scores) - 1)), "Scores not sorted"
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_dense_compact_storage(storage):
+    retriever = build(storage=storage, block_size=4)
+    assert retriever.embeddings.dtype == np.dtype(storage)
+    assert isinstance(retriever.embeddings, np.memmap), "Embeddings should be memory-mapped"
+    for query in queries[:3]:
+        assert retriever.retrieve(query, 1)[0]["id"] == brute_force(query, 1)[0]
+
+def test_dense_k_greater_than_corpus_size():
+    results = build().retrieve("planet", 10)
+    assert len(results) == len(dummy_corpus)
+
+def test_dense_index_cache(tmp_path):
+    fresh = DenseRetriever(embedder=HashingEmbedder(dim=64), storage="int8")
+    assert load_or_build_index(fresh, dummy_corpus, str(tmp_path)) is False
+    cached = DenseRetriever(embedder=HashingEmbedder(dim=64), storage="int8")
+    assert load_or_build_index(cached, dummy_corpus, str(tmp_path)) is True
+
+    assert cached.retrieve_batch(queries, 3) == fresh.retrieve_batch(queries, 3)
+
+def test_dense_streams_corpus_in_chunks(tmp_path, monkeypatch):
+    import retrievers.dense_retriever as dense_retriever
+    expected = build(storage="float32")
+    monkeypatch.setattr(dense_retriever, "DEFAULT_CHUNK_SIZE", 4)
+    store = DocStore.build(dummy_corpus, str(tmp_path / "corpus.store"))
+    retriever = DenseRetriever(embedder=HashingEmbedder(dim=64), storage="float32")
+    retriever.index(store)
+    assert np.array_equal(retriever.embeddings, expected.embeddings), "Chunked embedding should match one chunk"
+    assert retriever.retrieve_batch(queries, 3) == expected.retrieve_batch(queries, 3)
+
+def test_embedder_encode_preserves_order():
+    embedder = HashingEmbedder(dim=32)
+    texts = [doc["text"] for doc in dummy_corpus]
+    batched = embedder.encode(texts, batch_size=2)
+    assert np.allclose(batched, embedder.embed(texts))
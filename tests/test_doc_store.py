@@ -0,0 +1,46 @@
+import json
+import os
+import pytest
+from retrievers.fast_bm25_retriever import FastBM25Retriever
+from utils.doc_store import DocStore, open_doc_store
+
+dummy_corpus = [
+    {"id": "doc1", "text": "The Milky Way galaxy is a barred spiral galaxy that contains our Solar System."},
+    {"id": "doc2", "text": "Black holes are regions of spacetime where gravity is so strong that nothing can escape from it."},
+    {"id": "doc3", "text": "Mars is the fourth planet from the Sun and is often referred to as the Red Planet."},
+    {"id": "doc4", "text": "Ünïcödé passage: the James Webb Space Telescope."},
+]
+
+def test_store_round_trip(tmp_path):
+    store = DocStore.build(dummy_corpus, str(tmp_path / "corpus.store"))
+    assert len(store) == len(dummy_corpus)
+    assert list(store) == dummy_corpus
+    assert store[2] == dummy_corpus[2]
+    assert store[-1] == dummy_corpus[-1]
+    assert store.get_text("doc4") == dummy_corpus[3]["text"]
+    assert store.get_text("missing", "n/a") == "n/a"
+    assert store.index_of("doc2") == 1
+    with pytest.raises(IndexError):
+        store[len(dummy_corpus)]
+
+def test_duplicate_ids_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        DocStore.build(dummy_corpus + dummy_corpus[:1], str(tmp_path / "corpus.store"))
+
+def test_open_builds_once_and_rebuilds_when_corpus_changes(tmp_path):
+    corpus_path = tmp_path / "corpus.json"
+    corpus_path.write_text(json.dumps(dummy_corpus))
+    store = open_doc_store(str(corpus_path))
+    assert os.path.isdir(tmp_path / "corpus.store")
+    assert store.get_text("doc1") == dummy_corpus[0]["text"]
+
+    corpus_path.write_text(json.dumps(dummy_corpus[:2]))
+    os.utime(corpus_path, (0, 0))
+    assert len(open_doc_store(str(corpus_path))) == 2, "A changed corpus should trigger a rebuild"
+
+def test_retriever_results_match_list_corpus(tmp_path):
+    store = DocStore.build(dummy_corpus, str(tmp_path / "corpus.store"))
+    from_list, from_store = FastBM25Retriever(), FastBM25Retriever()
+    from_list.index(dummy_corpus)
+    from_store.index(store)
+    assert from_store.retrieve("planet galaxy telescope", 3) == from_list.retrieve("planet galaxy telescope", 3)
@@ -13,25 +13,57 @@ def test_performance_check_with_ground_truth():
     evaluator = Evaluator(k=3)
     results = evaluator.performance_check(retrieved_docs, ground_truth)
 
-    assert "precision@5" in results
-    assert "recall@5" in results
-    assert "ndcg@5" in results
+    assert set(results) == {"precision@3", "recall@3", "ndcg@3"}, "Metric keys should follow k"
 
-    assert results["precision@5"]["value"] == pytest.approx(2/3, rel=1e-2)
-    assert results["recall@5"]["value"] == pytest.approx(1.0, rel=1e-2)
-    assert results["ndcg@5"]["value"] > 0.0
+    assert results["precision@3"]["value"] == pytest.approx(2/3, rel=1e-2)
+    assert results["recall@3"]["value"] == pytest.approx(1.0, rel=1e-2)
+    assert results["ndcg@3"]["value"] > 0.0
+    assert "status" not in results["precision@3"], "No threshold is configured for @3"
 
-    assert results["precision@5"]["status"] in {"pass", "fail"}
+def test_performance_check_uses_thresholds_for_k():
+    results = Evaluator(k=5).performance_check(retrieved_docs, ground_truth)
+
+    assert results["precision@5"]["value"] == pytest.approx(2/5), "Precision should divide by k"
+    assert results["precision@5"]["threshold"] == 0.5
+    assert results["precision@5"]["status"] == "fail"
+    assert results["recall@5"]["status"] == "pass"
 
 def test_performance_check_without_ground_truth():
     evaluator = Evaluator(k=3)
     results = evaluator.performance_check(retrieved_docs, ground_truth=None)
 
-    assert "precision@5" in results
-    assert "recall@5" not in results
-    assert "ndcg@5" not in results
+    assert "precision@3" in results
+    assert "recall@3" not in results
+    assert "ndcg@3" not in results
 
 def test_performance_check_empty_retrieval():
     evaluator = Evaluator(k=3)
     results = evaluator.performance_check([], ground_truth)
     assert results == {}
+
+def test_evaluate_writes_jsonl_report(tmp_path):
+    from evaluation.report_writer import read_report
+
+    path = str(tmp_path / "reports" / "run.jsonl")
+    outputs = {"bm25": {"q1": retrieved_docs, "q2": retrieved_docs[:1]}}
+    summaries = Evaluator(k=3, cutoffs=[1, 5]).evaluate(outputs, {"q1": ground_truth, "q2": ["doc9"]}, output_file_path=path)
+
+    rows = read_report(path)
+    assert [row["query_id"] for row in rows] == ["q1", "q2"]
+    assert rows[0]["precision@1_value"] == 1.0
+    assert rows[0]["recall@5_value"] == pytest.approx(1.0)
+    assert rows[0]["precision@5_status"] in {"pass", "fail"}
+    assert rows[1]["retrieved_doc_ids"] == ["doc1"]
+    assert summaries["bm25"]["recall@5"] == pytest.approx(0.5)
+
+def test_evaluate_writes_columnar_report(tmp_path):
+    from evaluation.columnar_report import ColumnarReport
+
+    outputs = {"bm25": {"q1": retrieved_docs}}
+    Evaluator(k=3, cutoffs=[5]).evaluate(outputs, {"q1": ground_truth}, output_file_path=str(tmp_path / "run.jsonl"),
+                                         columnar_path=str(tmp_path / "run_columns"))
+
+    data = ColumnarReport(str(tmp_path / "run_columns")).read(["query_id", "recall@5_value", "retrieved_doc_ids"])
+    assert data["query_id"] == ["q1"]
+    assert data["recall@5_value"][0] == pytest.approx(1.0)
+    assert data["retrieved_doc_ids"] == [["doc1", "doc2", "doc3"]]
@@ -0,0 +1,89 @@
+import random
+import pytest
+from retrievers.bm25_retriever import BM25Retriever
+from retrievers.fast_bm25_retriever import FastBM25Retriever, select_top_k
+from typing import List, Dict, Any
+
+dummy_corpus = [
+    {"id": "doc1", "text": "The Milky Way galaxy is a barred spiral galaxy that contains our Solar System."},
+    {"id": "doc2", "text": "Black holes are regions of spacetime where gravity is so strong that nothing can escape from it."},
+    {"id": "doc3", "text": "Mars is the fourth planet from the Sun and is often referred to as the Red Planet."},
+    {"id": "doc4", "text": "The James Webb Space Telescope is the most powerful telescope ever launched into space."},
+    {"id": "doc5", "text": "A supernova is the explosion of a star, the largest explosion that takes place in space."},
+    {"id": "doc6", "text": "Saturn is the sixth planet from the Sun and is famous for its beautiful ring system."}
+]
+
+queries = [
+    "galaxy and Solar System",
+    "planet from the Sun",
+    "the the space",
+    "What is a Black hole?",
+    "",
+    "unknownterm",
+]
+
+def random_corpus(num_docs: int, vocab_size: int, seed: int = 0) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(vocab_size)]
+    return [
+        {"id": f"d{i}", "text": " ".join(rng.choices(vocab, k=rng.randint(1, 30)))}
+        for i in range(num_docs)
+    ]
+
+def assert_same_ranking(expected: List[Dict[str, Any]], actual: List[Dict[str, Any]]) -> None:
+    assert [doc["id"] for doc in actual] == [doc["id"] for doc in expected], "Rankings differ"
+    for exp, act in zip(expected, actual):
+        assert act["score"] == pytest.approx(exp["score"])
+
+def test_fast_bm25_unindexed_retrieve():
+    retriever = FastBM25Retriever()
+    with pytest.raises(ValueError):
+        retriever.retrieve("What is the Milky Way?", 3)
+
+@pytest.mark.parametrize("query", queries)
+@pytest.mark.parametrize("k", [1, 3, 10])
+def test_fast_bm25_matches_bm25(query, k):
+    reference = BM25Retriever()
+    reference.index(dummy_corpus)
+    retriever = FastBM25Retriever()
+    retriever.index(dummy_corpus)
+
+    assert_same_ranking(reference.retrieve(query, k), retriever.retrieve(query, k))
+
+def test_fast_bm25_matches_bm25_on_random_corpus():
+    corpus = random_corpus(300, 50)
+    reference = BM25Retriever()
+    reference.index(corpus)
+    retriever = FastBM25Retriever()
+    retriever.index(corpus)
+
+    rng = random.Random(1)
+    for _ in range(20):
+        query = " ".join(f"w{rng.randint(0, 60)}" for _ in range(rng.randint(1, 5)))
+        assert_same_ranking(reference.retrieve(query, 25), retriever.retrieve(query, 25))
+
+def test_select_top_k_tie_breaking():
+    doc_indices = [4, 1, 7, 2]
+    scores = [1.0, 2.0, 1.0, -0.5]
+    top_docs, top_scores = select_top_k(doc_indices, scores, 6, 8)
+
+    # positives first (ties by doc index), then zero-score docs in index order, then negatives
+    assert top_docs.tolist() == [1, 4, 7, 0, 3, 5]
+    assert top_scores.tolist() == [2.0, 1.0, 1.0, 0.0, 0.0, 0.0]
+
+def test_fast_bm25_retrieve_batch_matches_retrieve():
+    retriever = FastBM25Retriever()
+    retriever.index(dummy_corpus)
+    batch_queries = queries + ["planet planet from Sun"]
+
+    batch_results = retriever.retrieve_batch(batch_queries, 4)
+
+    assert len(batch_results) == len(batch_queries)
+    for query, results in zip(batch_queries, batch_results):
+        expected = retriever.retrieve(query, 4)
+        assert [doc["id"] for doc in results] == [doc["id"] for doc in expected], f"Mismatch for {query!r}"
+        assert [doc["score"] for doc in results] == [doc["score"] for doc in expected]
+
+def test_fast_bm25_retrieve_batch_unindexed():
+    with pytest.raises(ValueError):
+        FastBM25Retriever().retrieve_batch(["galaxy"], 3)
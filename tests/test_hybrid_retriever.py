@@ -0,0 +1,91 @@
+import time
+import pytest
+from retrievers.base_retriever import BaseRetriever
+from retrievers.dense_retriever import DenseRetriever
+from retrievers.fast_bm25_retriever import FastBM25Retriever
+from retrievers.hybrid_retriever import HybridRetriever, fuse_rankings
+from utils.hashing_embedder import HashingEmbedder
+from utils.ranked_list import RankedList
+from typing import List, Dict, Any
+
+dummy_corpus = [
+    {"id": "doc1", "text": "The Milky Way galaxy is a barred spiral galaxy that contains our Solar System."},
+    {"id": "doc2", "text": "Black holes are regions of spacetime where gravity is so strong that nothing can escape from it."},
+    {"id": "doc3", "text": "Mars is the fourth planet from the Sun and is often referred to as the Red Planet."},
+    {"id": "doc4", "text": "The James Webb Space Telescope is the most powerful telescope ever launched into space."},
+    {"id": "doc5", "text": "A supernova is the explosion of a star, the largest explosion that takes place in space."},
+    {"id": "doc6", "text": "Saturn is the sixth planet from the Sun and is famous for its beautiful ring system."}
+]
+
+class SlowRetriever(BaseRetriever):
+    """
+    Returns a fixed ranking after sleeping (sleep releases the GIL, like NumPy/torch kernels).
+    """
+    def __init__(self, order: List[int], delay: float = 0.0, as_dicts: bool = False):
+        self.order = order
+        self.delay = delay
+        self.as_dicts = as_dicts
+        self.depths = []
+        self.corpus = None
+
+    def index(self, corpus: List[Dict[str, str]]) -> None:
+        self.corpus = corpus
+
+    def retrieve(self, query: str, k: int) -> Any:
+        self.depths.append(k)
+        time.sleep(self.delay)
+        ranked = RankedList(self.order[:k], [float(len(self.order) - i) for i in range(len(self.order[:k]))], self.corpus)
+        return ranked.to_dicts() if self.as_dicts else ranked
+
+def build(**kwargs) -> HybridRetriever:
+    retriever = HybridRetriever(dense=DenseRetriever(embedder=HashingEmbedder(dim=64)), **kwargs)
+    retriever.index(dummy_corpus)
+    return retriever
+
+def test_rrf_matches_manual_fusion():
+    retriever = build(sparse_depth=4, dense_depth=3)
+    sparse, dense = FastBM25Retriever(), DenseRetriever(embedder=HashingEmbedder(dim=64))
+    sparse.index(dummy_corpus)
+    dense.index(dummy_corpus)
+
+    for query in ["galaxy and Solar System", "planet from the Sun", "space telescope explosion"]:
+        expected: Dict[str, float] = {}
+        for ranking in (sparse.retrieve(query, 4), dense.retrieve(query, 3)):
+            for rank, doc_id in enumerate(ranking.ids(), 1):
+                expected[doc_id] = expected.get(doc_id, 0.0) + 1.0 / (60 + rank)
+        results = retriever.retrieve(query, 5)
+        assert len(results) == min(5, len(expected))
+        assert {doc["id"]: doc["score"] for doc in results} == pytest.approx(
+            {doc_id: expected[doc_id] for doc_id in results.ids()})
+        assert sorted(expected.values(), reverse=True)[:5] == pytest.approx([doc["score"] for doc in results])
+
+def test_normalized_fusion_and_weights():
+    first = RankedList([0, 1, 2], [10.0, 5.0, 0.0], dummy_corpus)
+    second = RankedList([2, 3], [0.9, 0.1], dummy_corpus)
+    doc_indices, scores = fuse_rankings([first, second], 3, method="normalized", weights=[1.0, 2.0])
+    assert doc_indices.tolist() == [2, 0, 1], "doc3 gets 0 + 2 * 1 and should lead"
+    assert scores.tolist() == pytest.approx([2.0, 1.0, 0.5])
+    with pytest.raises(ValueError):
+        fuse_rankings([first], 3, method="max")
+    with pytest.raises(ValueError):
+        HybridRetriever(sparse=SlowRetriever([0]), dense=SlowRetriever([0]), fusion="max")
+
+def test_branch_depths_and_dict_branches():
+    sparse, dense = SlowRetriever([0, 1, 2, 3]), SlowRetriever([3, 4, 5], as_dicts=True)
+    retriever = HybridRetriever(sparse=sparse, dense=dense, sparse_depth=2)
+    with pytest.raises(ValueError):
+        retriever.retrieve("query", 3)
+    retriever.index(dummy_corpus)
+    results = retriever.retrieve("query", 4)
+    assert sparse.depths == [2] and dense.depths == [4], "Branch depth should default to k"
+    assert results.ids()[0] == "doc1" and "doc4" in results.ids()
+
+def test_branches_run_concurrently():
+    delay = 0.3
+    retriever = HybridRetriever(sparse=SlowRetriever([0, 1], delay), dense=SlowRetriever([1, 2], delay))
+    retriever.index(dummy_corpus)
+    start = time.perf_counter()
+    retriever.retrieve("query", 2)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 1.6 * delay, f"Hybrid latency {elapsed:.2f}s should be close to one branch ({delay}s)"
+    assert all(seconds >= delay for seconds in retriever.branch_seconds.values())
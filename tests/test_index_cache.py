@@ -0,0 +1,84 @@
+import json
+import os
+import numpy as np
+import pytest
+from retrievers import index_cache
+from retrievers.fast_bm25_retriever import FastBM25Retriever
+from retrievers.blockmax_bm25_retriever import BlockMaxBM25Retriever
+from retrievers.index_cache import load_or_build_index, corpus_fingerprint, index_cache_path
+from utils.doc_store import open_doc_store
+
+dummy_corpus = [
+    {"id": "doc1", "text": "The Milky Way galaxy is a barred spiral galaxy that contains our Solar System."},
+    {"id": "doc2", "text": "Black holes are regions of spacetime where gravity is so strong that nothing can escape from it."},
+    {"id": "doc3", "text": "Mars is the fourth planet from the Sun and is often referred to as the Red Planet."},
+    {"id": "doc4", "text": "The James Webb Space Telescope is the most powerful telescope ever launched into space."},
+    {"id": "doc5", "text": "A supernova is the explosion of a star, the largest explosion that takes place in space."},
+    {"id": "doc6", "text": "Saturn is the sixth planet from the Sun and is famous for its beautiful ring system."}
+]
+
+queries = ["galaxy and Solar System", "planet from the Sun", "the space", "", "unknownterm"]
+
+@pytest.mark.parametrize("retriever_cls", [FastBM25Retriever, BlockMaxBM25Retriever])
+def test_cached_index_matches_fresh_index(tmp_path, retriever_cls):
+    fresh = retriever_cls()
+    assert load_or_build_index(fresh, dummy_corpus, str(tmp_path)) is False, "First run should build"
+
+    cached = retriever_cls()
+    assert load_or_build_index(cached, dummy_corpus, str(tmp_path)) is True, "Second run should load"
+    assert isinstance(cached.postings_docs, np.memmap), "Cached postings should be memory-mapped"
+
+    for query in queries:
+        assert cached.retrieve(query, 4) == fresh.retrieve(query, 4)
+    assert cached.retrieve_batch(queries, 4) == fresh.retrieve_batch(queries, 4)
+
+def test_changed_corpus_gets_new_cache_entry(tmp_path):
+    changed = dummy_corpus[:-1] + [{"id": "doc6", "text": "Saturn has rings."}]
+    assert corpus_fingerprint(changed) != corpus_fingerprint(dummy_corpus)
+
+    load_or_build_index(FastBM25Retriever(), dummy_corpus, str(tmp_path))
+    assert load_or_build_index(FastBM25Retriever(), changed, str(tmp_path)) is False
+
+def test_config_is_part_of_cache_key(tmp_path):
+    load_or_build_index(FastBM25Retriever(), dummy_corpus, str(tmp_path))
+    assert load_or_build_index(FastBM25Retriever(k1=1.2), dummy_corpus, str(tmp_path)) is False
+
+def test_rebuild_index(tmp_path):
+    retriever = FastBM25Retriever()
+    load_or_build_index(retriever, dummy_corpus, str(tmp_path))
+    assert load_or_build_index(FastBM25Retriever(), dummy_corpus, str(tmp_path), rebuild=True) is False
+
+    path = index_cache_path(retriever, corpus_fingerprint(dummy_corpus), str(tmp_path))
+    assert os.listdir(str(tmp_path)) == [os.path.basename(path)], "No temporary directories should remain"
+
+def _no_full_hash(corpus):
+    raise AssertionError("The corpus should not be rehashed")
+
+def test_doc_store_fingerprint_skips_corpus_hash(tmp_path, monkeypatch):
+    corpus_path = tmp_path / "corpus.json"
+    corpus_path.write_text(json.dumps(dummy_corpus))
+    store = open_doc_store(str(corpus_path))
+    assert store.fingerprint == corpus_fingerprint(dummy_corpus), "The store should record the content hash"
+
+    index_dir = str(tmp_path / "indexes")
+    load_or_build_index(FastBM25Retriever(), store, index_dir)
+    monkeypatch.setattr(index_cache, "corpus_fingerprint", _no_full_hash)
+    assert load_or_build_index(FastBM25Retriever(), store, index_dir) is True
+
+def test_unchanged_corpus_file_skips_corpus_hash(tmp_path, monkeypatch):
+    corpus_path = tmp_path / "corpus.json"
+    corpus_path.write_text(json.dumps(dummy_corpus))
+    index_dir = str(tmp_path / "indexes")
+    assert load_or_build_index(FastBM25Retriever(), dummy_corpus, index_dir, corpus_path=str(corpus_path)) is False
+
+    with monkeypatch.context() as patch:
+        patch.setattr(index_cache, "corpus_fingerprint", _no_full_hash)
+        assert load_or_build_index(FastBM25Retriever(), dummy_corpus, index_dir, corpus_path=str(corpus_path)) is True
+        with pytest.raises(AssertionError):
+            load_or_build_index(FastBM25Retriever(), dummy_corpus, index_dir, rebuild=True, corpus_path=str(corpus_path))
+
+    # A changed file (new size and mtime) is hashed again and gets its own cache entry
+    changed = dummy_corpus[:-1]
+    corpus_path.write_text(json.dumps(changed))
+    os.utime(corpus_path, (0, 12345))
+    assert load_or_build_index(FastBM25Retriever(), changed, index_dir, corpus_path=str(corpus_path)) is False
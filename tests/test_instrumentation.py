@@ -0,0 +1,133 @@
+import threading
+import time
+import pytest
+from evaluation.cost_quality import cost_quality_table, pareto_front
+from evaluation.evaluator import Evaluator
+from rerankers.scheduler import RerankScheduler
+from utils import instrumentation
+from typing import List, Dict, Any, Tuple
+
+@pytest.fixture
+def enabled():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+class SleepingReranker:
+    """
+    Splits reranking into instrumented tokenize and model steps that take a fixed time per pair.
+    """
+    rerank_depth = None
+    max_batch_size = 8
+    max_tokens_per_batch = 1000
+
+    def encode_pairs(self, pairs: List[Tuple[str, str]]) -> List[Dict[str, List[int]]]:
+        with instrumentation.span("rerank_tokenize"):
+            time.sleep(0.002 * len(pairs))
+            return [{"input_ids": [len(text)]} for _, text in pairs]
+
+    def score_features(self, features: List[Dict[str, List[int]]]) -> List[float]:
+        with instrumentation.span("model_forward"):
+            time.sleep(0.004 * len(features))
+            return [float(feature["input_ids"][0]) for feature in features]
+
+def test_disabled_spans_are_shared_no_ops():
+    instrumentation.disable()
+    assert instrumentation.span("retrieve") is instrumentation.span("tokenize"), "Disabled spans should not allocate"
+    with instrumentation.scope(["q1"]), instrumentation.span("retrieve"):
+        pass
+    instrumentation.count("q1", "candidates", 3)
+    assert instrumentation.columns("q1") == {}
+
+def test_batch_time_is_shared_and_nested_stages_not_double_counted(enabled):
+    with instrumentation.scope(["q1", "q2"]), instrumentation.span("retrieve"):
+        with instrumentation.span("tokenize"):
+            time.sleep(0.02)
+        time.sleep(0.02)
+    instrumentation.count("q1", "candidates", 10)
+
+    columns = instrumentation.columns("q1")
+    assert columns["retrieve_ms"] == pytest.approx(20.0, rel=0.5), "Batch time should be split across its queries"
+    assert 0.3 * columns["retrieve_ms"] < columns["tokenize_ms"] < columns["retrieve_ms"]
+    assert columns["total_ms"] == pytest.approx(columns["retrieve_ms"]), "Tokenize runs inside retrieve"
+    assert columns["candidates"] == 10
+    assert "candidates" not in instrumentation.columns("q2")
+    assert instrumentation.span("retrieve") is instrumentation.span("tokenize"), "Spans outside a scope are no-ops"
+
+def test_linked_strategy_includes_first_stage_and_helper_threads(enabled):
+    with instrumentation.scope([("bm25", "q1")]), instrumentation.span("retrieve"):
+        time.sleep(0.01)
+    instrumentation.link(("bm25+bge", "q1"), ("bm25", "q1"))
+    with instrumentation.scope([("bm25+bge", "q1")]):
+        current = instrumentation.current_scope()
+
+        def helper():
+            with instrumentation.use_scope(current), instrumentation.span("model_forward"):
+                time.sleep(0.01)
+        thread = threading.Thread(target=helper)
+        thread.start()
+        thread.join()
+
+    first_stage = instrumentation.columns(("bm25", "q1"))
+    reranked = instrumentation.columns(("bm25+bge", "q1"))
+    assert "model_forward_ms" not in first_stage
+    assert reranked["retrieve_ms"] == first_stage["retrieve_ms"]
+    assert reranked["total_ms"] == pytest.approx(first_stage["retrieve_ms"] + reranked["model_forward_ms"])
+    instrumentation.reset()
+    assert instrumentation.columns(("bm25+bge", "q1")) == {}
+
+def test_scheduler_charges_model_batches_per_pair(enabled):
+    scheduler = RerankScheduler(SleepingReranker(), max_wait_seconds=1.0)
+    futures = []
+    for query_id, num_docs in (("q1", 1), ("q2", 3)):
+        documents = [{"id": f"d{i}", "text": "passage " * (i + 1)} for i in range(num_docs)]
+        with instrumentation.scope([query_id]):
+            futures.append(scheduler.submit(query_id, documents))
+    scheduler.close()
+    for future in futures:
+        future.result(timeout=5)
+
+    q1, q2 = instrumentation.columns("q1"), instrumentation.columns("q2")
+    assert q1["rerank_tokenize_ms"] < q2["rerank_tokenize_ms"]
+    assert q2["model_forward_ms"] == pytest.approx(3 * q1["model_forward_ms"], rel=1e-6), \
+        "One model batch held 1 pair of q1 and 3 of q2"
+
+def test_evaluator_writes_stage_columns(enabled):
+    class Sink:
+        def __init__(self):
+            self.rows = []
+        def write(self, row):
+            self.rows.append(row)
+        def flush(self):
+            pass
+
+    results = {"q1": [{"id": "d1"}], "q2": [{"id": "d2"}]}
+    with instrumentation.scope([("bm25", "q1"), ("bm25", "q2")]), instrumentation.span("retrieve"):
+        time.sleep(0.002)
+    sink = Sink()
+    Evaluator(k=1, cutoffs=[1]).write_rows("bm25", results, {"q1": ["d1"]}, [sink])
+    for row in sink.rows:
+        assert row["retrieve_ms"] > 0 and row["evaluate_ms"] > 0
+        assert row["total_ms"] == pytest.approx(row["retrieve_ms"] + row["evaluate_ms"])
+
+    instrumentation.disable()
+    sink = Sink()
+    Evaluator(k=1, cutoffs=[1]).write_rows("bm25", results, {"q1": ["d1"]}, [sink])
+    assert not any(column.endswith("_ms") for column in sink.rows[0]), "Disabled runs should not add columns"
+
+def test_cost_quality_table_and_pareto_front():
+    assert pareto_front([1.0, 2.0, 3.0, 2.5], [0.3, 0.5, 0.6, 0.4]) == [True, True, True, False]
+    assert pareto_front([1.0, 1.0], [0.5, 0.5]) == [True, True], "Ties do not dominate each other"
+
+    strategies = ["bm25"] * 4 + ["bm25+bge"] * 4 + ["dense"] * 4
+    latencies = [1, 1, 2, 10] + [50, 60, 70, 80] + [60, 70, 80, 90]
+    qualities = [0.2, 0.4, 0.3, 0.3] + [0.6, 0.6, 0.7, 0.5] + [0.3, 0.4, 0.2, float("nan")]
+    rows = cost_quality_table(strategies, latencies, qualities, cost_percentile=50)
+    assert [row["strategy"] for row in rows] == ["bm25", "bm25+bge", "dense"], "Rows should be sorted by latency"
+    assert rows[0]["p50_ms"] == 1.5 and rows[0]["p99_ms"] > 9.0
+    assert rows[2]["queries"] == 3 and rows[2]["quality"] == pytest.approx(0.3)
+    assert [row["pareto"] for row in rows] == [True, True, False]
+    with pytest.raises(ValueError):
+        cost_quality_table(strategies, latencies, qualities, cost_percentile=90)
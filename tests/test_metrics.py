@@ -0,0 +1,54 @@
+import math
+import random
+import pytest
+from evaluation.evaluator import Evaluator
+from evaluation.metrics import compute_metrics, normalize_qrels
+
+def reference_metrics(ranking, judgements, c):
+    grades = normalize_qrels(judgements)
+    top = ranking[:c]
+    rel = [1 if doc_id in grades else 0 for doc_id in top]
+    num_rel = len(grades)
+    dcg = sum(grades.get(doc_id, 0.0) / math.log2(i + 2) for i, doc_id in enumerate(top))
+    ideal = sorted(grades.values(), reverse=True)[:c]
+    idcg = sum(g / math.log2(i + 2) for i, g in enumerate(ideal))
+    first = next((i + 1 for i, r in enumerate(rel) if r), None)
+    ap = sum(sum(rel[:i + 1]) / (i + 1) for i, r in enumerate(rel) if r)
+    return {
+        "precision": sum(rel) / c,
+        "recall": sum(rel) / num_rel if num_rel else 0.0,
+        "ndcg": dcg / idcg if idcg > 0 else 0.0,
+        "mrr": 1.0 / first if first else 0.0,
+        "map": ap / num_rel if num_rel else 0.0,
+    }
+
+def test_metrics_match_reference_on_graded_qrels():
+    rng = random.Random(0)
+    docs = [f"doc{i}" for i in range(50)]
+    rankings = [rng.sample(docs, rng.randint(0, 30)) for _ in range(40)]
+    qrels = [{doc_id: rng.choice([0, 1, 2, 3]) for doc_id in rng.sample(docs, rng.randint(0, 8))} for _ in range(40)]
+    cutoffs = [1, 3, 10, 20]
+
+    metrics = compute_metrics(rankings, qrels, cutoffs)
+    for row, (ranking, judgements) in enumerate(zip(rankings, qrels)):
+        for c in cutoffs:
+            for name, value in reference_metrics(ranking, judgements, c).items():
+                assert metrics[f"{name}@{c}"][row] == pytest.approx(value), f"{name}@{c} differs for query {row}"
+
+def test_binary_metrics_match_performance_check():
+    retrieved = [{"id": "doc1"}, {"id": "doc2"}, {"id": "doc3"}]
+    ground_truth = ["doc1", "doc3"]
+    legacy = Evaluator(k=3).performance_check(retrieved, ground_truth)
+    metrics = compute_metrics([["doc1", "doc2", "doc3"]], [ground_truth], [3])
+
+    assert metrics["precision@3"][0] == pytest.approx(legacy["precision@3"]["value"])
+    assert metrics["recall@3"][0] == pytest.approx(legacy["recall@3"]["value"])
+    assert metrics["ndcg@3"][0] == pytest.approx(legacy["ndcg@3"]["value"])
+
+def test_queries_without_relevant_docs_score_zero():
+    metrics = compute_metrics([["doc1", "doc2"], []], [[], ["doc1"]], [1, 5])
+    assert all(values[0] == 0.0 and values[1] == 0.0 for values in metrics.values())
+
+def test_invalid_cutoffs():
+    with pytest.raises(ValueError):
+        compute_metrics([["doc1"]], [["doc1"]], [0, 5])
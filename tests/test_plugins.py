@@ -0,0 +1,62 @@
+import sys
+from importlib import metadata
+import pytest
+from utils import plugins
+from utils.plugins import LazyRegistry, import_object
+
+@pytest.fixture
+def plugin_module(tmp_path, monkeypatch):
+    (tmp_path / "fake_plugin_module.py").write_text("class FakeRetriever:\n    pass\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "fake_plugin_module"
+    sys.modules.pop("fake_plugin_module", None)
+
+def test_plugins_are_imported_on_first_lookup(plugin_module):
+    registry = LazyRegistry(None, {"fake": f"{plugin_module}:FakeRetriever", "other": "missing_module_xyz:Thing"})
+    assert "fake" in registry and "nope" not in registry and sorted(registry) == ["fake", "other"]
+    assert plugin_module not in sys.modules, "Listing names should not import plugin modules"
+
+    fake_cls = registry["fake"]
+    assert fake_cls.__name__ == "FakeRetriever" and registry.is_loaded("fake")
+    assert registry["fake"] is fake_cls
+    assert not registry.is_loaded("other"), "Only the selected plugin should be imported"
+
+def test_unknown_and_broken_plugins():
+    registry = LazyRegistry(None, {"broken": "missing_module_xyz:Thing"})
+    with pytest.raises(KeyError):
+        registry["unknown"]
+    with pytest.raises(ImportError, match="broken"):
+        registry["broken"]
+    with pytest.raises(ValueError):
+        import_object("no_attribute")
+
+def test_register_replaces_plugin():
+    registry = LazyRegistry(None, {"a": "collections:OrderedDict"})
+    registry["a"]
+    registry.register("a", dict)
+    assert registry["a"] is dict
+
+def test_entry_points_are_discovered(plugin_module, monkeypatch):
+    entry_points = [
+        metadata.EntryPoint("third_party", f"{plugin_module}:FakeRetriever", "rag_bench.retrievers"),
+        metadata.EntryPoint("builtin", "missing_module_xyz:Thing", "rag_bench.retrievers"),
+    ]
+    calls = []
+    def fake_entry_points(group):
+        calls.append(group)
+        return [ep for ep in entry_points if ep.group == group]
+    monkeypatch.setattr(plugins.metadata, "entry_points", fake_entry_points)
+
+    registry = LazyRegistry("rag_bench.retrievers", {"builtin": "collections:OrderedDict"})
+    assert calls == [], "Entry points should be scanned on first use"
+    assert sorted(registry) == ["builtin", "third_party"]
+    assert plugin_module not in sys.modules, "Entry points should load only when selected"
+    assert registry["third_party"].__name__ == "FakeRetriever"
+    assert registry["builtin"].__name__ == "OrderedDict", "Built-in names should shadow entry points"
+    assert calls == ["rag_bench.retrievers"]
+
+def test_builtin_registries_are_lazy():
+    from retrievers.registry import RETRIEVER_REGISTRY
+    from rerankers.registry import RERANKER_REGISTRY
+    assert {"bm25", "bm25_fast", "dense", "hybrid"} <= set(RETRIEVER_REGISTRY) and "bge" in RERANKER_REGISTRY
+    assert RETRIEVER_REGISTRY["bm25_fast"].__name__ == "FastBM25Retriever"
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from evaluation.evaluator import Evaluator
+from retrievers.fast_bm25_retriever import FastBM25Retriever
+from utils.doc_store import DocStore
+from utils.ranked_list import RankedList, ranked_ids
+
+dummy_corpus = [
+    {"id": "doc1", "text": "The Milky Way galaxy is a barred spiral galaxy."},
+    {"id": "doc2", "text": "Black holes are regions of spacetime with extreme gravity."},
+    {"id": "doc3", "text": "Mars is the fourth planet from the Sun."},
+    {"id": "doc4", "text": "The Andromeda galaxy is the nearest large galaxy to the Milky Way."},
+]
+
+def test_ranked_list_behaves_like_result_dicts():
+    ranked = RankedList([2, 0, 3], [3.5, 1.25, 0.0], dummy_corpus)
+    assert ranked.doc_indices.dtype == np.int32 and ranked.scores.dtype == np.float32
+    assert len(ranked) == 3
+    assert ranked[0]["id"] == "doc3" and ranked[0]["text"] == dummy_corpus[2]["text"]
+    assert ranked[-1] == {"id": "doc4", "text": dummy_corpus[3]["text"], "score": 0.0}
+    assert ranked.to_dicts() == [dict(doc) for doc in ranked]
+    assert ranked == ranked.to_dicts(), "A RankedList should compare equal to the equivalent dicts"
+    assert isinstance(ranked[1:], RankedList) and ranked[1:].ids() == ["doc1", "doc4"]
+    assert {**ranked[1], "extra": 1}["score"] == 1.25
+    with pytest.raises(KeyError):
+        ranked[0]["reranker_score"]
+    with pytest.raises(IndexError):
+        ranked[3]
+    with pytest.raises(ValueError):
+        RankedList([0, 1], [1.0], dummy_corpus)
+
+def test_rerank_sorts_head_and_keeps_tail_order():
+    ranked = RankedList([0, 1, 2, 3], [4.0, 3.0, 2.0, 1.0], dummy_corpus)
+    reranked = ranked.rerank([0.5, 2.0, 0.5])
+    assert reranked.ids() == ["doc2", "doc1", "doc3", "doc4"], "Ties should keep first-stage order"
+    assert [doc["reranker_score"] for doc in reranked] == [2.0, 0.5, 0.5, float("-inf")]
+    assert [doc["score"] for doc in reranked] == [3.0, 4.0, 2.0, 1.0]
+
+def test_ids_and_texts_resolve_from_doc_store(tmp_path):
+    store = DocStore.build(dummy_corpus, str(tmp_path / "corpus.store"))
+    ranked = RankedList([3, 1], [2.0, 1.0], store)
+    assert ranked.ids() == ["doc4", "doc2"]
+    assert ranked.texts() == [dummy_corpus[3]["text"], dummy_corpus[1]["text"]]
+    assert ranked == RankedList([3, 1], [2.0, 1.0], dummy_corpus)
+
+def test_evaluator_reads_ids_from_ranked_lists():
+    retriever = FastBM25Retriever()
+    retriever.index(dummy_corpus)
+    ranked = {"q1": retriever.retrieve("milky way galaxy", 3), "q2": retriever.retrieve("mars planet", 3)}
+    as_dicts = {query_id: docs.to_dicts() for query_id, docs in ranked.items()}
+    gt = {"q1": ["doc1", "doc4"], "q2": ["doc3"]}
+    assert ranked_ids(ranked["q2"]) == ranked_ids(as_dicts["q2"])
+
+    evaluator = Evaluator(cutoffs=[1, 3])
+    query_ids, metrics = evaluator.compute_metrics(ranked, gt)
+    expected_ids, expected = evaluator.compute_metrics(as_dicts, gt)
+    assert query_ids == expected_ids
+    for name in expected:
+        assert metrics[name].tolist() == expected[name].tolist(), f"{name} differs for RankedList input"
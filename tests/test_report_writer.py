@@ -0,0 +1,58 @@
+import json
+import os
+import pytest
+from evaluation.report_writer import ReportWriter, read_report, read_runs, merge_reports, export_csv
+
+def write_run(path, rows, metadata=None):
+    with ReportWriter(str(path), metadata or {"topk": 5}) as writer:
+        for row in rows:
+            writer.write(row)
+        return writer.run_id
+
+rows = [
+    {"query_id": "q1", "retriever": "bm25", "precision@5_value": 0.2, "retrieved_doc_ids": ["doc1", "doc2"]},
+    {"query_id": "q2", "retriever": "bm25", "precision@5_value": 0.4, "retrieved_doc_ids": ["doc3"]},
+]
+
+def test_report_round_trip(tmp_path):
+    path = tmp_path / "report.jsonl"
+    run_id = write_run(path, rows)
+
+    assert not os.path.exists(str(path) + ".partial"), "Partial file should be renamed on close"
+    assert read_report(str(path)) == [dict(row, run_id=run_id) for row in rows]
+    runs = read_runs(str(path))
+    assert len(runs) == 1 and runs[0]["complete"] and runs[0]["rows"] == 2
+    assert runs[0]["metadata"] == {"topk": 5}
+
+def test_failed_run_keeps_flushed_rows(tmp_path):
+    path = tmp_path / "report.jsonl"
+    with pytest.raises(RuntimeError):
+        with ReportWriter(str(path), flush_every=1) as writer:
+            writer.write(rows[0])
+            raise RuntimeError("crash")
+
+    partial = str(path) + ".partial"
+    assert not os.path.exists(path), "A failed run must not publish a report"
+    assert [row["query_id"] for row in read_report(partial)] == ["q1"]
+    assert read_runs(partial)[0]["complete"] is False
+
+def test_merge_and_compact(tmp_path):
+    first, second = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    write_run(first, rows)
+    write_run(second, [dict(rows[0], **{"precision@5_value": 0.8})])
+
+    merged = tmp_path / "merged.jsonl"
+    assert merge_reports([str(first), str(second), str(first)], str(merged)) == 3, "Duplicate runs are skipped"
+    assert len(read_runs(str(merged))) == 2
+
+    compacted = tmp_path / "compacted.jsonl"
+    assert merge_reports([str(first), str(second)], str(compacted), latest_only=True) == 2
+    latest = {row["query_id"]: row["precision@5_value"] for row in read_report(str(compacted))}
+    assert latest == {"q1": 0.8, "q2": 0.4}, "Compaction should keep the latest row per query"
+
+def test_export_csv(tmp_path):
+    path = tmp_path / "report.jsonl"
+    write_run(path, rows)
+    assert export_csv(str(path), str(tmp_path / "report.csv")) == 2
+    header = (tmp_path / "report.csv").read_text().splitlines()[0]
+    assert header.startswith("run_id,query_id,retriever")
@@ -0,0 +1,26 @@
+from rerankers.batching import make_token_batches
+
+def test_batches_cover_every_position_once():
+    lengths = [5, 40, 12, 7, 40, 3, 25]
+    batches = make_token_batches(lengths, max_tokens=80, max_batch_size=8)
+    positions = sorted(p for batch in batches for p in batch)
+    assert positions == list(range(len(lengths)))
+
+def test_batches_respect_token_budget():
+    lengths = [5, 40, 12, 7, 40, 3, 25, 9, 11]
+    for batch in make_token_batches(lengths, max_tokens=80, max_batch_size=8):
+        padded = len(batch) * max(lengths[i] for i in batch)
+        assert padded <= 80 or len(batch) == 1, f"Batch {batch} exceeds the token budget"
+
+def test_batches_are_length_sorted():
+    lengths = [5, 40, 12, 7, 40, 3]
+    batches = make_token_batches(lengths, max_tokens=1000, max_batch_size=2)
+    assert [[lengths[i] for i in batch] for batch in batches] == [[40, 40], [12, 7], [5, 3]]
+
+def test_oversized_sequence_gets_its_own_batch():
+    batches = make_token_batches([600, 10, 10], max_tokens=512, max_batch_size=8)
+    assert batches[0] == [0]
+    assert sorted(batches[1]) == [1, 2]
+
+def test_empty_input():
+    assert make_token_batches([], max_tokens=512, max_batch_size=8) == []
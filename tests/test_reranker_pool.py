@@ -0,0 +1,60 @@
+import pytest
+from rerankers.base_reranker import Reranker
+from rerankers.pool import RerankerPool
+from typing import List, Dict, Any
+
+class CountingReranker(Reranker):
+    instances = 0
+
+    def __init__(self):
+        CountingReranker.instances += 1
+        self.calls = 0
+        self.closed = False
+
+    def rerank(self, query: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.calls += 1
+        for doc in documents:
+            doc["reranker_score"] = float(len(doc["text"]))
+        return sorted(documents, key=lambda d: d["reranker_score"], reverse=True)
+
+    def close(self) -> None:
+        self.closed = True
+
+documents = [
+    {"id": "doc1", "text": "Short."},
+    {"id": "doc2", "text": "A somewhat longer passage."},
+]
+
+@pytest.fixture(autouse=True)
+def reset_instances():
+    CountingReranker.instances = 0
+
+def test_pool_loads_each_reranker_once():
+    pool = RerankerPool(registry={"counting": CountingReranker})
+    for _ in range(5):
+        results = pool.rerank("counting", "query", [dict(doc) for doc in documents])
+        assert [doc["id"] for doc in results] == ["doc2", "doc1"]
+
+    assert CountingReranker.instances == 1, "Reranker should be instantiated once per pool"
+    timing = pool.timing_report()["counting"]
+    assert timing["inference_calls"] == 5
+    assert timing["load_seconds"] >= 0.0 and timing["inference_seconds"] >= 0.0
+
+def test_pool_warmup_runs_before_first_query():
+    pool = RerankerPool(registry={"counting": CountingReranker}, warmup_passes=2)
+    reranker = pool.get("counting")
+
+    assert reranker.calls == 2, "Expected two warm-up passes"
+    assert pool.timing_report()["counting"]["inference_calls"] == 0, "Warm-up is not inference time"
+
+def test_pool_close_releases_instances():
+    with RerankerPool(registry={"counting": CountingReranker}) as pool:
+        reranker = pool.get("counting")
+    assert reranker.closed
+    assert pool.timing_report() == {}
+
+def test_pool_unknown_reranker():
+    pool = RerankerPool(registry={"counting": CountingReranker})
+    assert "missing" not in pool
+    with pytest.raises(KeyError):
+        pool.get("missing")
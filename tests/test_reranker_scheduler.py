@@ -0,0 +1,141 @@
+import functools
+import pytest
+from rerankers.base_reranker import Reranker
+from rerankers.pool import RerankerPool
+from rerankers.scheduler import RerankScheduler, supports_scheduling
+from rerankers.score_cache import ScoreCache
+from typing import List, Dict, Any, Tuple
+
+class WordOverlapReranker(Reranker):
+    """
+    Scores a pair by query/passage word overlap; tokenization and scoring are separate steps.
+    """
+    def __init__(self, rerank_depth=None, max_batch_size=4, max_tokens_per_batch=1000):
+        self.rerank_depth = rerank_depth
+        self.max_batch_size = max_batch_size
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.batch_sizes = []
+
+    def encode_pairs(self, pairs: List[Tuple[str, str]]) -> List[Dict[str, List[int]]]:
+        features = []
+        for query, text in pairs:
+            overlap = len(set(query.lower().split()) & set(text.lower().split()))
+            features.append({"input_ids": [overlap] + [0] * len(text.split())})
+        return features
+
+    def score_features(self, features: List[Dict[str, List[int]]]) -> List[float]:
+        self.batch_sizes.append(len(features))
+        return [float(feature["input_ids"][0]) for feature in features]
+
+    def rerank(self, query: str, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        depth = len(documents) if self.rerank_depth is None else min(self.rerank_depth, len(documents))
+        head, tail = documents[:depth], documents[depth:]
+        scores = self.score_features(self.encode_pairs([(query, doc["text"]) for doc in head]))
+        reranked = [{**doc, "reranker_score": score} for doc, score in zip(head, scores)]
+        reranked.sort(key=lambda d: d["reranker_score"], reverse=True)
+        return reranked + [{**doc, "reranker_score": float("-inf")} for doc in tail]
+
+documents = [
+    {"id": "doc1", "text": "Mars is the fourth planet from the Sun."},
+    {"id": "doc2", "text": "The Milky Way galaxy contains our Solar System."},
+    {"id": "doc3", "text": "Black holes have extreme gravity."},
+    {"id": "doc4", "text": "The Sun is a star in the Milky Way galaxy."},
+]
+queries = ["milky way galaxy", "the sun", "black holes", "planet mars"]
+
+def test_scheduler_matches_direct_rerank():
+    reranker = WordOverlapReranker()
+    scheduler = RerankScheduler(reranker, max_wait_seconds=0.5)
+    futures = [scheduler.submit(query, documents) for query in queries]
+    scheduler.close()
+
+    for query, future in zip(queries, futures):
+        expected = WordOverlapReranker().rerank(query, documents)
+        assert future.result(timeout=5) == expected, f"Scheduled result differs for query: {query}"
+
+def test_scheduler_batches_across_queries():
+    reranker = WordOverlapReranker(max_batch_size=8)
+    scheduler = RerankScheduler(reranker, max_wait_seconds=5.0)
+    futures = [scheduler.submit(query, documents) for query in queries]
+    for future in futures:
+        future.result(timeout=5)
+    scheduler.close()
+
+    assert sum(reranker.batch_sizes) == len(queries) * len(documents)
+    assert max(reranker.batch_sizes) > len(documents), "Pairs from different queries should share batches"
+
+def test_partial_batch_runs_after_max_wait():
+    scheduler = RerankScheduler(WordOverlapReranker(max_batch_size=64), max_wait_seconds=0.01)
+    results = scheduler.submit(queries[0], documents).result(timeout=5)
+    scheduler.close()
+    assert [doc["id"] for doc in results][:2] == ["doc2", "doc4"]
+
+def test_scheduler_respects_rerank_depth():
+    scheduler = RerankScheduler(WordOverlapReranker(rerank_depth=2))
+    results = scheduler.submit("sun", documents).result(timeout=5)
+    scheduler.close()
+
+    assert [doc["id"] for doc in results[2:]] == ["doc3", "doc4"], "Tail should keep first-stage order"
+    assert all(doc["reranker_score"] == float("-inf") for doc in results[2:])
+
+def test_scheduler_does_not_modify_input():
+    scheduler = RerankScheduler(WordOverlapReranker())
+    scheduler.submit("sun", documents).result(timeout=5)
+    scheduler.close()
+    assert all("reranker_score" not in doc for doc in documents)
+
+def test_scheduler_requires_split_reranker():
+    class PlainReranker(Reranker):
+        def rerank(self, query, documents):
+            return documents
+
+    assert not supports_scheduling(PlainReranker())
+    with pytest.raises(ValueError):
+        RerankScheduler(PlainReranker())
+
+class CachedWordOverlapReranker(WordOverlapReranker):
+    def __init__(self, score_cache):
+        super().__init__()
+        self.score_cache = score_cache
+
+    def lookup_scores(self, pairs):
+        return self.score_cache.get_many("word-overlap", pairs)
+
+    def store_scores(self, pairs, scores):
+        self.score_cache.put_many("word-overlap", pairs, scores)
+
+def test_scheduler_only_scores_uncached_pairs():
+    cache = ScoreCache()
+    reranker = CachedWordOverlapReranker(cache)
+    scheduler = RerankScheduler(reranker)
+    first = scheduler.submit(queries[0], documents).result(timeout=5)
+    second = scheduler.submit(queries[0], documents).result(timeout=5)
+    scheduler.close()
+
+    assert first == second
+    assert sum(reranker.batch_sizes) == len(documents), "Cached pairs should not reach the model"
+    assert cache.hits == len(documents)
+
+def test_scheduler_reranks_ranked_lists():
+    from utils.ranked_list import RankedList
+    ranked = RankedList([0, 1, 2, 3], [4.0, 3.0, 2.0, 1.0], documents)
+    scheduler = RerankScheduler(WordOverlapReranker(rerank_depth=3), max_wait_seconds=0.5)
+    futures = [scheduler.submit(query, ranked) for query in queries]
+    scheduler.close()
+
+    for query, future in zip(queries, futures):
+        result = future.result(timeout=5)
+        assert isinstance(result, RankedList), "RankedList inputs should stay compact"
+        assert result == WordOverlapReranker(rerank_depth=3).rerank(query, ranked.to_dicts())
+
+def test_scheduler_batches_are_charged_to_pool():
+    pool = RerankerPool(registry={"overlap": WordOverlapReranker})
+    scheduler = RerankScheduler(pool.get("overlap"), max_wait_seconds=0.5,
+                                on_batch=functools.partial(pool.record_inference, "overlap"))
+    for future in [scheduler.submit(query, documents) for query in queries]:
+        future.result(timeout=5)
+    scheduler.close()
+
+    timing = pool.timing_report()["overlap"]
+    assert timing["inference_calls"] == scheduler.batches > 0, "Every model batch should count as an inference call"
+    assert timing["inference_seconds"] == pytest.approx(scheduler.busy_seconds)
@@ -0,0 +1,79 @@
+from rerankers.score_cache import ScoreCache, pair_key
+
+pairs = [("solar system", "Mars is the fourth planet."), ("solar system", "The Milky Way galaxy.")]
+
+def test_cache_round_trip(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.sqlite"))
+    assert cache.get_many("bge@main", pairs) == [None, None]
+    cache.put_many("bge@main", pairs, [1.5, -0.25])
+    assert cache.get_many("bge@main", pairs) == [1.5, -0.25]
+    assert cache.hits == 2 and cache.misses == 2
+    assert cache.hit_rate == 0.5
+
+def test_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "scores.sqlite")
+    cache = ScoreCache(path)
+    cache.put_many("bge@main", pairs, [1.5, -0.25])
+    cache.close()
+
+    reopened = ScoreCache(path, memory_entries=0)
+    assert reopened.get_many("bge@main", pairs) == [1.5, -0.25], "Scores should be read back from disk"
+    assert len(reopened) == 2
+
+def test_keys_depend_on_namespace_query_and_text():
+    key = pair_key("bge@main:max_length=512", "query", "text")
+    assert key != pair_key("bge@main:max_length=256", "query", "text")
+    assert key != pair_key("bge@main:max_length=512", "other query", "text")
+    assert key != pair_key("bge@main:max_length=512", "query", "edited text")
+
+    cache = ScoreCache()
+    cache.put_many("bge@main", pairs, [1.5, -0.25])
+    assert cache.get_many("bge@v2", pairs) == [None, None], "Another revision must not reuse scores"
+
+def test_size_bounded_eviction_drops_least_recently_used():
+    cache = ScoreCache(max_entries=2, memory_entries=0)
+    cache.put_many("ns", [("q", "a")], [1.0])
+    cache.put_many("ns", [("q", "b")], [2.0])
+    cache.get_many("ns", [("q", "a")])
+    cache.put_many("ns", [("q", "c")], [3.0])
+
+    assert len(cache) == 2
+    assert cache.get_many("ns", [("q", "a"), ("q", "b"), ("q", "c")]) == [1.0, None, 3.0]
+
+def test_invalidate_by_model_name():
+    cache = ScoreCache()
+    cache.put_many("bge@main:max_length=512", pairs, [1.0, 2.0])
+    cache.put_many("other@main:max_length=512", pairs, [3.0, 4.0])
+
+    assert cache.invalidate("bge") == 2
+    assert cache.get_many("bge@main:max_length=512", pairs) == [None, None]
+    assert cache.get_many("other@main:max_length=512", pairs) == [3.0, 4.0]
+    assert cache.invalidate() == 2
+    assert len(cache) == 0
+
+def test_lookups_do_not_write(tmp_path):
+    path = str(tmp_path / "scores.sqlite")
+    cache = ScoreCache(path)
+    cache.put_many("ns", pairs, [1.0, 2.0])
+    changes = cache._conn.total_changes
+    for _ in range(3):
+        assert cache.get_many("ns", pairs) == [1.0, 2.0]
+    assert cache._conn.total_changes == changes and not cache._conn.in_transaction, "Hits should not touch SQLite"
+    cache.close()
+
+    # Recency of the hits is written back on close
+    reopened = ScoreCache(path)
+    last_used = dict(reopened._conn.execute("SELECT key, last_used FROM scores").fetchall())
+    assert set(last_used.values()) == {4}, "Both rows should carry the clock of the last lookup"
+
+def test_context_manager_commits_on_error(tmp_path):
+    path = str(tmp_path / "scores.sqlite")
+    try:
+        with ScoreCache(path) as cache:
+            cache.put_many("ns", pairs, [1.0, 2.0])
+            cache.get_many("ns", pairs)
+            raise RuntimeError("run failed")
+    except RuntimeError:
+        pass
+    cache.close()
+    assert ScoreCache(path, memory_entries=0).get_many("ns", pairs) == [1.0, 2.0]
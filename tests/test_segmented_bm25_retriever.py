@@ -0,0 +1,90 @@
+import random
+import numpy as np
+import pytest
+from benchmarks.synthetic import make_vocab
+from retrievers.bm25_retriever import BM25Retriever
+from retrievers.fast_bm25_retriever import FastBM25Retriever
+from retrievers.segmented_bm25_retriever import SegmentedBM25Retriever
+from typing import List, Dict
+
+vocab = make_vocab(200)
+queries = [vocab[0], " ".join(vocab[1:4]), f"{vocab[5]} {vocab[5]} {vocab[150]}", f"{vocab[199]} {vocab[0]} {vocab[1]}",
+           "unknown", " ".join(vocab[0:200:7])]
+
+def assert_matches_rebuild(retriever: SegmentedBM25Retriever, live: List[Dict[str, str]]) -> None:
+    reference = FastBM25Retriever()
+    reference.index(live)
+    assert list(retriever.corpus) == live, "Live corpus should be in rebuild order"
+    for query in queries:
+        docs, scores = retriever.score(query)
+        expected_docs, expected_scores = reference.score(query)
+        assert np.array_equal(docs, expected_docs), f"Scored documents differ for query: {query}"
+        assert np.array_equal(scores, expected_scores), f"Scores differ from a rebuild for query: {query}"
+        assert retriever.retrieve(query, 25) == reference.retrieve(query, 25)
+
+@pytest.mark.parametrize("background_merge", [False, True])
+def test_updates_match_full_rebuild(background_merge, zipf_docs):
+    rng = random.Random(7)
+    live = zipf_docs(300, seed=7)
+    retriever = SegmentedBM25Retriever(merge_factor=3, background_merge=background_merge)
+    retriever.index(live)
+    next_id = len(live)
+
+    for _ in range(30):
+        if rng.random() < 0.5:
+            added = zipf_docs(rng.randint(1, 20), seed=rng.randrange(2 ** 32), id_offset=next_id)
+            next_id += len(added)
+            retriever.add_documents(added)
+            live = live + added
+        else:
+            deleted = set(rng.sample([doc["id"] for doc in live], rng.randint(1, 25)))
+            assert retriever.delete_documents(deleted) == len(deleted)
+            live = [doc for doc in live if doc["id"] not in deleted]
+        retriever.wait_for_merges()
+        assert_matches_rebuild(retriever, live)
+
+    assert retriever.num_merges > 0, "Small segments should have been merged"
+    assert retriever.num_segments < 31
+
+def test_ranking_matches_rank_bm25_after_updates(zipf_docs):
+    corpus = zipf_docs(100, seed=3)
+    retriever = SegmentedBM25Retriever(background_merge=False)
+    retriever.index(corpus[:80])
+    retriever.delete_documents([doc["id"] for doc in corpus[:10]])
+    retriever.add_documents(corpus[80:])
+
+    reference = BM25Retriever()
+    reference.index(corpus[10:])
+    for query in queries:
+        expected = reference.retrieve(query, 10)
+        results = retriever.retrieve(query, 10)
+        assert results.ids() == expected.ids(), f"Ranking differs from rank_bm25 for query: {query}"
+        assert [doc["score"] for doc in results] == pytest.approx([doc["score"] for doc in expected])
+
+def test_invalid_updates(zipf_docs):
+    retriever = SegmentedBM25Retriever(background_merge=False)
+    with pytest.raises(ValueError):
+        retriever.retrieve(vocab[1], 3)
+    retriever.index(zipf_docs(5))
+    with pytest.raises(ValueError):
+        retriever.add_documents(zipf_docs(2, id_offset=4))
+    with pytest.raises(ValueError):
+        retriever.delete_documents(["doc1", "missing"])
+    assert len(retriever.corpus) == 5, "A rejected delete should not remove anything"
+
+    retriever.delete_documents([f"doc{i}" for i in range(5)])
+    assert len(retriever.retrieve(vocab[1], 3)) == 0
+
+def test_default_updates_rebuild_the_index(zipf_docs):
+    corpus = zipf_docs(50, seed=1)
+    retriever = FastBM25Retriever()
+    retriever.index(corpus[:40])
+    retriever.add_documents(corpus[40:])
+    retriever.delete_documents(["doc0", "doc5"])
+
+    reference = FastBM25Retriever()
+    reference.index([doc for doc in corpus if doc["id"] not in ("doc0", "doc5")])
+    for query in queries:
+        assert retriever.retrieve(query, 10) == reference.retrieve(query, 10)
+    with pytest.raises(ValueError):
+        retriever.delete_documents(["doc0"])
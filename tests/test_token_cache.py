@@ -0,0 +1,51 @@
+import pytest
+from rerankers.token_cache import DocumentTokenCache, tokenize_pairs
+
+transformers = pytest.importorskip("transformers")
+
+vocab = [
+    "[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]",
+    "what", "is", "the", "capital", "of", "france", "paris", "and", "largest", "city",
+    "galaxy", "solar", "system", "milky", "way", "contains", "our", "sun", "a", "star", "##s", ".",
+]
+
+@pytest.fixture
+def tokenizer(tmp_path):
+    vocab_file = tmp_path / "vocab.txt"
+    vocab_file.write_text("\n".join(vocab))
+    return transformers.BertTokenizerFast(vocab_file=str(vocab_file))
+
+pairs = [
+    ("what is the sun", "the sun is a star."),
+    ("what is the sun", "the milky way galaxy contains our solar system."),
+    ("solar system", "the sun is a star."),
+    ("capital of france", "paris is the capital and largest city of france."),
+]
+
+def test_cached_inputs_match_tokenizer(tokenizer):
+    cache = DocumentTokenCache(tokenizer)
+    assert cache.enabled, "Pair layout of a BERT tokenizer should be recognised"
+    assert cache.encode_pairs(pairs, max_length=512) == tokenize_pairs(tokenizer, pairs, 512)
+
+def test_passages_are_tokenized_once(tokenizer):
+    cache = DocumentTokenCache(tokenizer)
+    cache.encode_pairs(pairs, max_length=512)
+    cache.encode_pairs(pairs, max_length=512)
+    assert len(cache) == 3, "Each distinct passage should be stored once"
+    assert cache.misses == 3
+
+def test_truncated_pairs_fall_back_to_tokenizer(tokenizer):
+    cache = DocumentTokenCache(tokenizer)
+    assert cache.encode_pairs(pairs, max_length=10) == tokenize_pairs(tokenizer, pairs, 10)
+    assert cache.fallbacks > 0
+
+def test_cache_round_trip_on_disk(tokenizer, tmp_path):
+    path = str(tmp_path / "corpus.tokens")
+    cache = DocumentTokenCache(tokenizer, path)
+    expected = cache.encode_pairs(pairs, max_length=512)
+    cache.save()
+
+    reloaded = DocumentTokenCache(tokenizer, path)
+    assert len(reloaded) == 3
+    assert reloaded.encode_pairs(pairs, max_length=512) == expected
+    assert reloaded.misses == 0, "Passages should come from the saved cache"
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from retrievers.bm25_retriever import BM25Retriever
+from retrievers.fast_bm25_retriever import FastBM25Retriever
+from retrievers.segmented_bm25_retriever import SegmentedBM25Retriever
+from utils.tokenizer import Analyzer, Vocabulary, simple_tokenize, s_stem
+
+dummy_corpus = [
+    {"id": "doc1", "text": "The Milky Way galaxy is a barred spiral galaxy that contains our Solar System."},
+    {"id": "doc2", "text": "Black holes are regions of spacetime where gravity is so strong that nothing can escape from it."},
+    {"id": "doc3", "text": "Mars is the fourth planet from the Sun and is often referred to as the Red Planet."},
+    {"id": "doc4", "text": "The James Webb Space Telescope is the most powerful telescope ever launched into space."},
+    {"id": "doc5", "text": "A supernova is the explosion of a star, the largest explosion that takes place in space."},
+    {"id": "doc6", "text": "Saturn is the sixth planet from the Sun and is famous for its beautiful ring system."}
+]
+
+queries = ["galaxies and Solar Systems", "planets from the Sun!", "What is a Black hole?", "the", ""]
+
+def custom_analyzer() -> Analyzer:
+    return Analyzer(strip_punctuation=True, stopwords="english", stemmer="s")
+
+def test_default_analyzer_matches_simple_tokenize():
+    analyzer = Analyzer()
+    for doc in dummy_corpus:
+        assert analyzer.analyze(doc["text"]) == simple_tokenize(doc["text"])
+
+def test_analyzer_pipeline():
+    analyzer = custom_analyzer()
+    assert analyzer.analyze("The Black holes, and the galaxies!") == ["black", "hole", "galaxy"]
+    assert Analyzer(stopwords=["foo"]).analyze("Foo bar foo") == ["bar"]
+    assert Analyzer(lowercase=False).analyze("Foo bar") == ["Foo", "bar"]
+    with pytest.raises(ValueError):
+        Analyzer(stopwords="klingon")
+    with pytest.raises(ValueError):
+        Analyzer(stemmer="unknown")
+
+def test_s_stem():
+    assert [s_stem(w) for w in ["queries", "boxes", "cats", "glass", "virus", "shoes", "is"]] == [
+        "query", "boxe", "cat", "glass", "virus", "shoe", "is"
+    ]
+
+def test_analyzer_memoizes_tokens():
+    analyzer = Analyzer(stemmer="s", cache_size=2)
+    analyzer.analyze("cats cats dogs birds")
+    assert analyzer._cache == {"cats": "cat", "dogs": "dog"}, "Cache should stop growing at cache_size"
+    assert analyzer.analyze("birds cats") == ["bird", "cat"]
+
+def test_analyzer_config_round_trip():
+    analyzer = custom_analyzer()
+    restored = Analyzer.from_config(analyzer.config())
+    assert restored.config() == analyzer.config()
+    assert Analyzer.from_config(Analyzer(stopwords=["b", "a"]).config()).stopwords == {"a", "b"}
+
+def test_vocabulary_interns_int32_ids():
+    vocabulary = Vocabulary()
+    ids, lengths = vocabulary.encode_texts(["b a b", "", "c a"], Analyzer())
+    assert ids.dtype == np.int32 and lengths.tolist() == [3, 0, 2]
+    assert ids.tolist() == [0, 1, 0, 2, 1], "Ids should follow first appearance"
+    assert vocabulary.lookup(["c", "zzz", "b"]) == [2, 0], "Unknown terms should be dropped"
+    assert vocabulary.encode(["a", "d"], add=False).tolist() == [1]
+    assert len(vocabulary) == 3
+
+@pytest.mark.parametrize("retriever_cls", [FastBM25Retriever, SegmentedBM25Retriever])
+def test_custom_analyzer_matches_bm25(retriever_cls):
+    expected = BM25Retriever(analyzer=custom_analyzer())
+    expected.index(dummy_corpus)
+    retriever = retriever_cls(analyzer=custom_analyzer())
+    retriever.index(dummy_corpus)
+    for query in queries:
+        exp, act = expected.retrieve(query, 4), retriever.retrieve(query, 4)
+        assert [doc["id"] for doc in act] == [doc["id"] for doc in exp], f"Rankings differ for {query!r}"
+        assert [doc["score"] for doc in act] == pytest.approx([doc["score"] for doc in exp])
+
+def test_chunked_indexing_matches_single_chunk():
+    single = FastBM25Retriever()
+    single.index_chunks([dummy_corpus], dummy_corpus)
+    chunked = FastBM25Retriever()
+    chunked.index_chunks([dummy_corpus[:2], dummy_corpus[2:5], dummy_corpus[5:]], dummy_corpus)
+    for name in FastBM25Retriever.index_arrays:
+        assert np.array_equal(getattr(single, name), getattr(chunked, name)), f"{name} differs"
+    assert chunked.postings_docs.dtype == np.int32 and chunked.postings_tfs.dtype == np.int32
+
+def test_analyzer_is_saved_with_index(tmp_path):
+    retriever = FastBM25Retriever(analyzer=custom_analyzer())
+    retriever.index(dummy_corpus)
+    assert retriever.cache_config()["tokenizer"] == custom_analyzer().config()
+    retriever.save_index(str(tmp_path))
+
+    loaded = FastBM25Retriever()
+    loaded.load_index(str(tmp_path), dummy_corpus)
+    assert loaded.analyzer.config() == custom_analyzer().config(), "Queries should use the index's analyzer"
+    for query in queries:
+        assert loaded.retrieve(query, 4) == retriever.retrieve(query, 4)
@@ -0,0 +1,68 @@
+#abstraction for text embedding models used by dense retrievers
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Iterator, Tuple
+
+import numpy as np
+
+
+class BaseEmbedder(ABC):
+    """
+    Base class for all embedders.
+    An embedder maps a list of texts to a float32 matrix of shape (len(texts), dim).
+    """
+    dim: int
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a single batch of texts.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dim).
+        """
+        pass
+
+    def config(self) -> Dict[str, Any]:
+        """
+        Everything that determines the embeddings (used to key persisted indexes).
+        """
+        return {"name": type(self).__name__, "dim": self.dim}
+
+    def iter_batches(self, texts: List[str], batch_size: int = 32) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Embed texts in batches of similar length, longest first, to minimise padding.
+
+        Yields:
+            Tuples of (positions in `texts`, embeddings for those positions).
+        """
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        for start in range(0, len(order), batch_size):
+            positions = order[start:start + batch_size]
+            yield positions, self.embed([texts[i] for i in positions])
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Embed any number of texts with length-sorted batching, returned in input order.
+        """
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for positions, batch in self.iter_batches(texts, batch_size):
+            embeddings[positions] = batch
+        return embeddings
+
+
+def load_embedder(name: str) -> BaseEmbedder:
+    """
+    Build an embedder from a CLI-style name.
+    - "hashing" or "hashing:<dim>": dependency-free feature-hashing embedder.
+    - anything else: a Hugging Face model name, mean-pooled on CPU (imports torch lazily).
+    """
+    if name == "hashing" or name.startswith("hashing:"):
+        from utils.hashing_embedder import HashingEmbedder
+        dim = int(name.split(":", 1)[1]) if ":" in name else 256
+        return HashingEmbedder(dim=dim)
+
+    from utils.hf_embedder import HFEmbedder
+    return HFEmbedder(model_name=name)
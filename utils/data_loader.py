@@ -1 +1,107 @@
-#data loader script that loads queries and documents from the specified path
\ No newline at end of file
+#data loader script that loads queries and documents from the specified path
+import gzip
+import json
+import logging
+import time
+from typing import List, Dict, Any, Iterable, Iterator, IO
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+def open_text(path: str) -> IO[str]:
+    """
+    Open a text file for reading, decompressing it on the fly if it ends in .gz.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def is_jsonl(path: str) -> bool:
+    return path.endswith((".jsonl", ".jsonl.gz"))
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the JSON objects of a data file.
+
+    JSONL files (.jsonl / .jsonl.gz) are read one line at a time; blank lines are skipped.
+    Other files are parsed as a single JSON array, which is loaded in full.
+    """
+    with open_text(path) as f:
+        if not is_jsonl(path):
+            yield from json.load(f)
+            return
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"Invalid JSON on line {line_number} of {path}: {exc}") from exc
+
+
+def iter_documents(path: str) -> Iterator[Dict[str, str]]:
+    """
+    Yield {"id", "text"} documents from a corpus file (JSON array or JSONL, optionally gzipped).
+    """
+    for position, record in enumerate(iter_records(path)):
+        if "id" not in record or "text" not in record:
+            raise ValueError(f"Document {position} in {path} needs 'id' and 'text' fields")
+        yield record
+
+
+def iter_queries(path: str) -> Iterator[Dict[str, str]]:
+    """
+    Yield {"query_id", "text"} queries from a query file (JSON array or JSONL, optionally gzipped).
+    """
+    for position, record in enumerate(iter_records(path)):
+        if "query_id" not in record or "text" not in record:
+            raise ValueError(f"Query {position} in {path} needs 'query_id' and 'text' fields")
+        yield record
+
+
+def iter_chunks(items: Iterable[Any], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Any]]:
+    """
+    Group an iterable into lists of at most `chunk_size` items, holding one chunk at a time.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_document_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict[str, str]]]:
+    """
+    Stream a corpus file as chunks of documents, logging ingestion throughput at the end.
+    """
+    start = time.perf_counter()
+    num_docs = 0
+    for chunk in iter_chunks(iter_documents(path), chunk_size):
+        num_docs += len(chunk)
+        yield chunk
+    elapsed = time.perf_counter() - start
+    logger.info(f"Read {num_docs} documents from {path} in {elapsed:.2f}s "
+                f"({num_docs / max(elapsed, 1e-9):.0f} docs/sec)")
+
+
+def load_corpus(path: str) -> List[Dict[str, str]]:
+    """
+    Load a whole corpus file into a list of {"id", "text"} documents.
+    """
+    return [doc for chunk in load_document_chunks(path) for doc in chunk]
+
+
+def load_queries(path: str) -> List[Dict[str, str]]:
+    """
+    Load a whole query file into a list of {"query_id", "text"} queries.
+    """
+    return list(iter_queries(path))
@@ -0,0 +1,143 @@
+#offset-indexed, memory-mapped document store
+import hashlib
+import json
+import logging
+import os
+import shutil
+from typing import List, Dict, Any, Iterator, Iterable, Optional
+
+from utils.data_loader import load_document_chunks
+from utils.string_table import StringTable, SortedStringIndex, write_string_table
+
+logger = logging.getLogger(__name__)
+
+DOC_STORE_FORMAT_VERSION = 1
+META_FILE = "meta.json"
+
+
+class DocStore:
+    """
+    Read-only corpus backed by packed files that are memory-mapped on open.
+
+    Layout of a store directory:
+        texts.bin / texts_offsets.npy   passage texts, packed in corpus order (offset, length)
+        ids.bin / ids_offsets.npy       doc ids in corpus order
+        id_index.*                      doc id -> position, as a sorted string table
+
+    Opening reads only the metadata, so startup time does not depend on corpus size, and
+    pages of text are loaded only for passages that are actually read. A DocStore is a
+    sequence of {"id", "text"} dicts, so it can be passed wherever a corpus list is expected.
+
+    The content fingerprint (see retrievers.index_cache.corpus_fingerprint) is computed while
+    the store is built and kept in its metadata, so index caches can be keyed without
+    rereading the corpus.
+    """
+    def __init__(self, path: str) -> None:
+        with open(os.path.join(path, META_FILE), "r") as f:
+            self.meta = json.load(f)
+        self.path = path
+        self.texts = StringTable(os.path.join(path, "texts"))
+        self.ids = StringTable(os.path.join(path, "ids"))
+        self.id_index = SortedStringIndex.load(os.path.join(path, "id_index"))
+
+    @staticmethod
+    def build(documents: Iterable[Dict[str, Any]], path: str, source: Optional[Dict[str, Any]] = None) -> "DocStore":
+        """
+        Write a store from an iterable of {"id", "text"} documents, consumed in one pass.
+        Files are written to a temporary directory and renamed into place.
+        """
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        positions: Dict[str, int] = {}
+        ids: List[str] = []
+        digest = hashlib.sha256()
+
+        def texts():
+            for doc in documents:
+                doc_id = str(doc["id"])
+                if doc_id in positions:
+                    raise ValueError(f"Duplicate document id: {doc_id}")
+                positions[doc_id] = len(ids)
+                ids.append(doc_id)
+                # Same encoding as retrievers.index_cache.corpus_fingerprint()
+                digest.update(doc_id.encode("utf-8"))
+                digest.update(b"\x00")
+                digest.update(doc["text"].encode("utf-8"))
+                digest.update(b"\x01")
+                yield doc["text"]
+
+        write_string_table(os.path.join(tmp_path, "texts"), texts())
+        write_string_table(os.path.join(tmp_path, "ids"), ids)
+        SortedStringIndex.write(os.path.join(tmp_path, "id_index"), positions)
+        with open(os.path.join(tmp_path, META_FILE), "w") as f:
+            json.dump({"format_version": DOC_STORE_FORMAT_VERSION, "num_docs": len(ids),
+                       "fingerprint": digest.hexdigest(), "source": source or {}}, f, indent=2)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        os.rename(tmp_path, path)
+        return DocStore(path)
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """
+        Content hash recorded when the store was built (None for stores built before it was recorded).
+        """
+        return self.meta.get("fingerprint")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, idx: int) -> Dict[str, str]:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(f"Document index {idx} out of range")
+        return {"id": self.ids[idx], "text": self.texts[idx]}
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for idx in range(len(self)):
+            yield {"id": self.ids[idx], "text": self.texts[idx]}
+
+    def index_of(self, doc_id: str) -> Optional[int]:
+        return self.id_index.get(str(doc_id))
+
+    def get_text(self, doc_id: str, default: Optional[str] = None) -> Optional[str]:
+        """
+        Passage text for a doc id, read from the memory-mapped text file.
+        """
+        idx = self.index_of(doc_id)
+        return self.texts[idx] if idx is not None else default
+
+
+def default_store_path(corpus_path: str) -> str:
+    return os.path.splitext(corpus_path)[0] + ".store"
+
+
+def source_info(corpus_path: str) -> Dict[str, Any]:
+    stat = os.stat(corpus_path)
+    return {"path": os.path.abspath(corpus_path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def open_doc_store(corpus_path: str, store_path: Optional[str] = None) -> DocStore:
+    """
+    Open the store built from `corpus_path` (a JSON array or JSONL file of {"id", "text"}
+    documents, optionally gzipped), building it on first use or when the corpus file has
+    changed since it was built. JSONL corpora are streamed into the store chunk by chunk.
+    By default the store lives next to the corpus (`data/corpus.json` -> `data/corpus.store/`).
+    """
+    store_path = store_path or default_store_path(corpus_path)
+    meta_path = os.path.join(store_path, META_FILE)
+    if os.path.exists(meta_path):
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        if meta.get("format_version") == DOC_STORE_FORMAT_VERSION and meta.get("source") == source_info(corpus_path):
+            return DocStore(store_path)
+        logger.info(f"Document store at {store_path} is out of date, rebuilding")
+
+    logger.info(f"Building document store for {corpus_path} at {store_path}")
+    documents = (doc for chunk in load_document_chunks(corpus_path) for doc in chunk)
+    return DocStore.build(documents, store_path, source=source_info(corpus_path))
@@ -0,0 +1,34 @@
+import zlib
+from typing import List, Dict, Any
+
+import numpy as np
+
+from utils.base_embedder import BaseEmbedder
+from utils.tokenizer import simple_tokenize
+
+
+class HashingEmbedder(BaseEmbedder):
+    """
+    Dependency-free embedder based on signed feature hashing of tokens.
+
+    Each token is hashed (crc32, so results are stable across processes) to a dimension and a
+    sign; vectors are L2-normalised term counts. It has no learned weights, which makes it
+    suitable for tests and for exercising the dense pipeline without downloading a model.
+    """
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = dim
+
+    def config(self) -> Dict[str, Any]:
+        return {"name": "hashing", "dim": self.dim}
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.array([zlib.crc32(token.encode("utf-8")) for token in simple_tokenize(text)], dtype=np.int64)
+            if len(hashes) == 0:
+                continue
+            signs = np.where(hashes & (1 << 31), -1.0, 1.0).astype(np.float32)
+            np.add.at(embeddings[row], hashes % self.dim, signs)
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
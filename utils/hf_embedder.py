@@ -0,0 +1,51 @@
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModel
+
+from utils.base_embedder import BaseEmbedder
+
+
+class HFEmbedder(BaseEmbedder):
+    """
+    Bi-encoder embedder for any Hugging Face encoder model, mean-pooled and L2-normalised.
+    Runs on CPU by default.
+    """
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        device: str = "cpu",
+        max_length: int = 256,
+        num_threads: Optional[int] = None
+    ):
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.model_name = model_name
+        self.device = device
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).to(self.device)
+        self.model.eval()
+        self.dim = self.model.config.hidden_size
+
+    def config(self) -> Dict[str, Any]:
+        return {"name": "hf", "model_name": self.model_name, "max_length": self.max_length, "pooling": "mean"}
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            return_tensors="pt",
+            max_length=self.max_length
+        ).to(self.device)
+
+        with torch.inference_mode():
+            hidden = self.model(**encodings).last_hidden_state
+
+        # Mean pooling over non-padding tokens
+        mask = encodings["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+        return pooled.cpu().numpy().astype(np.float32)
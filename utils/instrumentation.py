@@ -0,0 +1,215 @@
+#per-query stage timing spans; no-ops unless instrumentation is enabled
+import threading
+import time
+from typing import List, Dict, Any, Hashable, Iterable, Optional
+
+# Stages timed by the pipeline. Tokenize and encode run inside retrieve, so they are not
+# added again to total_ms
+STAGES = ("tokenize", "encode", "retrieve", "rerank_tokenize", "model_forward", "evaluate")
+NESTED_STAGES = ("tokenize", "encode")
+
+_enabled = False
+_local = threading.local()
+_lock = threading.Lock()
+_durations: Dict[Hashable, Dict[str, float]] = {}
+_counts: Dict[Hashable, Dict[str, int]] = {}
+_parents: Dict[Hashable, Hashable] = {}
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """
+    Drop everything recorded so far (e.g. once a retriever's rows are written).
+    """
+    with _lock:
+        _durations.clear()
+        _counts.clear()
+        _parents.clear()
+
+
+class _NullContext:
+    """
+    Shared do-nothing context returned while disabled, so a span costs one call and a flag check.
+    """
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullContext":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULL = _NullContext()
+
+
+class _Scope:
+    """
+    Stage totals for one unit of work (a batch of queries, one query, one model batch) whose
+    time is shared equally by `keys`. A key may repeat, e.g. once per (query, passage) pair
+    of a model batch, to weight its share.
+    """
+    __slots__ = ("keys", "totals", "lock", "previous")
+
+    def __init__(self, keys: List[Hashable]) -> None:
+        self.keys = keys
+        self.totals: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.previous = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        # Spans from helper threads (see use_scope) may add concurrently
+        with self.lock:
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+
+    def __enter__(self) -> "_Scope":
+        self.previous = getattr(_local, "scope", None)
+        _local.scope = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _local.scope = self.previous
+        if self.keys and self.totals:
+            share = 1.0 / len(self.keys)
+            with _lock:
+                for key in self.keys:
+                    durations = _durations.setdefault(key, {})
+                    for stage, seconds in self.totals.items():
+                        durations[stage] = durations.get(stage, 0.0) + seconds * share
+        return False
+
+
+class _Span:
+    __slots__ = ("stage", "scope", "start")
+
+    def __init__(self, stage: str, scope: _Scope) -> None:
+        self.stage = stage
+        self.scope = scope
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.scope.add(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _UseScope:
+    __slots__ = ("scope", "previous")
+
+    def __init__(self, scope: _Scope) -> None:
+        self.scope = scope
+
+    def __enter__(self) -> "_UseScope":
+        self.previous = getattr(_local, "scope", None)
+        _local.scope = self.scope
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _local.scope = self.previous
+        return False
+
+
+def scope(keys: Iterable[Hashable]):
+    """
+    Attribute spans opened in this thread inside the block to `keys`, each getting an equal
+    share (batched work is amortized over the queries of the batch).
+    """
+    if not _enabled:
+        return _NULL
+    return _Scope(list(keys))
+
+
+def span(stage: str):
+    """
+    Time a stage of the enclosing scope. Outside a scope, or while disabled, this does nothing.
+    """
+    if not _enabled:
+        return _NULL
+    current = getattr(_local, "scope", None)
+    if current is None:
+        return _NULL
+    return _Span(stage, current)
+
+
+def current_scope() -> Optional[_Scope]:
+    """
+    The scope of this thread, to hand to work that runs on other threads (see use_scope).
+    """
+    if not _enabled:
+        return None
+    return getattr(_local, "scope", None)
+
+
+def use_scope(current: Optional[_Scope]):
+    """
+    Make spans in this (helper) thread add to a scope opened in another thread.
+    """
+    if current is None:
+        return _NULL
+    return _UseScope(current)
+
+
+def current_keys() -> List[Hashable]:
+    current = current_scope()
+    return list(current.keys) if current is not None else []
+
+
+def count(key: Hashable, name: str, value: int) -> None:
+    """
+    Record a per-query counter such as the number of candidates.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _counts.setdefault(key, {})[name] = value
+
+
+def link(key: Hashable, parent: Hashable) -> None:
+    """
+    Make `key` include everything recorded for `parent`, e.g. a reranked strategy includes
+    the first-stage retrieval it reranked.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _parents[key] = parent
+
+
+def columns(key: Hashable) -> Dict[str, Any]:
+    """
+    Report columns for `key` and its linked parents: "<stage>_ms" per recorded stage,
+    "total_ms" over the top-level stages, and the counters.
+    """
+    if not _enabled:
+        return {}
+    durations: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    with _lock:
+        while key is not None:
+            for stage, seconds in _durations.get(key, {}).items():
+                durations[stage] = durations.get(stage, 0.0) + seconds
+            for name, value in _counts.get(key, {}).items():
+                counts.setdefault(name, value)
+            key = _parents.get(key)
+    if not durations and not counts:
+        return {}
+    ordered = [stage for stage in STAGES if stage in durations] + [stage for stage in durations if stage not in STAGES]
+    row: Dict[str, Any] = {f"{stage}_ms": 1000.0 * durations[stage] for stage in ordered}
+    row["total_ms"] = 1000.0 * sum(seconds for stage, seconds in durations.items() if stage not in NESTED_STAGES)
+    row.update(counts)
+    return row
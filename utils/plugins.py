@@ -0,0 +1,110 @@
+#name -> import path registries that import a plugin only when it is selected
+import importlib
+import logging
+import threading
+from collections.abc import Mapping
+from importlib import metadata
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def import_object(path: str) -> Any:
+    """
+    Import "package.module:attribute" and return the attribute.
+    """
+    module_name, _, attribute = path.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Plugin path must look like 'package.module:attribute', got {path!r}")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class LazyRegistry(Mapping):
+    """
+    Read-only mapping of plugin name -> class whose modules are imported on first lookup.
+
+    Built-in plugins are given as "package.module:Class" paths, so listing or checking names
+    (`in`, iteration, len) imports nothing; `registry[name]` imports only that plugin's module.
+    Third-party packages can add plugins through the `group` entry point, e.g. in setup.py:
+
+        entry_points={"rag_bench.retrievers": ["my_retriever = my_package.retriever:MyRetriever"]}
+
+    Entry points are discovered on first use and loaded only when selected. A built-in name
+    shadows an entry point with the same name.
+
+    Args:
+        group: Entry point group scanned for third-party plugins (None disables discovery).
+        plugins: Built-in plugins, name -> import path (or an already imported object).
+    """
+    def __init__(self, group: Optional[str], plugins: Dict[str, Any]) -> None:
+        self.group = group
+        self._targets: Dict[str, Any] = dict(plugins)
+        self._loaded: Dict[str, Any] = {}
+        self._discovered = group is None
+        self._lock = threading.Lock()
+
+    def register(self, name: str, target: Any) -> None:
+        """
+        Add or replace a plugin: an import path, an entry point or the object itself.
+        """
+        with self._lock:
+            self._targets[name] = target
+            self._loaded.pop(name, None)
+
+    def _discover(self) -> None:
+        if self._discovered:
+            return
+        with self._lock:
+            if self._discovered:
+                return
+            try:
+                entry_points = metadata.entry_points(group=self.group)
+            except TypeError:
+                # Python < 3.10: entry_points() returns a dict of groups
+                entry_points = metadata.entry_points().get(self.group, [])
+            for entry_point in entry_points:
+                if entry_point.name in self._targets:
+                    logger.warning(f"Ignoring {self.group} entry point '{entry_point.name}': the name is built in")
+                    continue
+                self._targets[entry_point.name] = entry_point
+            self._discovered = True
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._loaded:
+            return self._loaded[name]
+        self._discover()
+        if name not in self._targets:
+            raise KeyError(name)
+
+        target = self._targets[name]
+        try:
+            if isinstance(target, str):
+                loaded = import_object(target)
+            elif isinstance(target, metadata.EntryPoint):
+                loaded = target.load()
+            else:
+                loaded = target
+        except ImportError as exc:
+            source = target if isinstance(target, str) else getattr(target, "value", repr(target))
+            raise ImportError(f"Could not load plugin '{name}' from {source}: {exc}") from exc
+        with self._lock:
+            self._loaded[name] = loaded
+        return loaded
+
+    def __contains__(self, name: object) -> bool:
+        self._discover()
+        return name in self._targets
+
+    def __iter__(self) -> Iterator[str]:
+        self._discover()
+        return iter(list(self._targets))
+
+    def __len__(self) -> int:
+        self._discover()
+        return len(self._targets)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._loaded
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.group!r}, {sorted(self)})"
@@ -0,0 +1,141 @@
+#compact ranked results: doc indices + scores, with dict-compatible access and lazy text
+from collections.abc import Mapping
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+
+class RankedList:
+    """
+    One query's ranked results as parallel arrays over a corpus.
+
+    Holds int32 positions into `corpus` and float32 scores (plus float32 reranker scores once
+    reranked) instead of one dict per hit. Doc ids and texts are looked up in the corpus only
+    when read, so a ranking kept for evaluation costs 8 bytes per hit and never touches
+    passage text.
+
+    For existing callers it behaves like a list of result dicts: indexing, iteration and
+    comparison yield RankedDoc views with "id", "text", "score" (and "reranker_score") keys,
+    and slicing returns a RankedList. to_dicts() materializes plain dicts.
+    """
+    __slots__ = ("doc_indices", "scores", "reranker_scores", "corpus")
+
+    def __init__(
+        self,
+        doc_indices: Sequence[int],
+        scores: Sequence[float],
+        corpus: Sequence[Dict[str, str]],
+        reranker_scores: Optional[Sequence[float]] = None
+    ) -> None:
+        self.doc_indices = np.asarray(doc_indices, dtype=np.int32)
+        self.scores = np.asarray(scores, dtype=np.float32)
+        if len(self.doc_indices) != len(self.scores):
+            raise ValueError(f"Got {len(self.doc_indices)} doc indices but {len(self.scores)} scores")
+        self.reranker_scores = None if reranker_scores is None else np.asarray(reranker_scores, dtype=np.float32)
+        self.corpus = corpus
+
+    def __len__(self) -> int:
+        return len(self.doc_indices)
+
+    def __getitem__(self, item: Union[int, slice]) -> Union["RankedDoc", "RankedList"]:
+        if isinstance(item, slice):
+            return RankedList(
+                self.doc_indices[item], self.scores[item], self.corpus,
+                None if self.reranker_scores is None else self.reranker_scores[item]
+            )
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError(f"Result index {item} out of range")
+        return RankedDoc(self, item)
+
+    def __iter__(self) -> Iterator["RankedDoc"]:
+        for position in range(len(self)):
+            yield RankedDoc(self, position)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, (RankedList, list)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"RankedList({len(self)} hits)"
+
+    def ids(self) -> List[str]:
+        """
+        Doc ids in rank order. Reads only the id table of a DocStore corpus, never the texts.
+        """
+        indices = self.doc_indices.tolist()
+        id_table = getattr(self.corpus, "ids", None)
+        if id_table is not None:
+            return [id_table[idx] for idx in indices]
+        return [self.corpus[idx]["id"] for idx in indices]
+
+    def texts(self) -> List[str]:
+        """
+        Passage texts in rank order, resolved from the corpus on demand.
+        """
+        text_table = getattr(self.corpus, "texts", None)
+        if text_table is not None:
+            return [text_table[idx] for idx in self.doc_indices.tolist()]
+        return [self.corpus[idx]["text"] for idx in self.doc_indices.tolist()]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [dict(doc) for doc in self]
+
+    def rerank(self, head_scores: Sequence[float]) -> "RankedList":
+        """
+        New list with the first len(head_scores) hits sorted by those reranker scores
+        (descending, ties keep first-stage order) followed by the rest in first-stage order
+        with a reranker score of -inf. First-stage scores are kept alongside.
+        """
+        depth = len(head_scores)
+        head_scores = np.asarray(head_scores, dtype=np.float64)
+        order = np.concatenate([np.argsort(-head_scores, kind="stable"), np.arange(depth, len(self))])
+        reranker_scores = np.concatenate([head_scores, np.full(len(self) - depth, -np.inf)])
+        return RankedList(self.doc_indices[order], self.scores[order], self.corpus, reranker_scores[order])
+
+
+class RankedDoc(Mapping):
+    """
+    Read-only dict view of one hit in a RankedList; the text is fetched only when accessed.
+    """
+    __slots__ = ("ranked", "position")
+
+    def __init__(self, ranked: RankedList, position: int) -> None:
+        self.ranked = ranked
+        self.position = position
+
+    def __getitem__(self, key: str) -> Any:
+        ranked, position = self.ranked, self.position
+        if key == "id":
+            id_table = getattr(ranked.corpus, "ids", None)
+            idx = int(ranked.doc_indices[position])
+            return id_table[idx] if id_table is not None else ranked.corpus[idx]["id"]
+        if key == "text":
+            return ranked.corpus[int(ranked.doc_indices[position])]["text"]
+        if key == "score":
+            return float(ranked.scores[position])
+        if key == "reranker_score" and ranked.reranker_scores is not None:
+            return float(ranked.reranker_scores[position])
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from ("id", "text", "score")
+        if self.ranked.reranker_scores is not None:
+            yield "reranker_score"
+
+    def __len__(self) -> int:
+        return 3 if self.ranked.reranker_scores is None else 4
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+def ranked_ids(documents: Union[RankedList, List[Dict[str, Any]]]) -> List[str]:
+    """
+    Doc ids of a ranked result, whether a RankedList or a list of result dicts.
+    """
+    if isinstance(documents, RankedList):
+        return documents.ids()
+    return [doc["id"] for doc in documents]
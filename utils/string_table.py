@@ -0,0 +1,101 @@
+import bisect
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+def write_string_table(path_prefix: str, strings: Iterable[str]) -> None:
+    """
+    Write strings as a flat table: one UTF-8 blob (`<prefix>.bin`) plus an int64 offsets
+    array (`<prefix>_offsets.npy`) with len(strings) + 1 entries.
+    """
+    offsets = [0]
+    with open(f"{path_prefix}.bin", "wb") as f:
+        for s in strings:
+            data = s.encode("utf-8")
+            f.write(data)
+            offsets.append(offsets[-1] + len(data))
+    np.save(f"{path_prefix}_offsets.npy", np.array(offsets, dtype=np.int64))
+
+
+class StringTable:
+    """
+    Read-only, memory-mapped view over a table written by `write_string_table`.
+    Strings are decoded on access, so opening a table costs the same for any size.
+    """
+    def __init__(self, path_prefix: str) -> None:
+        self.offsets = np.load(f"{path_prefix}_offsets.npy", mmap_mode="r")
+        blob_path = f"{path_prefix}.bin"
+        # np.memmap cannot map empty files
+        if os.path.getsize(blob_path) > 0:
+            self.blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        else:
+            self.blob = np.empty(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get_bytes(self, idx: int) -> bytes:
+        return self.blob[self.offsets[idx]:self.offsets[idx + 1]].tobytes()
+
+    def __getitem__(self, idx: int) -> str:
+        return self.get_bytes(idx).decode("utf-8")
+
+
+class _BytesView:
+    """
+    Sequence adapter so `bisect` can binary-search a StringTable on raw bytes.
+    """
+    def __init__(self, table: StringTable) -> None:
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __getitem__(self, idx: int) -> bytes:
+        return self.table.get_bytes(idx)
+
+
+class SortedStringIndex:
+    """
+    Dict-like lookup (`get`, `in`, `len`) over a StringTable whose strings are sorted by
+    their UTF-8 bytes, mapping each string to the integer value stored at the same position.
+    Lookups are O(log n) binary searches over the memory-mapped table.
+    """
+    def __init__(self, table: StringTable, values: np.ndarray) -> None:
+        self.table = table
+        self.values = values
+        self._view = _BytesView(table)
+
+    @staticmethod
+    def write(path_prefix: str, mapping: dict) -> None:
+        """
+        Persist a str -> int mapping as a sorted string table plus a values array.
+        """
+        items = sorted(mapping.items(), key=lambda item: item[0].encode("utf-8"))
+        write_string_table(path_prefix, (key for key, _ in items))
+        np.save(f"{path_prefix}_values.npy", np.array([value for _, value in items], dtype=np.int64))
+
+    @classmethod
+    def load(cls, path_prefix: str) -> "SortedStringIndex":
+        return cls(StringTable(path_prefix), np.load(f"{path_prefix}_values.npy", mmap_mode="r"))
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def get(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        data = key.encode("utf-8")
+        pos = bisect.bisect_left(self._view, data)
+        if pos < len(self.table) and self.table.get_bytes(pos) == data:
+            return int(self.values[pos])
+        return default
+
+    def __getitem__(self, key: str) -> int:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
@@ -1,4 +1,7 @@
-from typing import List
+import re
+from typing import List, Dict, Any, Iterable, Mapping, Optional, Tuple, Union
+
+import numpy as np
 
 def simple_tokenize(text: str) -> List[str]:
     """
@@ -6,4 +9,178 @@ def simple_tokenize(text: str) -> List[str]:
 
     return text.lower().split()
 
-### Add other tokenization methods here as needed ###
\ No newline at end of file
+# Lucene's default English stopword set
+ENGLISH_STOPWORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "if", "in", "into", "is", "it", "no", "not",
+    "of", "on", "or", "such", "that", "the", "their", "then", "there", "these", "they", "this", "to", "was",
+    "will", "with",
+])
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def s_stem(token: str) -> str:
+    """
+    Harman's S-stemmer: strips English plural endings only, so it rarely conflates unrelated words.
+    Tokens shorter than three characters are kept as is.
+    """
+    if len(token) < 3:
+        return token
+    if len(token) > 3 and token.endswith("ies") and not token.endswith(("eies", "aies")):
+        return token[:-3] + "y"
+    if token.endswith("es") and not token.endswith(("aes", "ees", "oes")):
+        return token[:-1]
+    if token.endswith("s") and not token.endswith(("us", "ss")):
+        return token[:-1]
+    return token
+
+
+def _load_stemmer(name: str):
+    if name == "s":
+        return s_stem
+    if name == "porter":
+        try:
+            from nltk.stem.porter import PorterStemmer
+        except ImportError as exc:
+            raise ImportError("The 'porter' stemmer needs nltk (pip install nltk)") from exc
+        return PorterStemmer().stem
+    raise ValueError(f"Unknown stemmer: {name}. Expected 's' or 'porter'")
+
+
+class Analyzer:
+    """
+    Configurable text analysis: lowercasing, punctuation stripping, stopword removal and stemming.
+
+    The default configuration (lowercase + whitespace split) produces exactly simple_tokenize().
+    Stopword removal and stemming are applied per distinct token through a memo table, so each
+    word form is normalized once per analyzer no matter how often it occurs; the table stops
+    growing at `cache_size` entries.
+
+    Args:
+        lowercase: Lowercase text before splitting.
+        strip_punctuation: Replace runs of non-word, non-space characters with a space.
+        stopwords: None, "english" (ENGLISH_STOPWORDS) or an iterable of words, matched against the tokens.
+        stemmer: None, "s" (plural stripping, no dependencies) or "porter" (needs nltk).
+        cache_size: Maximum number of memoized token normalizations.
+    """
+    def __init__(
+        self,
+        lowercase: bool = True,
+        strip_punctuation: bool = False,
+        stopwords: Optional[Union[str, Iterable[str]]] = None,
+        stemmer: Optional[str] = None,
+        cache_size: int = 1_000_000
+    ) -> None:
+        if isinstance(stopwords, str):
+            if stopwords != "english":
+                raise ValueError(f"Unknown stopword list: {stopwords}. Expected 'english' or a list of words")
+            self.stopwords_name: Optional[str] = "english"
+            self.stopwords = ENGLISH_STOPWORDS
+        else:
+            self.stopwords_name = None
+            self.stopwords = frozenset(stopwords) if stopwords is not None else frozenset()
+        self.lowercase = lowercase
+        self.strip_punctuation = strip_punctuation
+        self.stemmer = stemmer
+        self._stem = _load_stemmer(stemmer) if stemmer is not None else None
+        self.cache_size = cache_size
+        self._cache: Dict[str, Optional[str]] = {}
+
+    def config(self) -> Dict[str, Any]:
+        """
+        JSON-serializable settings that determine the analyzer output (stored with indexes).
+        """
+        return {
+            "name": "analyzer",
+            "lowercase": self.lowercase,
+            "strip_punctuation": self.strip_punctuation,
+            "stopwords": self.stopwords_name or sorted(self.stopwords),
+            "stemmer": self.stemmer,
+        }
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "Analyzer":
+        return cls(
+            lowercase=config.get("lowercase", True),
+            strip_punctuation=config.get("strip_punctuation", False),
+            stopwords=config.get("stopwords") or None,
+            stemmer=config.get("stemmer"),
+        )
+
+    def _normalize(self, token: str) -> Optional[str]:
+        """
+        Stopword check and stemming for one token, memoized. None drops the token.
+        """
+        if token in self.stopwords:
+            term = None
+        else:
+            term = self._stem(token) if self._stem is not None else token
+        if len(self._cache) < self.cache_size:
+            self._cache[token] = term
+        return term
+
+    def analyze(self, text: str) -> List[str]:
+        if self.lowercase:
+            text = text.lower()
+        if self.strip_punctuation:
+            text = _PUNCTUATION.sub(" ", text)
+        tokens = text.split()
+        if not self.stopwords and self._stem is None:
+            return tokens
+
+        cache, normalize = self._cache, self._normalize
+        terms = []
+        for token in tokens:
+            term = cache[token] if token in cache else normalize(token)
+            if term is not None:
+                terms.append(term)
+        return terms
+
+
+class Vocabulary:
+    """
+    Interns terms into compact int32 ids, assigned in order of first appearance.
+
+    `term_ids` may also be a read-only mapping with get(), such as a memory-mapped
+    SortedStringIndex loaded with a saved index; interning new terms then fails.
+    """
+    def __init__(self, term_ids: Optional[Mapping[str, int]] = None) -> None:
+        self.term_ids = term_ids if term_ids is not None else {}
+
+    def __len__(self) -> int:
+        return len(self.term_ids)
+
+    def intern(self, terms: Iterable[str]) -> List[int]:
+        """
+        Ids of `terms`, adding unseen terms to the vocabulary.
+        """
+        term_ids = self.term_ids
+        return [term_ids.setdefault(term, len(term_ids)) for term in terms]
+
+    def lookup(self, terms: Iterable[str]) -> List[int]:
+        """
+        Ids of the known `terms`, in order; out-of-vocabulary terms are dropped.
+        """
+        get = self.term_ids.get
+        return [term_id for term_id in map(get, terms) if term_id is not None]
+
+    def encode(self, terms: Iterable[str], add: bool = True) -> np.ndarray:
+        ids = self.intern(terms) if add else self.lookup(terms)
+        return np.array(ids, dtype=np.int32)
+
+    def encode_texts(self, texts: Iterable[str], analyzer: Analyzer) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Analyze and intern a batch of texts.
+
+        Returns:
+            (flat int32 term ids of all texts, int64 number of terms per text).
+        """
+        ids: List[int] = []
+        lengths: List[int] = []
+        for text in texts:
+            text_ids = self.intern(analyzer.analyze(text))
+            ids.extend(text_ids)
+            lengths.append(len(text_ids))
+        return np.array(ids, dtype=np.int32), np.array(lengths, dtype=np.int64)
+
+### Add other tokenization methods here as needed ###